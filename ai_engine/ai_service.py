@@ -1,22 +1,21 @@
 
-from openai import OpenAI
 import os
 import json
 from django.conf import settings
 import random
 import re
 import math
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from . import clients, response_cache
+from .rate_limit import CircuitOpenError, RateLimitedError, backoff_delay, get_circuit_breaker, provider_call
+from .streaming import QuestionStreamParser, iter_stream_content
+from .validation import split_valid
 
 def get_client():
-    api_key = settings.OPENROUTER_API_KEY
-    if not api_key:
-        print("WARNING: OPENROUTER_API_KEY not found.")
-        return None
-    return OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key,
-    )
+    # Shared, pooled client from the registry; see clients.py
+    return clients.get_client()
 
 def extract_json_substring(text):
     """
@@ -57,64 +56,104 @@ def extract_json_substring(text):
                 
     return None
 
-def generate_json_with_retry(client, prompt, retries=3):
-    """Generates content and parses JSON with retries using OpenRouter."""
+def parse_json_content(content):
+    """Best-effort JSON extraction from a model response. Returns None if nothing parses."""
+    # 1. Cleaner: Remove markdown code blocks
+    content_clean = content.replace('```json', '').replace('```', '').strip()
+    
+    # 2. Try Standard Decoding first (fastest)
+    try:
+        # strict=False allows control characters
+        obj, _ = json.JSONDecoder(strict=False).raw_decode(content_clean)
+        return obj
+    except json.JSONDecodeError:
+        pass
+    
+    # 3. Smart Extraction (Stack based)
+    extracted_json = extract_json_substring(content_clean)
+    if extracted_json:
+        try:
+            return json.loads(extracted_json, strict=False)
+        except json.JSONDecodeError:
+            pass
+    
+    # 4. Fallback: Naive slicing (if stack failed due to malformed chars)
+    if '{' in content_clean:
+        try:
+            start = content_clean.find('{')
+            end = content_clean.rfind('}') + 1
+            # Try cleaning trailing commas which is a common AI error
+            clean_slice = re.sub(r',(\s*[}\]])', r'\1', content_clean[start:end])
+            return json.loads(clean_slice, strict=False)
+        except:
+            pass
+    if '[' in content_clean:
+        try:
+            start = content_clean.find('[')
+            end = content_clean.rfind(']') + 1
+            clean_slice = re.sub(r',(\s*[}\]])', r'\1', content_clean[start:end])
+            return json.loads(clean_slice, strict=False)
+        except:
+            pass
+
+    return None
+
+def generate_json_with_retry(client, prompt, retries=3, temperature=0.7, use_cache=True):
+    """
+    Generates content and parses JSON with retries using OpenRouter.
+
+    Parsed responses are stored in the prompt-response cache keyed by
+    (model, prompt, temperature). With use_cache (the default) an identical
+    prompt is answered from the cache until the entry is AI_RESPONSE_CACHE_TTL
+    old. Callers that need fresh output (new questions) pass use_cache=False:
+    the response is still recorded, but only replay mode
+    (AI_RESPONSE_CACHE_REPLAY, which never calls the provider) answers such
+    prompts from the cache.
+    Raises CircuitOpenError while the provider is known to be down.
+    """
+    model_name = getattr(settings, 'OPENROUTER_MODEL', "google/gemini-2.0-flash-exp:free")
+
+    cache_key = response_cache.make_key(model_name, prompt, temperature)
+    cached = response_cache.get(cache_key) if use_cache or response_cache.replay_only() else None
+    if cached is not None:
+        return cached
+    if response_cache.replay_only():
+        print("REPLAY: no cached response for this prompt, not calling the provider.")
+        return None
+
     if not client:
         return None
-        
-    model_name = getattr(settings, 'OPENROUTER_MODEL', "google/gemini-2.0-flash-exp:free")
 
+    retry_after = None
     for attempt in range(retries):
+        if attempt:
+            time.sleep(backoff_delay(attempt, retry_after))
+            retry_after = None
         try:
-            response = client.chat.completions.create(
+            response = provider_call(
+                client,
                 model=model_name,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
+                temperature=temperature,
             )
             content = response.choices[0].message.content
-            
-            # 1. Cleaner: Remove markdown code blocks
-            content_clean = content.replace('```json', '').replace('```', '').strip()
-            
-            # 2. Try Standard Decoding first (fastest)
-            try:
-                # strict=False allows control characters
-                obj, _ = json.JSONDecoder(strict=False).raw_decode(content_clean)
+
+            obj = parse_json_content(content)
+            if obj is not None:
+                response_cache.set(cache_key, obj)
                 return obj
-            except json.JSONDecodeError:
-                pass
-            
-            # 3. Smart Extraction (Stack based)
-            extracted_json = extract_json_substring(content_clean)
-            if extracted_json:
-                try:
-                    return json.loads(extracted_json, strict=False)
-                except json.JSONDecodeError:
-                    pass
-            
-            # 4. Fallback: Naive slicing (if stack failed due to malformed chars)
-            if '{' in content_clean:
-                try:
-                    start = content_clean.find('{')
-                    end = content_clean.rfind('}') + 1
-                    # Try cleaning trailing commas which is a common AI error
-                    clean_slice = re.sub(r',(\s*[}\]])', r'\1', content_clean[start:end])
-                    return json.loads(clean_slice, strict=False)
-                except:
-                    pass
-            if '[' in content_clean:
-                try:
-                    start = content_clean.find('[')
-                    end = content_clean.rfind(']') + 1
-                    clean_slice = re.sub(r',(\s*[}\]])', r'\1', content_clean[start:end])
-                    return json.loads(clean_slice, strict=False)
-                except:
-                    pass
-
-            print(f"WARNING: No valid JSON found in attempt {attempt+1}. Content snippet: {content_clean[:200]}...")
+
+            print(f"WARNING: No valid JSON found in attempt {attempt+1}. Content snippet: {content.strip()[:200]}...")
             
+        except CircuitOpenError as e:
+            # Not retried here: callers decide whether the whole operation fails
+            print(f"Error in attempt {attempt+1}: {e}")
+            raise
+        except RateLimitedError as e:
+            print(f"Error in attempt {attempt+1}: {e}")
+            retry_after = e.retry_after
         except Exception as e:
             print(f"Error in attempt {attempt+1}: {e}")
             
@@ -139,13 +178,9 @@ def generate_question(topic_name, difficulty):
     - explanation: A detailed explanation of the solution
     """
 
-    return generate_json_with_retry(client, prompt)
+    return generate_json_with_retry(client, prompt, use_cache=False)
 
 def explain_answer(question_text, user_answer, correct_answer):
-    client = get_client()
-    if not client:
-        return "AI explanation unavailable (API Key missing)."
-
     model_name = getattr(settings, 'OPENROUTER_MODEL', "google/gemini-2.0-flash-exp:free")
 
     prompt = f"""
@@ -156,319 +191,601 @@ def explain_answer(question_text, user_answer, correct_answer):
     Explain why the correct answer is correct and, if the user was wrong, why their answer is incorrect.
     Keep it concise and helpful for a student.
     """
-    
+
+    # Every learner who picks the same wrong option sends the same prompt, so answer repeats from the cache
+    cache_key = response_cache.make_key(model_name, prompt, 0.7)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    if response_cache.replay_only():
+        return "AI explanation unavailable (no cached response in replay mode)."
+
+    client = get_client()
+    if not client:
+        return "AI explanation unavailable (API Key missing)."
+
     try:
-        response = client.chat.completions.create(
+        response = provider_call(
+            client,
             model=model_name,
             messages=[
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
         )
-        return response.choices[0].message.content
+        explanation = response.choices[0].message.content
+        response_cache.set(cache_key, explanation)
+        return explanation
     except Exception as e:
         return f"Error generating explanation: {e}"
 
-def generate_test_questions(subject_name, num_questions, difficulty='Medium'):
-    print(f"DEBUG: generate_test_questions called for {subject_name}, {num_questions}")
-    client = get_client()
-    if not client:
-        return []
+# Define sub-topics for variety
+SUB_TOPICS_MAP = {
+    'Quantitative Aptitude': [
+        'Data Interpretation (Table/Bar/Line)', 'Number Series (Missing/Wrong)', 
+        'Quadratic Equations', 'Simplification & Approximation', 
+        'Arithmetic (Profit Loss, SI/CI, Time Work)', 'Mensuration', 'Probability'
+    ],
+    'Reasoning Ability': [
+        'Puzzles (Floor/Box/Day)', 'Seating Arrangement (Circular/Linear)', 
+        'Syllogism', 'Inequality', 'Coding-Decoding', 'Blood Relations', 
+        'Direction Sense', 'Input-Output'
+    ],
+    'English Language': [
+        'Reading Comprehension', 'Cloze Test', 'Error Detection', 
+        'Sentence Rearrangement (Para Jumbles)', 'Fill in the Blanks', 
+        'Word Swap', 'Phrase Replacement'
+    ],
+    'Computer Knowledge': [
+        'Computer Hardware', 'Software & Operating Systems', 'Internet & Networking',
+        'DBMS', 'MS Office (Word, Excel, PowerPoint)', 'Computer Security',
+        'Computer Abbreviations', 'History & Generations'
+    ],
+    'General Awareness': [
+        'Current Affairs (National/International)', 'Banking & Financial Awareness',
+        'Static GK (Parks, Dams, Capitals)', 'Sports', 'Awards & Honours',
+        'Books & Authors', 'Important Days'
+    ]
+}
 
-    # Define sub-topics for variety
-    sub_topics_map = {
-        'Quantitative Aptitude': [
-            'Data Interpretation (Table/Bar/Line)', 'Number Series (Missing/Wrong)', 
-            'Quadratic Equations', 'Simplification & Approximation', 
-            'Arithmetic (Profit Loss, SI/CI, Time Work)', 'Mensuration', 'Probability'
-        ],
-        'Reasoning Ability': [
-            'Puzzles (Floor/Box/Day)', 'Seating Arrangement (Circular/Linear)', 
-            'Syllogism', 'Inequality', 'Coding-Decoding', 'Blood Relations', 
-            'Direction Sense', 'Input-Output'
-        ],
-        'English Language': [
-            'Reading Comprehension', 'Cloze Test', 'Error Detection', 
-            'Sentence Rearrangement (Para Jumbles)', 'Fill in the Blanks', 
-            'Word Swap', 'Phrase Replacement'
-        ],
-        'Computer Knowledge': [
-            'Computer Hardware', 'Software & Operating Systems', 'Internet & Networking',
-            'DBMS', 'MS Office (Word, Excel, PowerPoint)', 'Computer Security',
-            'Computer Abbreviations', 'History & Generations'
-        ],
-        'General Awareness': [
-            'Current Affairs (National/International)', 'Banking & Financial Awareness',
-            'Static GK (Parks, Dams, Capitals)', 'Sports', 'Awards & Honours',
-            'Books & Authors', 'Important Days'
-        ]
-    }
-    
-    # Topic-wise question distribution for RRB Clerk (40 questions per subject)
-    TOPIC_DISTRIBUTION = {
-        'Quantitative Aptitude': {
-            'Data Interpretation (Table/Bar/Line)': 10,
-            'Number Series (Missing/Wrong)': 5,
-            'Simplification & Approximation': 10,
-            'Arithmetic (Profit Loss, SI/CI, Time Work)': 10,
-            'Quadratic Equations': 3,
-            'Mensuration': 1,
-            'Probability': 1
-        },
-        'Reasoning Ability': {
-            'Puzzles (Floor/Box/Day)': 10,
-            'Seating Arrangement (Circular/Linear)': 10,
-            'Syllogism': 5,
-            'Inequality': 5,
-            'Coding-Decoding': 3,
-            'Blood Relations': 3,
-            'Direction Sense': 2,
-            'Input-Output': 2
-        },
-        'English Language': {
-            'Reading Comprehension': 15,
-            'Cloze Test': 5,
-            'Error Detection': 5,
-            'Sentence Rearrangement (Para Jumbles)': 5,
-            'Fill in the Blanks': 5,
-            'Word Swap': 3,
-            'Phrase Replacement': 2
-        },
-        'Computer Knowledge': {
-            'MS Office (Word, Excel, PowerPoint)': 10,
-            'Internet & Networking': 8,
-            'Computer Hardware': 5,
-            'Software & Operating Systems': 5,
-            'Computer Security': 4,
-            'DBMS': 4,
-            'Computer Abbreviations': 2,
-            'History & Generations': 2
-        },
-        'General Awareness': {
-            'Current Affairs (National/International)': 15,
-            'Banking & Financial Awareness': 10,
-            'Static GK (Parks, Dams, Capitals)': 5,
-            'Sports': 3,
-            'Awards & Honours': 3,
-            'Books & Authors': 2,
-            'Important Days': 2
-        }
+# Topic-wise question distribution for RRB Clerk (40 questions per subject)
+TOPIC_DISTRIBUTION = {
+    'Quantitative Aptitude': {
+        'Data Interpretation (Table/Bar/Line)': 10,
+        'Number Series (Missing/Wrong)': 5,
+        'Simplification & Approximation': 10,
+        'Arithmetic (Profit Loss, SI/CI, Time Work)': 10,
+        'Quadratic Equations': 3,
+        'Mensuration': 1,
+        'Probability': 1
+    },
+    'Reasoning Ability': {
+        'Puzzles (Floor/Box/Day)': 10,
+        'Seating Arrangement (Circular/Linear)': 10,
+        'Syllogism': 5,
+        'Inequality': 5,
+        'Coding-Decoding': 3,
+        'Blood Relations': 3,
+        'Direction Sense': 2,
+        'Input-Output': 2
+    },
+    'English Language': {
+        'Reading Comprehension': 15,
+        'Cloze Test': 5,
+        'Error Detection': 5,
+        'Sentence Rearrangement (Para Jumbles)': 5,
+        'Fill in the Blanks': 5,
+        'Word Swap': 3,
+        'Phrase Replacement': 2
+    },
+    'Computer Knowledge': {
+        'MS Office (Word, Excel, PowerPoint)': 10,
+        'Internet & Networking': 8,
+        'Computer Hardware': 5,
+        'Software & Operating Systems': 5,
+        'Computer Security': 4,
+        'DBMS': 4,
+        'Computer Abbreviations': 2,
+        'History & Generations': 2
+    },
+    'General Awareness': {
+        'Current Affairs (National/International)': 15,
+        'Banking & Financial Awareness': 10,
+        'Static GK (Parks, Dams, Capitals)': 5,
+        'Sports': 3,
+        'Awards & Honours': 3,
+        'Books & Authors': 2,
+        'Important Days': 2
     }
+}
 
-    BATCH_SIZE = 5 # Reduced from 20 to prevent JSON truncation/parsing errors
-    all_questions = []
-    
-    # Check if we have a specific distribution for this subject
-    if subject_name in TOPIC_DISTRIBUTION and num_questions == sum(TOPIC_DISTRIBUTION[subject_name].values()):
-        # Use the predefined distribution
-        topic_distribution = TOPIC_DISTRIBUTION[subject_name]
-        
-        # Topics that require grouped questions (Sets of 5)
-        GROUPED_TOPICS = [
-            'Data Interpretation (Table/Bar/Line)',
-            'Reading Comprehension',
-            'Puzzles (Floor/Box/Day)',
-            'Seating Arrangement (Circular/Linear)'
-        ]
+# Topics that require grouped questions (Sets of 5)
+GROUPED_TOPICS = [
+    'Data Interpretation (Table/Bar/Line)',
+    'Reading Comprehension',
+    'Puzzles (Floor/Box/Day)',
+    'Seating Arrangement (Circular/Linear)'
+]
 
-        for topic, count in topic_distribution.items():
-            if count == 0:
-                continue
-            
-            # Check if this is a grouped topic
-            if topic in GROUPED_TOPICS:
-                # Generate in sets of 5
-                num_sets = math.ceil(count / 5)
-                
-                for set_idx in range(num_sets):
-                    time.sleep(4) # Rate limit protection
-                    questions_in_set = min(5, count - (set_idx * 5))
-                    if questions_in_set <= 0: break
-
-                    # Determine chart type for Data Interpretation
-                    di_instruction = ""
-                    chart_json_template = '"chart_data": null'
-                    
-                    if topic == 'Data Interpretation (Table/Bar/Line)':
-                        chart_type = random.choice(['table', 'bar', 'line', 'pie'])
-                        di_instruction = f"""
-                        SPECIAL INSTRUCTION FOR DATA INTERPRETATION:
-                        - Create a {chart_type.upper()} CHART.
-                        - Provide structured data in 'common_data' -> 'chart_data'.
-                        - DO NOT describe the data in the question text.
-                        """
-                        
-                        if chart_type == 'table':
-                            di_instruction += "- FOR TABLES: You MUST provide 'headers' (list of strings) and 'rows' (list of lists of strings)."
-                            chart_json_template = """
-                            "chart_data": {
-                                "type": "table", 
-                                "title": "Table Title",
-                                "headers": ["Col1", "Col2"],
-                                "rows": [["Row1Data1", "Row1Data2"], ["Row2Data1", "Row2Data2"]] 
-                            }
-                            """
-                        else:
-                            di_instruction += "- FOR GRAPHS: You MUST provide 'labels' (list of strings) and 'datasets' (list of objects with 'label' and 'data')."
-                            chart_json_template = f"""
-                            "chart_data": {{
-                                "type": "{chart_type}", 
-                                "title": "{chart_type.capitalize()} Chart Title",
-                                "labels": ["Label1", "Label2", "Label3"],
-                                "datasets": [
-                                    {{
-                                        "label": "Series 1",
-                                        "data": [10, 20, 30]
-                                    }}
-                                ]
-                            }}
-                            """
-
-                    prompt = f"""
-                    Act as an expert exam setter for RRB Clerk exams.
-                    Generate a SET of {questions_in_set} multiple-choice questions for '{subject_name}' on the topic '{topic}'.
-                    
-                    CRITICAL INSTRUCTIONS:
-                    1. Topic: {topic}
-                    2. Difficulty Level: {difficulty}.
-                    3. This must be a LINKED SET of questions based on a common Data Block (Graph, Table, Passage, or Puzzle).
-                    4. First, generate the Common Data Block.
-                    5. Then, generate {questions_in_set} questions based on that SAME Data Block.
-                    6. VERIFY YOUR ANSWERS: Ensure option A-E are distinct and the 'correct_option' is logically derivable from the data.
-                    7. EXPLANATION: Provide a step-by-step calculation or reasoning for the correct option.
-                    
-                    {di_instruction}
-                    
-                    SPECIAL INSTRUCTION FOR PUZZLES/SEATING ARRANGEMENT:
-                    - Provide the main puzzle text/conditions in 'common_data' -> 'text'.
-                    
-                    SPECIAL INSTRUCTION FOR READING COMPREHENSION:
-                    - Provide the passage in 'common_data' -> 'text'.
-
-                    Provide the output as a SINGLE JSON OBJECT with this structure:
+BATCH_SIZE = 5 # Reduced from 20 to prevent JSON truncation/parsing errors
+
+
+def _grouped_prompt(subject_name, topic, questions_in_set, difficulty):
+    # Determine chart type for Data Interpretation
+    di_instruction = ""
+    chart_json_template = '"chart_data": null'
+
+    if topic == 'Data Interpretation (Table/Bar/Line)':
+        chart_type = random.choice(['table', 'bar', 'line', 'pie'])
+        di_instruction = f"""
+        SPECIAL INSTRUCTION FOR DATA INTERPRETATION:
+        - Create a {chart_type.upper()} CHART.
+        - Provide structured data in 'common_data' -> 'chart_data'.
+        - DO NOT describe the data in the question text.
+        """
+
+        if chart_type == 'table':
+            di_instruction += "- FOR TABLES: You MUST provide 'headers' (list of strings) and 'rows' (list of lists of strings)."
+            chart_json_template = """
+            "chart_data": {
+                "type": "table", 
+                "title": "Table Title",
+                "headers": ["Col1", "Col2"],
+                "rows": [["Row1Data1", "Row1Data2"], ["Row2Data1", "Row2Data2"]] 
+            }
+            """
+        else:
+            di_instruction += "- FOR GRAPHS: You MUST provide 'labels' (list of strings) and 'datasets' (list of objects with 'label' and 'data')."
+            chart_json_template = f"""
+            "chart_data": {{
+                "type": "{chart_type}", 
+                "title": "{chart_type.capitalize()} Chart Title",
+                "labels": ["Label1", "Label2", "Label3"],
+                "datasets": [
                     {{
-                        "common_data": {{
-                            "text": "Passage or Puzzle text here (if applicable)",
-                            {chart_json_template}
-                        }},
-                        "questions": [
-                            {{
-                                "text": "Question text...",
-                                "option_a": "...",
-                                "option_b": "...",
-                                "option_c": "...",
-                                "option_d": "...",
-                                "option_e": "...",
-                                "correct_option": "A",
-                                "explanation": "Step 1: ... Step 2: ... Final Answer: ...",
-                                "topic": "{topic}"
-                            }},
-                            ... ({questions_in_set} questions)
-                        ]
+                        "label": "Series 1",
+                        "data": [10, 20, 30]
                     }}
-                    """
-
-                    data_set = generate_json_with_retry(client, prompt)
-                    
-                    if data_set and isinstance(data_set, dict):
-                        common_data = data_set.get('common_data', {})
-                        questions = data_set.get('questions', [])
-                        
-                        # Validate Table Data
-                        if 'chart_data' in common_data and common_data['chart_data']:
-                            cd = common_data['chart_data']
-                            if cd.get('type') == 'table':
-                                if 'rows' not in cd or not isinstance(cd['rows'], list) or len(cd['rows']) == 0:
-                                    print(f"WARNING: Table data missing 'rows' for {topic}. Attempting to fix or skip.")
-                                    if 'rows' not in cd: cd['rows'] = []
-                        
-                        # Flatten: Inject common data into each question
-                        for q in questions:
-                            if 'chart_data' in common_data:
-                                q['chart_data'] = common_data['chart_data']
-                            if 'text' in common_data and common_data['text']:
-                                q['passage'] = common_data['text']
-                            
-                            all_questions.append(q)
-                    else:
-                        print(f"FAILED to generate grouped questions for {topic} Set {set_idx+1} after retries.")
+                ]
+            }}
+            """
 
-            else:
-                # Standard independent questions generation
-                prompt = f"""
-                Act as an expert exam setter for RRB Clerk exams.
-                Generate {count} UNIQUE and HIGH-QUALITY multiple-choice questions for '{subject_name}' specifically on the topic '{topic}'.
-                
-                CRITICAL INSTRUCTIONS:
-                1. Topic: {topic}
-                2. Difficulty Level: {difficulty}.
-                3. Questions must be modeled after actual previous year question papers.
-                4. Ensure NO repetition of question patterns.
-                5. ACCURACY CHECK: Double-check the calculation/reasoning. The 'correct_option' MUST be correct.
-                6. OUTPUT FORMAT: Raw JSON only. NO markdown blocks (```json). NO intro/outro text.
-                
-                Provide the output as a JSON array of objects, where each object has:
-                - text: The question text
-                - option_a: Option A
-                - option_b: Option B
-                - option_c: Option C
-                - option_d: Option D
-                - option_e: Option E
-                - correct_option: The correct option letter (A, B, C, D, or E)
-                - explanation: A detailed step-by-step explanation proving the correct option.
-                - topic: The specific sub-topic name (use '{topic}')
-                """
-                
-                topic_questions = generate_json_with_retry(client, prompt)
-                
-                if topic_questions and isinstance(topic_questions, list):
-                    all_questions.extend(topic_questions)
-                else:
-                    print(f"FAILED to generate questions for {topic} after retries.")
-                    
+    prompt = f"""
+    Act as an expert exam setter for RRB Clerk exams.
+    Generate a SET of {questions_in_set} multiple-choice questions for '{subject_name}' on the topic '{topic}'.
+
+    CRITICAL INSTRUCTIONS:
+    1. Topic: {topic}
+    2. Difficulty Level: {difficulty}.
+    3. This must be a LINKED SET of questions based on a common Data Block (Graph, Table, Passage, or Puzzle).
+    4. First, generate the Common Data Block.
+    5. Then, generate {questions_in_set} questions based on that SAME Data Block.
+    6. VERIFY YOUR ANSWERS: Ensure option A-E are distinct and the 'correct_option' is logically derivable from the data.
+    7. EXPLANATION: Provide a step-by-step calculation or reasoning for the correct option.
+
+    {di_instruction}
+
+    SPECIAL INSTRUCTION FOR PUZZLES/SEATING ARRANGEMENT:
+    - Provide the main puzzle text/conditions in 'common_data' -> 'text'.
+
+    SPECIAL INSTRUCTION FOR READING COMPREHENSION:
+    - Provide the passage in 'common_data' -> 'text'.
+
+    Provide the output as a SINGLE JSON OBJECT with this structure:
+    {{
+        "common_data": {{
+            "text": "Passage or Puzzle text here (if applicable)",
+            {chart_json_template}
+        }},
+        "questions": [
+            {{
+                "text": "Question text...",
+                "option_a": "...",
+                "option_b": "...",
+                "option_c": "...",
+                "option_d": "...",
+                "option_e": "...",
+                "correct_option": "A",
+                "explanation": "Step 1: ... Step 2: ... Final Answer: ...",
+                "topic": "{topic}"
+            }},
+            ... ({questions_in_set} questions)
+        ]
+    }}
+    """
+
+    return prompt
+
+def _standard_prompt(subject_name, topic, count, difficulty):
+    prompt = f"""
+    Act as an expert exam setter for RRB Clerk exams.
+    Generate {count} UNIQUE and HIGH-QUALITY multiple-choice questions for '{subject_name}' specifically on the topic '{topic}'.
+
+    CRITICAL INSTRUCTIONS:
+    1. Topic: {topic}
+    2. Difficulty Level: {difficulty}.
+    3. Questions must be modeled after actual previous year question papers.
+    4. Ensure NO repetition of question patterns.
+    5. ACCURACY CHECK: Double-check the calculation/reasoning. The 'correct_option' MUST be correct.
+    6. OUTPUT FORMAT: Raw JSON only. NO markdown blocks (```json). NO intro/outro text.
+
+    Provide the output as a JSON array of objects, where each object has:
+    - text: The question text
+    - option_a: Option A
+    - option_b: Option B
+    - option_c: Option C
+    - option_d: Option D
+    - option_e: Option E
+    - correct_option: The correct option letter (A, B, C, D, or E)
+    - explanation: A detailed step-by-step explanation proving the correct option.
+    - topic: The specific sub-topic name (use '{topic}')
+    """
+
+    return prompt
+
+def _batch_prompt(subject_name, current_batch_size, difficulty):
+    available_topics = SUB_TOPICS_MAP.get(subject_name, ['General'])
+    selected_topics = random.sample(available_topics, min(len(available_topics), 3))
+    topics_str = ", ".join(selected_topics)
+
+    prompt = f"""
+    Act as an expert exam setter for SBI PO and IBPS PO exams.
+    Generate {current_batch_size} UNIQUE and HIGH-QUALITY multiple-choice questions for '{subject_name}'.
+
+    CRITICAL INSTRUCTIONS:
+    1. Focus specifically on these topics: {topics_str}.
+    2. Difficulty Level: {difficulty}.
+    3. Questions must be modeled after actual previous year question papers (2020-2024).
+    4. Ensure NO repetition of question patterns.
+    5. OUTPUT FORMAT: Raw JSON only. NO markdown blocks (```json). NO intro/outro text.
+
+    Provide the output as a JSON array of objects, where each object has:
+    - text: The question text (include directions if needed)
+    - option_a: Option A
+    - option_b: Option B
+    - option_c: Option C
+    - option_d: Option D
+    - option_e: Option E
+    - correct_option: The correct option letter (A, B, C, D, or E)
+    - explanation: A detailed step-by-step explanation
+    - topic: The specific sub-topic name
+    """
+
+    return prompt
+
+def _followup_prompt(task, missing, existing_questions):
+    """Asks only for the questions still missing from a task, as a plain JSON array."""
+    avoid = "\n".join(f"    - {q.get('text', '')[:80]}" for q in existing_questions)
+    if task['grouped']:
+        # Reuse the set's data block so the new questions belong to the same group
+        first = existing_questions[0]
+        common_data = json.dumps({'text': first.get('passage'), 'chart_data': first.get('chart_data')})
+        source = f"""based ONLY on this existing Data Block (do not change it):
+    {common_data}"""
+    elif task['topic']:
+        source = f"specifically on the topic '{task['topic']}'."
     else:
-        # Fallback to batch generation
-        num_batches = math.ceil(num_questions / BATCH_SIZE)
-        
-        for i in range(num_batches):
-            time.sleep(4) # Rate limit protection
-            current_batch_size = min(BATCH_SIZE, num_questions - len(all_questions))
-            
-            available_topics = sub_topics_map.get(subject_name, ['General'])
-            selected_topics = random.sample(available_topics, min(len(available_topics), 3))
-            topics_str = ", ".join(selected_topics)
+        source = "covering its usual exam topics."
 
-            prompt = f"""
-            Act as an expert exam setter for SBI PO and IBPS PO exams.
-            Generate {current_batch_size} UNIQUE and HIGH-QUALITY multiple-choice questions for '{subject_name}'.
-            
-            CRITICAL INSTRUCTIONS:
-            1. Focus specifically on these topics: {topics_str}.
-            2. Difficulty Level: {difficulty}.
-            3. Questions must be modeled after actual previous year question papers (2020-2024).
-            4. Ensure NO repetition of question patterns.
-            5. OUTPUT FORMAT: Raw JSON only. NO markdown blocks (```json). NO intro/outro text.
-            
-            Provide the output as a JSON array of objects, where each object has:
-            - text: The question text (include directions if needed)
-            - option_a: Option A
-            - option_b: Option B
-            - option_c: Option C
-            - option_d: Option D
-            - option_e: Option E
-            - correct_option: The correct option letter (A, B, C, D, or E)
-            - explanation: A detailed step-by-step explanation
-            - topic: The specific sub-topic name
-            """
+    return f"""
+    Act as an expert exam setter for banking exams.
+    Generate {missing} more multiple-choice questions for '{task['subject']}' {source}
 
-            batch_questions = generate_json_with_retry(client, prompt)
-            
-            if batch_questions and isinstance(batch_questions, list):
-                all_questions.extend(batch_questions)
+    Difficulty Level: {task['difficulty']}.
+    Do NOT repeat any of these existing questions:
+{avoid}
+
+    Options A-E must be distinct and 'correct_option' must be one of A, B, C, D, E.
+    OUTPUT FORMAT: Raw JSON only. NO markdown blocks (```json). NO intro/outro text.
+
+    Provide the output as a JSON array of objects, where each object has:
+    text, option_a, option_b, option_c, option_d, option_e, correct_option, explanation, topic
+    """
+
+def _check_common_data(common_data, topic):
+    # Validate Table Data
+    if 'chart_data' in common_data and common_data['chart_data']:
+        cd = common_data['chart_data']
+        if cd.get('type') == 'table':
+            if 'rows' not in cd or not isinstance(cd['rows'], list) or len(cd['rows']) == 0:
+                print(f"WARNING: Table data missing 'rows' for {topic}. Attempting to fix or skip.")
+                if 'rows' not in cd: cd['rows'] = []
+
+def _apply_common_data(q, common_data):
+    # Flatten: Inject common data into each question
+    if 'chart_data' in common_data:
+        q['chart_data'] = common_data['chart_data']
+    if 'text' in common_data and common_data['text']:
+        q['passage'] = common_data['text']
+
+def _flatten_grouped_set(data_set, topic):
+    common_data = data_set.get('common_data', {})
+    questions = data_set.get('questions', [])
+
+    _check_common_data(common_data, topic)
+    for q in questions:
+        _apply_common_data(q, common_data)
+
+    return questions
+
+def stream_questions(client, prompt, grouped=False, topic=None, retries=3, temperature=0.7, use_cache=True):
+    """
+    Streaming counterpart of generate_json_with_retry for question prompts.
+
+    Consumes the chat-completion stream and yields each question dict as soon
+    as its JSON object is complete (see streaming.QuestionStreamParser), so
+    callers can persist or report progress before the model finishes. For
+    grouped prompts the set's common_data is injected into every question. A
+    truncated stream still yields every complete question; an attempt is only
+    retried if it produced nothing. Shares the prompt-response cache, with the
+    same use_cache semantics, and raises CircuitOpenError like it.
+    """
+    model_name = getattr(settings, 'OPENROUTER_MODEL', "google/gemini-2.0-flash-exp:free")
+
+    cache_key = response_cache.make_key(model_name, prompt, temperature)
+    cached = response_cache.get(cache_key) if use_cache or response_cache.replay_only() else None
+    if cached is not None:
+        if grouped and isinstance(cached, dict):
+            yield from _flatten_grouped_set(cached, topic)
+        elif not grouped and isinstance(cached, list):
+            yield from cached
+        return
+    if response_cache.replay_only():
+        print("REPLAY: no cached response for this prompt, not calling the provider.")
+        return
+
+    if not client:
+        return
+
+    retry_after = None
+    for attempt in range(retries):
+        if attempt:
+            time.sleep(backoff_delay(attempt, retry_after))
+            retry_after = None
+        parser = QuestionStreamParser()
+        questions = []
+        held = []  # grouped questions that arrived before common_data
+        try:
+            response = provider_call(
+                client,
+                model=model_name,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                stream=True,
+            )
+            for content in iter_stream_content(response):
+                for q in parser.feed(content):
+                    questions.append(q)
+                    if grouped and parser.common_data is None:
+                        held.append(q)
+                        continue
+                    if grouped:
+                        for h in held:
+                            _apply_common_data(h, parser.common_data)
+                            yield h
+                        held = []
+                        _apply_common_data(q, parser.common_data)
+                    yield q
+        except CircuitOpenError as e:
+            print(f"Error in streaming attempt {attempt+1}: {e}")
+            raise
+        except RateLimitedError as e:
+            print(f"Error in streaming attempt {attempt+1}: {e}")
+            retry_after = e.retry_after
+        except Exception as e:
+            print(f"Error in streaming attempt {attempt+1}: {e}")
+
+        if grouped and parser.common_data is not None:
+            _check_common_data(parser.common_data, topic)
+        for h in held:
+            if parser.common_data:
+                _apply_common_data(h, parser.common_data)
+            yield h
+
+        if questions:
+            if parser.finished:
+                response_cache.set(cache_key, {'common_data': parser.common_data or {}, 'questions': questions} if grouped else questions)
             else:
-                print(f"FAILED to generate batch {i+1} after retries.")
-            
-    return all_questions
+                print(f"WARNING: Stream ended early; salvaged {len(questions)} complete questions.")
+            return
+
+        print(f"WARNING: No complete questions in streaming attempt {attempt+1}.")
+
+
+def build_topic_tasks(subject_name, topic_counts, difficulty='Medium'):
+    """
+    One task per topic in topic_counts ({topic: count}); grouped topics are
+    split into sets of 5 that share a passage/chart.
+    """
+    tasks = []
+    for topic, count in topic_counts.items():
+        if count == 0:
+            continue
+
+        if topic in GROUPED_TOPICS:
+            # Generate in sets of 5
+            for set_idx in range(math.ceil(count / 5)):
+                questions_in_set = min(5, count - (set_idx * 5))
+                tasks.append({
+                    'grouped': True,
+                    'subject': subject_name,
+                    'topic': topic,
+                    'difficulty': difficulty,
+                    'count': questions_in_set,
+                    'prompt': _grouped_prompt(subject_name, topic, questions_in_set, difficulty),
+                    'label': f"grouped questions for {topic} Set {set_idx+1}",
+                })
+        else:
+            tasks.append({
+                'grouped': False,
+                'subject': subject_name,
+                'topic': topic,
+                'difficulty': difficulty,
+                'count': count,
+                'prompt': _standard_prompt(subject_name, topic, count, difficulty),
+                'label': f"questions for {topic}",
+            })
+    return tasks
+
+def build_generation_tasks(subject_name, num_questions, difficulty='Medium'):
+    """
+    Splits one subject's quota into independent LLM calls. Each task is a
+    dict with the prompt, whether the response is a grouped set, and a label
+    for logging. Tasks keep TOPIC_DISTRIBUTION order so grouped sets stay together.
+
+    num_questions may also be a {topic: count} dict to generate exactly those topics.
+    """
+    if isinstance(num_questions, dict):
+        return build_topic_tasks(subject_name, num_questions, difficulty)
+
+    # Check if we have a specific distribution for this subject
+    if subject_name in TOPIC_DISTRIBUTION and num_questions == sum(TOPIC_DISTRIBUTION[subject_name].values()):
+        return build_topic_tasks(subject_name, TOPIC_DISTRIBUTION[subject_name], difficulty)
+
+    # Fallback to batch generation
+    tasks = []
+    for i in range(math.ceil(num_questions / BATCH_SIZE)):
+        current_batch_size = min(BATCH_SIZE, num_questions - i * BATCH_SIZE)
+        tasks.append({
+            'grouped': False,
+            'subject': subject_name,
+            'topic': None,
+            'difficulty': difficulty,
+            'count': current_batch_size,
+            'prompt': _batch_prompt(subject_name, current_batch_size, difficulty),
+            'label': f"batch {i+1} for {subject_name}",
+        })
+
+    return tasks
+
+def _fetch_questions(client, prompt, grouped=False, topic=None, on_question=None):
+    """
+    One prompt -> list of question dicts (grouped sets flattened), streamed if
+    enabled. Prompts are deterministic, so the cache is bypassed: a cached
+    answer would only repeat questions the bank already has.
+    """
+    if getattr(settings, 'AI_STREAM_RESPONSES', True):
+        questions = []
+        for q in stream_questions(client, prompt, grouped=grouped, topic=topic, use_cache=False):
+            questions.append(q)
+            if on_question:
+                on_question()
+        return questions
+
+    data = generate_json_with_retry(client, prompt, use_cache=False)
+    if grouped:
+        if data and isinstance(data, dict):
+            return _flatten_grouped_set(data, topic)
+    elif data and isinstance(data, list):
+        return data
+    return []
+
+def _run_generation_task(client, task, on_question=None):
+    """
+    Runs one task and validates every item. Valid questions are kept and, if
+    the task is short, follow-up prompts ask only for the missing count
+    (grouped sets reuse their data block) for up to AI_FOLLOWUP_ROUNDS rounds.
+    """
+    questions = _fetch_questions(client, task['prompt'], task['grouped'], task['topic'], on_question)
+    valid, rejected = split_valid(questions)
+    if rejected:
+        print(f"Rejected {len(rejected)} invalid questions from {task['label']}.")
+
+    for _ in range(getattr(settings, 'AI_FOLLOWUP_ROUNDS', 2)):
+        missing = task['count'] - len(valid)
+        # A grouped set can only be topped up once its data block is known
+        if missing <= 0 or (task['grouped'] and not valid):
+            break
+        print(f"Requesting {missing} more for {task['label']}.")
+        extra = _fetch_questions(client, _followup_prompt(task, missing, valid), on_question=on_question)
+        if task['grouped']:
+            for q in extra:
+                if isinstance(q, dict):
+                    _apply_common_data(q, {'text': valid[0].get('passage'), 'chart_data': valid[0].get('chart_data')})
+        extra_valid, _ = split_valid(extra)
+        valid.extend(extra_valid[:missing])
+
+    if valid:
+        # Tag with the requested topic so the questions land in the right bank bucket
+        if task['topic']:
+            for q in valid:
+                q['topic'] = task['topic']
+        return valid[:task['count']]
+
+    print(f"FAILED to generate {task['label']} after retries.")
+    return []
+
+def generate_questions_for_subjects(subject_requests, difficulty='Medium', on_progress=None):
+    """
+    Generates questions for several subjects at once.
+
+    subject_requests is a list of (subject_name, num_questions) pairs, where
+    num_questions may be a {topic: count} dict (see build_generation_tasks); the
+    result is a list of question lists in the same order. Every prompt for
+    every subject is submitted to a thread pool capped at AI_MAX_CONCURRENCY,
+    and the shared token bucket spaces out the actual provider calls.
+    on_progress(done, total, questions_received) is called from the calling
+    thread as tasks finish and, with streaming, as questions arrive.
+    Raises CircuitOpenError if the provider is known to be down, either at
+    once or, when the breaker trips mid-way, after cancelling the tasks that
+    have not started, rather than returning a partial result.
+    """
+    client = get_client()
+    if not client:
+        return [[] for _ in subject_requests]
+    if get_circuit_breaker().is_open:
+        raise CircuitOpenError("AI provider unavailable; not starting generation until the circuit breaker resets.")
+
+    task_lists = [build_generation_tasks(name, count, difficulty) for name, count in subject_requests]
+    flat_tasks = [(i, j, task) for i, tasks in enumerate(task_lists) for j, task in enumerate(tasks)]
+    results = [[None] * len(tasks) for tasks in task_lists]
+
+    # Questions received so far, counted from the worker threads as they stream in
+    received = [0]
+    received_lock = threading.Lock()
+
+    def on_question():
+        with received_lock:
+            received[0] += 1
+
+    max_workers = max(1, getattr(settings, 'AI_MAX_CONCURRENCY', 8))
+    done = 0
+    reported = None
+    circuit_error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_run_generation_task, client, task, on_question): (i, j) for i, j, task in flat_tasks}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i, j = futures[future]
+                try:
+                    results[i][j] = [] if future.cancelled() else future.result()
+                except CircuitOpenError as e:
+                    if circuit_error is None:
+                        circuit_error = e
+                        for other in pending:
+                            other.cancel()
+                    results[i][j] = []
+                except Exception as e:
+                    print(f"Error in generation task: {e}")
+                    results[i][j] = []
+                done += 1
+            if on_progress and (done, received[0]) != reported:
+                reported = (done, received[0])
+                on_progress(done, len(flat_tasks), received[0])
+
+    if circuit_error is not None:
+        raise circuit_error
+
+    # Re-assemble per subject in task order
+    return [[q for chunk in subject_results for q in chunk] for subject_results in results]
+
+def generate_test_questions(subject_name, num_questions, difficulty='Medium'):
+    print(f"DEBUG: generate_test_questions called for {subject_name}, {num_questions}")
+    return generate_questions_for_subjects([(subject_name, num_questions)], difficulty)[0]
 
 def generate_topic_questions(topic_name, num_questions, difficulty='Medium'):
     client = get_client()
@@ -497,4 +814,7 @@ def generate_topic_questions(topic_name, num_questions, difficulty='Medium'):
     - explanation: A detailed step-by-step explanation
     """
 
-    return generate_json_with_retry(client, prompt) or []
\ No newline at end of file
+    data = generate_json_with_retry(client, prompt, use_cache=False)
+    # Keep the usable items; callers ask again for whatever is still missing
+    valid, _ = split_valid(data if isinstance(data, list) else [])
+    return valid
\ No newline at end of file
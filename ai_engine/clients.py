@@ -0,0 +1,131 @@
+import json
+import random
+import re
+import threading
+import types
+
+from django.conf import settings
+from openai import DefaultHttpxClient, OpenAI, Timeout
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class StubClient:
+    """
+    Offline stand-in for the OpenAI client (AI_BACKEND='stub'). Answers
+    chat.completions.create() with well-formed questions shaped after the
+    prompt, so generation, grading and the UI can be exercised without an API
+    key or network. Every question is a different random sum, so the
+    near-duplicate check does not reject the stub's output.
+    """
+
+    def __init__(self):
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+        self.random = random.Random()
+
+    def _question(self, topic, index):
+        numbers = [self.random.randint(100, 99999) for _ in range(3)]
+        answer = sum(numbers)
+        correct = index % 5
+        # Distinct wrong options around the answer
+        offsets = self.random.sample([d for d in range(-999, 1000) if d], 4)
+        options = [str(answer + offset) for offset in offsets]
+        options.insert(correct, str(answer))
+        return {
+            'text': f"[stub] {topic}: what is {numbers[0]} + {numbers[1]} + {numbers[2]}?",
+            **{f"option_{letter}": option for letter, option in zip('abcde', options)},
+            'correct_option': 'ABCDE'[correct],
+            'explanation': f"{numbers[0]} + {numbers[1]} + {numbers[2]} = {answer}.",
+            'topic': topic
+        }
+
+    def _create(self, model=None, messages=None, **kwargs):
+        prompt = messages[-1]['content'] if messages else ''
+        topic_match = re.search(r"on the topic '([^']+)'", prompt)
+        topic = topic_match.group(1) if topic_match else 'General'
+
+        set_match = re.search(r'Generate a SET of (\d+)', prompt)
+        count_match = re.search(r'Generate (\d+)', prompt)
+        if set_match:
+            questions = [self._question(topic, i) for i in range(int(set_match.group(1)))]
+            content = json.dumps({'common_data': {'text': f"[stub] Passage {self.random.randint(1000, 9999)} for {topic}", 'chart_data': None}, 'questions': questions})
+        elif count_match:
+            content = json.dumps([self._question(topic, i) for i in range(int(count_match.group(1)))])
+        elif 'Generate a multiple-choice question' in prompt:
+            content = json.dumps(self._question(topic, 0))
+        else:
+            content = "[stub] The correct answer follows directly from the question."
+
+        if kwargs.get('stream'):
+            return self._stream(content)
+        message = types.SimpleNamespace(content=content, role='assistant')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message, finish_reason='stop')])
+
+    @staticmethod
+    def _stream(content, chunk_size=64):
+        for start in range(0, len(content), chunk_size):
+            delta = types.SimpleNamespace(content=content[start:start + chunk_size])
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta, finish_reason=None)])
+
+
+def _http_client():
+    # One keep-alive pool per OpenAI client; HTTP/2 needs the optional 'h2' package
+    http2 = getattr(settings, 'AI_HTTP2', False)
+    try:
+        return DefaultHttpxClient(http2=http2)
+    except ImportError:
+        print("WARNING: AI_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1.")
+        return DefaultHttpxClient()
+
+
+def _build_client(backend):
+    if backend == 'stub':
+        return StubClient()
+
+    api_key = settings.OPENROUTER_API_KEY
+    if not api_key:
+        print("WARNING: OPENROUTER_API_KEY not found.")
+        return None
+    return OpenAI(
+        base_url=OPENROUTER_BASE_URL,
+        api_key=api_key,
+        timeout=Timeout(getattr(settings, 'AI_REQUEST_TIMEOUT', 120.0), connect=getattr(settings, 'AI_CONNECT_TIMEOUT', 10.0)),
+        # Retries are ours alone (backoff, 429 and circuit breaker handling in rate_limit.py);
+        # SDK retries would multiply every attempt and bypass the limiter
+        max_retries=0,
+        http_client=_http_client(),
+    )
+
+
+def get_client(backend=None):
+    """
+    Process-wide, thread-safe client for the configured AI_BACKEND
+    ('openrouter' or 'stub'). The client and its connection pool are created
+    once and shared, so bulk generation reuses warm keep-alive connections.
+    Returns None when the backend is not configured.
+    """
+    backend = backend or getattr(settings, 'AI_BACKEND', 'openrouter')
+    client = _clients.get(backend)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        if backend not in _clients:
+            client = _build_client(backend)
+            if client is None:
+                return None
+            _clients[backend] = client
+        return _clients[backend]
+
+
+def reset_clients():
+    """Closes and forgets every pooled client (e.g. after changing AI settings)."""
+    with _clients_lock:
+        for client in _clients.values():
+            close = getattr(client, 'close', None)
+            if close:
+                close()
+        _clients.clear()
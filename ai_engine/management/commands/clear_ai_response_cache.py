@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ai_engine import response_cache
+
+
+class Command(BaseCommand):
+    help = 'Clears the LLM prompt-response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expired', action='store_true', help='Only remove entries older than AI_RESPONSE_CACHE_TTL')
+
+    def handle(self, *args, **options):
+        removed = response_cache.clear(expired_only=options['expired'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached responses."))
@@ -0,0 +1,265 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to
+    `capacity`; acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        # updated_at lies in the future while a pause is in force (see AdaptiveRateLimiter.on_rate_limited)
+        if now > self.updated_at:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+    def _wait_time(self):
+        # Called with the lock held; 0 means a token was taken
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                wait = self._wait_time()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket whose rate follows the provider. The rate is re-derived from
+    the X-RateLimit-* headers of each response (remaining requests over the
+    time left in the window), halved on HTTP 429 with every caller paused
+    until Retry-After, and raised again gradually while calls succeed. It
+    never exceeds the configured ceiling.
+    """
+
+    def __init__(self, rate, capacity, min_rate=0.05):
+        super().__init__(rate, capacity)
+        self.max_rate = self.rate
+        self.min_rate = min(min_rate, self.rate)
+        self.blocked_until = 0.0
+
+    def _wait_time(self):
+        pause = self.blocked_until - time.monotonic()
+        if pause > 0:
+            return pause
+        return super()._wait_time()
+
+    def _set_rate(self, rate):
+        self._refill()
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+
+    def update_from_headers(self, headers):
+        remaining = _header_number(headers, 'x-ratelimit-remaining-requests', 'x-ratelimit-remaining')
+        reset_in = _reset_seconds(headers)
+        if remaining is None or reset_in is None:
+            return
+        with self.lock:
+            if remaining <= 0:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + reset_in)
+            else:
+                self._set_rate(remaining / max(reset_in, 1.0))
+
+    def on_rate_limited(self, retry_after=None):
+        with self.lock:
+            self._set_rate(self.rate / 2)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or 1 / self.rate))
+            # One call may go as soon as the pause ends; refilling resumes from then
+            self.tokens = 1
+            self.updated_at = self.blocked_until
+
+    def on_success(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._set_rate(self.rate + self.max_rate * 0.05)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class RateLimitedError(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__(f"Rate limited by the AI provider (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a provider that keeps failing. After `failure_threshold`
+    consecutive outages (5xx, timeouts, connection errors) the circuit opens
+    and calls fail immediately for `reset_timeout` seconds; then a single
+    trial call is let through and its result closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                raise CircuitOpenError("AI provider unavailable; not retrying until the circuit breaker resets.")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    print(f"WARNING: AI provider circuit breaker opened after {self.failures} failures.")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+def _header_number(headers, *names):
+    for name in names:
+        value = headers.get(name) if headers is not None else None
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+def _reset_seconds(headers):
+    value = _header_number(headers, 'x-ratelimit-reset-requests', 'x-ratelimit-reset')
+    if value is None:
+        return None
+    # OpenRouter sends an epoch timestamp in milliseconds, others send seconds to wait
+    if value > 1e12:
+        return max(0.0, value / 1000 - time.time())
+    if value > 1e9:
+        return max(0.0, value - time.time())
+    return value
+
+
+def retry_after_seconds(headers):
+    value = headers.get('retry-after') if headers is not None else None
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter for retry `attempt` (1-based), never shorter than Retry-After."""
+    base = getattr(settings, 'AI_BACKOFF_BASE', 1.0)
+    cap = getattr(settings, 'AI_BACKOFF_MAX', 30.0)
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, retry_after or 0)
+
+
+_limiter = None
+_breaker = None
+_singleton_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by every thread that talks to the LLM provider."""
+    global _limiter
+    with _singleton_lock:
+        if _limiter is None:
+            per_minute = getattr(settings, 'AI_RATE_LIMIT_PER_MINUTE', 60)
+            burst = getattr(settings, 'AI_RATE_LIMIT_BURST', 10)
+            _limiter = AdaptiveRateLimiter(per_minute / 60.0, burst)
+        return _limiter
+
+
+def get_circuit_breaker():
+    global _breaker
+    with _singleton_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                getattr(settings, 'AI_CIRCUIT_FAILURE_THRESHOLD', 5),
+                getattr(settings, 'AI_CIRCUIT_RESET_TIMEOUT', 60)
+            )
+        return _breaker
+
+
+def provider_call(client, **kwargs):
+    """
+    Makes one chat.completions.create() call through the shared circuit
+    breaker and adaptive limiter, feeding the response headers back into the
+    limiter. Raises CircuitOpenError without calling the provider while it is
+    down, and RateLimitedError (with retry_after) on HTTP 429.
+    """
+    breaker = get_circuit_breaker()
+    limiter = get_rate_limiter()
+    breaker.before_call()
+    limiter.acquire()
+
+    completions = client.chat.completions
+    try:
+        if hasattr(completions, 'with_raw_response'):
+            raw = completions.with_raw_response.create(**kwargs)
+            limiter.update_from_headers(raw.headers)
+            response = raw.parse()
+        else:
+            response = completions.create(**kwargs)
+    except APIStatusError as e:
+        if e.status_code == 429:
+            retry_after = retry_after_seconds(e.response.headers)
+            limiter.on_rate_limited(retry_after)
+            breaker.record_success()  # throttled, not down
+            raise RateLimitedError(retry_after) from e
+        if e.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except (APIConnectionError, APITimeoutError):
+        breaker.record_failure()
+        raise
+    except BaseException:
+        # Anything else (a malformed response, an interrupt) must still settle
+        # a half-open trial, or the breaker would never close again
+        breaker.record_failure()
+        raise
+
+    breaker.record_success()
+    limiter.on_success()
+    return response
@@ -0,0 +1,105 @@
+"""
+Content-addressed cache of parsed LLM responses, kept in its own SQLite file
+so it survives restarts and is shared by the web process, the test worker and
+management commands. Entries expire after AI_RESPONSE_CACHE_TTL seconds and
+the least recently used ones are evicted beyond AI_RESPONSE_CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+
+_connection = None
+_lock = threading.Lock()
+
+
+def enabled():
+    return getattr(settings, 'AI_RESPONSE_CACHE_ENABLED', False) or replay_only()
+
+
+def replay_only():
+    """Replay mode: answer only from the cache (ignoring TTL) and never call the provider."""
+    return getattr(settings, 'AI_RESPONSE_CACHE_REPLAY', False)
+
+
+def make_key(model, prompt, temperature):
+    payload = json.dumps([model, prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _get_connection():
+    global _connection
+    if _connection is None:
+        path = str(getattr(settings, 'AI_RESPONSE_CACHE_PATH', 'ai_response_cache.sqlite3'))
+        _connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+    return _connection
+
+
+def get(key):
+    """Returns the cached parsed response, or None on a miss or expired entry."""
+    if not enabled():
+        return None
+    ttl = getattr(settings, 'AI_RESPONSE_CACHE_TTL', 60 * 60 * 24 * 7)
+    now = time.time()
+    try:
+        with _lock:
+            conn = _get_connection()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if ttl and created_at < now - ttl and not replay_only():
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+    except (sqlite3.Error, ValueError) as e:
+        # A broken cache must never stop generation
+        print(f"WARNING: AI response cache read failed: {e}")
+        return None
+
+
+def set(key, value):
+    if not enabled():
+        return
+    max_entries = getattr(settings, 'AI_RESPONSE_CACHE_MAX_ENTRIES', 5000)
+    now = time.time()
+    try:
+        with _lock:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            # LRU eviction beyond the size bound
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if max_entries and count > max_entries:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                    (count - max_entries,)
+                )
+    except (sqlite3.Error, TypeError, ValueError) as e:
+        print(f"WARNING: AI response cache write failed: {e}")
+
+
+def clear(expired_only=False):
+    """Deletes cached responses (only the expired ones if expired_only). Returns the number removed."""
+    with _lock:
+        conn = _get_connection()
+        if expired_only:
+            ttl = getattr(settings, 'AI_RESPONSE_CACHE_TTL', 60 * 60 * 24 * 7)
+            cursor = conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl,))
+        else:
+            cursor = conn.execute("DELETE FROM responses")
+        return cursor.rowcount
@@ -0,0 +1,103 @@
+import json
+
+
+class QuestionStreamParser:
+    """
+    Incremental JSON scanner for question responses, fed one chunk at a time.
+
+    Recognises the two shapes the prompts ask for: a top-level array of
+    question objects, or an object with "common_data" and a "questions" array.
+    Each question object is decoded as soon as its closing brace arrives, so
+    every character is scanned once and a truncated response still yields
+    every question that was complete. Text before the first '{' or '[' (prose,
+    markdown fences) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.started = False
+        self.finished = False
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        # One entry per open container: [kind, key it is the value of, start offset, pending key]
+        self.stack = []
+        self.common_data = None
+
+    def _is_item(self, entry_index):
+        # An object counts as a question if its parent is the root array or the "questions" array
+        if entry_index == 0:
+            return False
+        parent = self.stack[entry_index - 1]
+        return parent[0] == '[' and (entry_index == 1 or parent[1] == 'questions')
+
+    def feed(self, chunk):
+        """Consumes more response text and returns the question dicts completed by it."""
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+
+        while self.pos < len(buffer) and not self.finished:
+            char = buffer[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = buffer[self.string_start + 1:self.pos]
+            elif not self.started:
+                if char in '{[':
+                    self.started = True
+                    continue  # re-read as an opening bracket
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char == ':' and self.stack and self.stack[-1][0] == '{':
+                self.stack[-1][3] = self.last_string
+            elif char == ',' and self.stack and self.stack[-1][0] == '{':
+                self.stack[-1][3] = None
+            elif char in '{[':
+                key = self.stack[-1][3] if self.stack and self.stack[-1][0] == '{' else None
+                self.stack.append([char, key, self.pos, None])
+            elif char in '}]':
+                if not self.stack:
+                    self.finished = True
+                    break
+                entry = self.stack[-1]
+                if char == '}':
+                    text = buffer[entry[2]:self.pos + 1]
+                    if self._is_item(len(self.stack) - 1):
+                        obj = self._decode(text)
+                        if isinstance(obj, dict):
+                            completed.append(obj)
+                    elif len(self.stack) == 2 and entry[1] == 'common_data':
+                        self.common_data = self._decode(text)
+                self.stack.pop()
+                if not self.stack:
+                    self.finished = True
+
+            self.pos += 1
+
+        return completed
+
+    @staticmethod
+    def _decode(text):
+        try:
+            return json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            return None
+
+
+def iter_stream_content(response):
+    """Yields the text deltas of a streamed chat completion."""
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        content = getattr(chunk.choices[0].delta, 'content', None)
+        if content:
+            yield content
@@ -1,3 +1,191 @@
-from django.test import TestCase
+import json
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from practice.dedup import signature, similarity
+from . import ai_service, rate_limit, response_cache
+from .clients import StubClient
+from .rate_limit import AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError, provider_call
+from .streaming import QuestionStreamParser
+
+
+def question(n, text=None):
+    return {
+        'text': text or f"Question {n}",
+        'option_a': '1', 'option_b': '2', 'option_c': '3', 'option_d': '4', 'option_e': '5',
+        'correct_option': 'A', 'explanation': f"Because {n}"
+    }
+
+
+def feed_in_chunks(parser, text, size):
+    questions = []
+    for start in range(0, len(text), size):
+        questions += parser.feed(text[start:start + size])
+    return questions
+
+
+class QuestionStreamParserTests(SimpleTestCase):
+    def test_array_split_across_chunks(self):
+        items = [question(1), question(2), question(3)]
+        text = json.dumps(items)
+        for size in (1, 7, len(text)):
+            parser = QuestionStreamParser()
+            self.assertEqual(feed_in_chunks(parser, text, size), items)
+            self.assertTrue(parser.finished)
+
+    def test_escaped_quotes_and_brackets_inside_strings(self):
+        items = [question(1, 'He said "pick {A}" and [B] \\ not }'), question(2)]
+        parser = QuestionStreamParser()
+        self.assertEqual(feed_in_chunks(parser, json.dumps(items), 3), items)
+
+    def test_truncated_stream_keeps_complete_questions(self):
+        text = json.dumps([question(1), question(2)])
+        parser = QuestionStreamParser()
+        # Cut inside the second object, just after an escaped quote
+        truncated = text[:text.index('Question 2')] + 'Quest\\"'
+        self.assertEqual(parser.feed(truncated), [question(1)])
+        self.assertFalse(parser.finished)
+
+    def test_grouped_set_with_prose_and_fence(self):
+        data = {'common_data': {'text': 'A passage with {braces}', 'chart_data': None}, 'questions': [question(1), question(2)]}
+        parser = QuestionStreamParser()
+        questions = feed_in_chunks(parser, "Sure! Here it is:\n```json\n" + json.dumps(data) + "\n```", 5)
+        self.assertEqual(questions, data['questions'])
+        self.assertEqual(parser.common_data, data['common_data'])
+        self.assertTrue(parser.finished)
+
+    def test_nested_objects_are_not_questions(self):
+        item = dict(question(1), chart_data={'type': 'bar', 'values': [{'x': 1}]})
+        parser = QuestionStreamParser()
+        self.assertEqual(parser.feed(json.dumps([item])), [item])
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_opens_after_threshold_and_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_allows_a_single_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        self.assertTrue(breaker.trial_in_flight)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_trial_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_success()
+        self.assertIsNone(breaker.opened_at)
+        self.assertFalse(breaker.trial_in_flight)
+        breaker.before_call()
+
+    def test_trial_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.before_call()
+        breaker.reset_timeout = 60
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.trial_in_flight)
+
+    def test_unexpected_error_settles_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=mock.Mock(side_effect=TypeError("bad")))))
+        with mock.patch.object(rate_limit, 'get_circuit_breaker', return_value=breaker):
+            with self.assertRaises(TypeError):
+                provider_call(client, model='m', messages=[])
+        self.assertFalse(breaker.trial_in_flight)
+        # The next trial is let through
+        breaker.before_call()
+
+
+class AdaptiveRateLimiterTests(SimpleTestCase):
+    def test_rate_limited_pause_never_drives_tokens_negative(self):
+        limiter = AdaptiveRateLimiter(rate=2.0, capacity=5)
+        limiter.on_rate_limited(retry_after=30)
+        with limiter.lock:
+            limiter._refill()
+            limiter._refill()
+        self.assertEqual(limiter.tokens, 1)
+        self.assertEqual(limiter.rate, 1.0)
+        with limiter.lock:
+            self.assertGreater(limiter._wait_time(), 29)
+
+
+class StubClientTests(SimpleTestCase):
+    def test_questions_vary_between_calls(self):
+        client = StubClient()
+        messages = [{'role': 'user', 'content': "Generate 10 questions on the topic 'Simplification'"}]
+        questions = []
+        for _ in range(3):
+            response = client.chat.completions.create(model='m', messages=messages)
+            questions += json.loads(response.choices[0].message.content)
+        self.assertEqual(len(questions), 30)
+        for q in questions:
+            options = [q[f"option_{letter}"] for letter in 'abcde']
+            self.assertEqual(len(set(options)), 5)
+            self.assertEqual(q['explanation'].split(' = ')[1], options['ABCDE'.index(q['correct_option'])] + '.')
+        sigs = [signature(q) for q in questions]
+        self.assertLess(max(similarity(a, b) for i, a in enumerate(sigs) for b in sigs[:i]), 0.85)
+
+
+def completion(content):
+    message = SimpleNamespace(content=content, role='assistant')
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason='stop')])
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            AI_RESPONSE_CACHE_ENABLED=True, AI_RESPONSE_CACHE_REPLAY=False,
+            AI_RESPONSE_CACHE_PATH=f"{directory.name}/cache.sqlite3", AI_RESPONSE_CACHE_TTL=60
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        response_cache._connection = None
+        self.addCleanup(setattr, response_cache, '_connection', None)
+        self.provider = mock.patch.object(ai_service, 'provider_call', return_value=completion(json.dumps([question(1)]))).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_repeated_prompt_is_answered_from_the_cache(self):
+        for _ in range(2):
+            self.assertEqual(ai_service.generate_json_with_retry(object(), 'prompt'), [question(1)])
+        self.assertEqual(self.provider.call_count, 1)
+
+    def test_expired_entry_goes_to_the_provider(self):
+        ai_service.generate_json_with_retry(object(), 'prompt')
+        with mock.patch.object(response_cache.time, 'time', return_value=time.time() + 61):
+            ai_service.generate_json_with_retry(object(), 'prompt')
+        self.assertEqual(self.provider.call_count, 2)
+
+    def test_fresh_output_is_recorded_but_not_read(self):
+        for _ in range(2):
+            ai_service.generate_json_with_retry(object(), 'prompt', use_cache=False)
+        self.assertEqual(self.provider.call_count, 2)
+        with override_settings(AI_RESPONSE_CACHE_REPLAY=True):
+            self.assertEqual(ai_service.generate_json_with_retry(None, 'prompt', use_cache=False), [question(1)])
+        self.assertEqual(self.provider.call_count, 2)
+
+    def test_explanations_are_cached(self):
+        self.provider.return_value = completion("Because 2 + 2 = 4.")
+        with mock.patch.object(ai_service, 'get_client', return_value=object()):
+            for _ in range(2):
+                self.assertEqual(ai_service.explain_answer('2 + 2?', 'B', 'A'), "Because 2 + 2 = 4.")
+        self.assertEqual(self.provider.call_count, 1)
 
-# Create your tests here.
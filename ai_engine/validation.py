@@ -0,0 +1,48 @@
+import re
+
+OPTION_KEYS = ['option_a', 'option_b', 'option_c', 'option_d', 'option_e']
+REQUIRED_KEYS = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option']
+VALID_OPTIONS = 'ABCDE'
+
+
+def _normalise_option(value):
+    # Models sometimes answer "Option B", "b)" or "(B)" instead of "B"
+    match = re.fullmatch(r'\s*(?:option\s*)?\(?([A-E])\)?[.)]?\s*', str(value or ''), re.IGNORECASE)
+    return match.group(1).upper() if match else None
+
+
+def question_problems(q):
+    """
+    Returns the reasons a generated question is unusable (empty list if it is
+    fine): missing required keys, correct_option outside A-E or pointing at a
+    missing option, or duplicate options. Normalises correct_option in place.
+    """
+    if not isinstance(q, dict):
+        return ['not an object']
+
+    problems = [f"missing {key}" for key in REQUIRED_KEYS if not str(q.get(key) or '').strip()]
+    if problems:
+        return problems
+
+    correct_option = _normalise_option(q.get('correct_option'))
+    if correct_option is None:
+        return [f"correct_option {q.get('correct_option')!r} not in A-E"]
+    q['correct_option'] = correct_option
+
+    options = [str(q.get(key) or '').strip() for key in OPTION_KEYS]
+    if not options[VALID_OPTIONS.index(correct_option)]:
+        problems.append(f"correct_option {correct_option} has no text")
+
+    present = [option.lower() for option in options if option]
+    if len(set(present)) != len(present):
+        problems.append("duplicate options")
+
+    return problems
+
+
+def split_valid(questions):
+    """Partitions generated questions into (valid, rejected) lists, keeping order."""
+    valid, rejected = [], []
+    for q in questions or []:
+        (rejected if question_problems(q) else valid).append(q)
+    return valid, rejected
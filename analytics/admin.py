@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import TopicPerformance
 
-# Register your models here.
+@admin.register(TopicPerformance)
+class TopicPerformanceAdmin(admin.ModelAdmin):
+    list_display = ['user', 'subject', 'topic', 'attempts', 'correct', 'wrong', 'skipped', 'rolling_accuracy', 'last_activity_at']
+    list_filter = ['subject']
+    search_fields = ['user__username', 'topic__name']
+    raw_id_fields = ['user', 'topic']
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from analytics.models import TopicPerformance
+from practice.models import PracticeSession
+from tests.models import UserTestAnswer
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the TopicPerformance rollup from all recorded test answers and practice sessions'
+
+    def handle(self, *args, **options):
+        # One-off backfill: normal operation updates the rollup incrementally
+        totals = defaultdict(lambda: {'correct': 0, 'wrong': 0, 'skipped': 0})
+        subjects = {}
+
+        answers = UserTestAnswer.objects.values(
+            'attempt__user_id', 'question__topic_id', 'question__topic__subject_id'
+        ).annotate(
+            correct=Count('id', filter=Q(is_correct=True)),
+            wrong=Count('id', filter=Q(is_correct=False, selected_option__isnull=False)),
+            skipped=Count('id', filter=Q(selected_option__isnull=True)),
+        ).order_by()
+        for row in answers:
+            key = (row['attempt__user_id'], row['question__topic_id'])
+            subjects[key] = row['question__topic__subject_id']
+            for field in ('correct', 'wrong', 'skipped'):
+                totals[key][field] += row[field]
+
+        sessions = PracticeSession.objects.values('user_id', 'topic_id', 'topic__subject_id').annotate(
+            score=Sum('score'), total=Sum('total_questions')
+        ).order_by()
+        for row in sessions:
+            key = (row['user_id'], row['topic_id'])
+            subjects[key] = row['topic__subject_id']
+            totals[key]['correct'] += row['score']
+            totals[key]['wrong'] += max(0, row['total'] - row['score'])
+
+        rows = []
+        for (user_id, topic_id), counts in totals.items():
+            answered = counts['correct'] + counts['wrong']
+            rows.append(TopicPerformance(
+                user_id=user_id,
+                topic_id=topic_id,
+                subject_id=subjects[(user_id, topic_id)],
+                attempts=answered + counts['skipped'],
+                # No per-session history to weight, so the rolling value starts at the lifetime accuracy
+                rolling_accuracy=counts['correct'] * 100.0 / answered if answered else 0.0,
+                **counts
+            ))
+
+        with transaction.atomic():
+            # Neither attempts nor practice sessions record their duration, so the time
+            # the incremental rollup has accumulated cannot be recomputed; carry it over
+            time_spent = {
+                (user_id, topic_id): seconds
+                for user_id, topic_id, seconds in TopicPerformance.objects.values_list('user_id', 'topic_id', 'time_spent')
+            }
+            for row in rows:
+                row.time_spent = time_spent.get((row.user_id, row.topic_id), 0)
+            TopicPerformance.objects.all().delete()
+            TopicPerformance.objects.bulk_create(rows, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} topic performance rows."))
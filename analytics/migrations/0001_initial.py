@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('exams', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Questions seen (correct + wrong + skipped)')),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('wrong', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('time_spent', models.PositiveIntegerField(default=0, help_text='Seconds')),
+                ('rolling_accuracy', models.FloatField(default=0.0, help_text='Exponentially weighted accuracy (%) over recent sessions')),
+                ('last_activity_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exams.subject')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exams.topic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_performance', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'subject'], name='analytics_t_user_id_f5a197_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'topic'), name='unique_topic_performance')],
+            },
+        ),
+    ]
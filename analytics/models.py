@@ -1,3 +1,36 @@
 from django.db import models
+from django.conf import settings
+from exams.models import Subject, Topic
 
-# Create your models here.
+
+class TopicPerformance(models.Model):
+    """
+    Running per-user totals for one topic, updated incrementally whenever a
+    mock test attempt or practice session is finalized (see analytics/rollup.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='topic_performance')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='+')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='+')
+    attempts = models.PositiveIntegerField(default=0, help_text="Questions seen (correct + wrong + skipped)")
+    correct = models.PositiveIntegerField(default=0)
+    wrong = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    time_spent = models.PositiveIntegerField(default=0, help_text="Seconds")
+    rolling_accuracy = models.FloatField(default=0.0, help_text="Exponentially weighted accuracy (%) over recent sessions")
+    last_activity_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'topic'], name='unique_topic_performance'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'subject']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.topic.name}"
+
+    @property
+    def accuracy(self):
+        answered = self.correct + self.wrong
+        return (self.correct / answered) * 100 if answered else 0
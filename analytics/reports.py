@@ -0,0 +1,37 @@
+from .models import TopicPerformance
+
+# Topics with fewer answered questions than this are too noisy to call weak
+MIN_ATTEMPTS_FOR_PLAN = 5
+
+
+def topic_performance_by_subject(user):
+    """
+    The user's rollup rows grouped by subject, with subject-level totals.
+    Reads only the TopicPerformance rows (one per topic practised).
+    """
+    rows = TopicPerformance.objects.filter(user=user).select_related('subject', 'topic').order_by('subject__name', 'topic__name')
+
+    subjects = {}
+    for row in rows:
+        entry = subjects.setdefault(row.subject_id, {
+            'subject': row.subject, 'topics': [], 'attempts': 0, 'correct': 0, 'wrong': 0, 'time_spent': 0
+        })
+        entry['topics'].append(row)
+        entry['attempts'] += row.attempts
+        entry['correct'] += row.correct
+        entry['wrong'] += row.wrong
+        entry['time_spent'] += row.time_spent
+
+    for entry in subjects.values():
+        answered = entry['correct'] + entry['wrong']
+        entry['accuracy'] = (entry['correct'] / answered) * 100 if answered else 0
+    return list(subjects.values())
+
+
+def weak_topics(user, limit=5):
+    """Topics with the lowest rolling accuracy, among those with enough attempts to judge."""
+    return list(
+        TopicPerformance.objects.filter(user=user, attempts__gte=MIN_ATTEMPTS_FOR_PLAN)
+        .select_related('subject', 'topic')
+        .order_by('rolling_accuracy', '-attempts')[:limit]
+    )
@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from exams.models import Topic
+from .models import TopicPerformance
+
+# Weight of the newest session in rolling_accuracy; older sessions decay geometrically
+ROLLING_ACCURACY_WEIGHT = 0.3
+
+
+def record_outcomes(user, outcomes, time_spent=0):
+    """
+    Folds one finalized session into the user's TopicPerformance rows.
+
+    outcomes is an iterable of (topic_id, is_correct) where is_correct is
+    True, False or None (skipped). time_spent (seconds) is split across the
+    topics in proportion to how many questions each had. Costs one SELECT plus
+    one bulk UPDATE and one bulk INSERT, however many answers the user has
+    given before.
+
+    Two sessions of the same user finishing together may both find a topic
+    row missing; the one whose INSERT loses on the unique (user, topic)
+    constraint retries inside its own savepoint and then updates the row
+    instead, so the caller's transaction is never rolled back.
+    """
+    counts = defaultdict(lambda: [0, 0, 0])  # topic_id -> [correct, wrong, skipped]
+    for topic_id, is_correct in outcomes:
+        if topic_id is None:
+            continue
+        counts[topic_id][0 if is_correct else 1 if is_correct is False else 2] += 1
+    if not counts:
+        return
+
+    for attempt in range(2):
+        try:
+            # Savepoint: a lost INSERT race only undoes this block
+            with transaction.atomic():
+                _apply_counts(user, counts, time_spent)
+            return
+        except IntegrityError:
+            if attempt:
+                raise
+
+
+def _apply_counts(user, counts, time_spent):
+    total = sum(sum(c) for c in counts.values())
+    now = timezone.now()
+
+    # select_for_update locks existing rows on PostgreSQL; SQLite serialises writers anyway
+    existing = {
+        row.topic_id: row
+        for row in TopicPerformance.objects.select_for_update().filter(user=user, topic_id__in=counts)
+    }
+    missing = [topic_id for topic_id in counts if topic_id not in existing]
+    subject_ids = dict(Topic.objects.filter(id__in=missing).values_list('id', 'subject_id')) if missing else {}
+
+    to_update, to_create = [], []
+    for topic_id, (correct, wrong, skipped) in counts.items():
+        row = existing.get(topic_id)
+        if row is None:
+            if topic_id not in subject_ids:
+                continue
+            row = TopicPerformance(user=user, topic_id=topic_id, subject_id=subject_ids[topic_id])
+            to_create.append(row)
+        else:
+            to_update.append(row)
+
+        answered = correct + wrong
+        if answered:
+            session_accuracy = correct * 100.0 / answered
+            if row.correct + row.wrong:
+                row.rolling_accuracy = ROLLING_ACCURACY_WEIGHT * session_accuracy + (1 - ROLLING_ACCURACY_WEIGHT) * row.rolling_accuracy
+            else:
+                row.rolling_accuracy = session_accuracy
+
+        row.correct += correct
+        row.wrong += wrong
+        row.skipped += skipped
+        row.attempts += correct + wrong + skipped
+        row.time_spent += round(time_spent * (correct + wrong + skipped) / total)
+        row.last_activity_at = now  # bulk_update does not apply auto_now
+
+    if to_update:
+        TopicPerformance.objects.bulk_update(
+            to_update, ['attempts', 'correct', 'wrong', 'skipped', 'time_spent', 'rolling_accuracy', 'last_activity_at']
+        )
+    if to_create:
+        TopicPerformance.objects.bulk_create(to_create)
+
+
+def record_test_attempt(attempt, answer_key, results, time_spent=0):
+    """Rolls a graded mock test (see tests.grading.grade) into the user's topic performance."""
+    record_outcomes(
+        attempt.user,
+        (
+            (topic_id, (is_correct if selected_option else None))
+            for topic_id, (question_id, selected_option, is_correct) in zip(answer_key.topic_ids, results)
+        ),
+        time_spent
+    )
+
+
+def record_practice_session(session, time_spent=0):
+    """Rolls a finished PracticeSession (score out of total_questions on one topic) into the rollup."""
+    correct = max(0, min(session.score, session.total_questions))
+    outcomes = [(session.topic_id, True)] * correct + [(session.topic_id, False)] * (session.total_questions - correct)
+    record_outcomes(session.user, outcomes, time_spent)
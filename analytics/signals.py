@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+from practice.models import PracticeSession
+from practice.signals import practice_session_finished
+from .rollup import record_practice_session
+
+
+@receiver(practice_session_finished, sender=PracticeSession)
+def practice_session_finalized(sender, session, time_spent=0, **kwargs):
+    # Sent once per finished session, so edits made later are never re-counted
+    record_practice_session(session, time_spent)
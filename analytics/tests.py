@@ -1,3 +1,31 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from exams.models import Exam, Subject, Topic
+from practice.models import PracticeSession
+from .models import TopicPerformance
+from .rollup import record_practice_session
+
+
+class RebuildTopicPerformanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        subject = Subject.objects.create(exam=exam, name='Reasoning Ability', slug='reasoning-ability')
+        cls.topic = Topic.objects.create(subject=subject, name='Syllogism', slug='syllogism')
+        cls.user = get_user_model().objects.create_user(username='learner', password='p')
+
+    def test_rebuild_matches_the_rollup_and_keeps_time_spent(self):
+        for score, total, seconds in [(3, 5, 120), (4, 4, 60)]:
+            session = PracticeSession.objects.create(user=self.user, topic=self.topic, score=score, total_questions=total)
+            record_practice_session(session, seconds)
+        before = TopicPerformance.objects.get(user=self.user, topic=self.topic)
+
+        call_command('rebuild_topic_performance', stdout=StringIO())
+        after = TopicPerformance.objects.get(user=self.user, topic=self.topic)
+        self.assertEqual((after.attempts, after.correct, after.wrong, after.skipped), (before.attempts, before.correct, before.wrong, before.skipped))
+        self.assertEqual((after.correct, after.wrong), (7, 2))
+        self.assertEqual(after.time_spent, 180)
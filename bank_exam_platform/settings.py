@@ -99,6 +99,41 @@ DATABASES = {
 }
 
 
+# Cache
+# Per-process memory cache for development. Cache keys for tests embed
+# MockTest.version, so a shared backend (Redis/Memcached) can be dropped in
+# for multi-process deployments without changing invalidation logic.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bank-exam-platform',
+    }
+}
+
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Rendered result pages of finished attempts (tests/results.py); dropped when an answer key is corrected
+RESULT_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Questions per practice batch; the page prefetches the next batch while one is being answered
+PRACTICE_BATCH_SIZE = 5
+# Batches carry signed answer bundles (practice/bundles.py): the page grades locally and
+# flushes results to practice_events. Tokens expire after this many seconds.
+PRACTICE_BUNDLE_MAX_AGE = 60 * 60 * 24
+# Answers the page queues before flushing them, and the most one request may record
+PRACTICE_EVENT_FLUSH_SIZE = 10
+PRACTICE_EVENTS_PER_REQUEST = 200
+
+# Tests per page of the catalogue (keyset-paginated, see core/pagination.py)
+TEST_LIST_PAGE_SIZE = 24
+# Attempts per page of the test history and its JSON API
+HISTORY_PAGE_SIZE = 20
+
+# Dashboard stats are cached per user and keyed by their attempt count and latest attempt id
+DASHBOARD_STATS_CACHE_TIMEOUT = 60 * 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,4 +182,46 @@ load_dotenv()
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
-OPENROUTER_MODEL = "google/gemini-2.0-flash-exp:free" # Default to a free/cheap workable model
\ No newline at end of file
+OPENROUTER_MODEL = "google/gemini-2.0-flash-exp:free" # Default to a free/cheap workable model
+# Concurrent question generation: at most AI_MAX_CONCURRENCY prompts in flight,
+# spaced out by a shared token bucket (AI_RATE_LIMIT_PER_MINUTE, bursts of AI_RATE_LIMIT_BURST)
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", 8))
+AI_RATE_LIMIT_PER_MINUTE = float(os.environ.get("AI_RATE_LIMIT_PER_MINUTE", 60))
+AI_RATE_LIMIT_BURST = int(os.environ.get("AI_RATE_LIMIT_BURST", 10))
+# The limiter adapts below AI_RATE_LIMIT_PER_MINUTE from the provider's rate-limit headers and 429s.
+# Retries back off exponentially with jitter; after AI_CIRCUIT_FAILURE_THRESHOLD consecutive
+# provider outages, calls fail fast for AI_CIRCUIT_RESET_TIMEOUT seconds.
+AI_BACKOFF_BASE = float(os.environ.get("AI_BACKOFF_BASE", 1))
+AI_BACKOFF_MAX = float(os.environ.get("AI_BACKOFF_MAX", 30))
+AI_CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("AI_CIRCUIT_FAILURE_THRESHOLD", 5))
+AI_CIRCUIT_RESET_TIMEOUT = float(os.environ.get("AI_CIRCUIT_RESET_TIMEOUT", 60))
+
+# Question bank: tests are assembled from stored questions first; replenish_question_bank
+# keeps each topic/difficulty bucket at or above this many questions
+QUESTION_BANK_WATERMARK = int(os.environ.get("QUESTION_BANK_WATERMARK", 30))
+# Near-duplicate index (practice/dedup.py): 'reject' drops new questions whose estimated
+# similarity to a stored one reaches the threshold, 'flag' saves them with duplicate_of set, 'off' skips
+QUESTION_DEDUP_MODE = os.environ.get("QUESTION_DEDUP_MODE", "reject")
+QUESTION_DEDUP_THRESHOLD = float(os.environ.get("QUESTION_DEDUP_THRESHOLD", 0.85))
+
+# Prompt-response cache for LLM calls (ai_engine/response_cache.py), off by default.
+# When enabled, repeated prompts (answer explanations) are served from it until they are
+# AI_RESPONSE_CACHE_TTL old. Question generation never reads it outside replay mode (fresh
+# questions are wanted) but its responses are recorded; replay mode then serves only cached
+# responses and never calls the provider, for development and tests.
+AI_RESPONSE_CACHE_ENABLED = os.environ.get("AI_RESPONSE_CACHE_ENABLED", "0") == "1"
+AI_RESPONSE_CACHE_REPLAY = os.environ.get("AI_RESPONSE_CACHE_REPLAY", "0") == "1"
+AI_RESPONSE_CACHE_PATH = os.environ.get("AI_RESPONSE_CACHE_PATH", BASE_DIR / 'ai_response_cache.sqlite3')
+AI_RESPONSE_CACHE_TTL = int(os.environ.get("AI_RESPONSE_CACHE_TTL", 60 * 60 * 24 * 7))
+AI_RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("AI_RESPONSE_CACHE_MAX_ENTRIES", 5000))
+
+# LLM client (ai_engine/clients.py): 'openrouter', or 'stub' for offline development/testing.
+# One pooled keep-alive client is shared per process; AI_HTTP2 needs the 'h2' package.
+AI_BACKEND = os.environ.get("AI_BACKEND", "openrouter")
+AI_HTTP2 = os.environ.get("AI_HTTP2", "0") == "1"
+AI_CONNECT_TIMEOUT = float(os.environ.get("AI_CONNECT_TIMEOUT", 10))
+AI_REQUEST_TIMEOUT = float(os.environ.get("AI_REQUEST_TIMEOUT", 120))
+# Stream completions and parse questions as they arrive (salvages truncated responses)
+AI_STREAM_RESPONSES = os.environ.get("AI_STREAM_RESPONSES", "1") == "1"
+# Follow-up prompts per generation task that ask only for the questions still missing after validation
+AI_FOLLOWUP_ROUNDS = int(os.environ.get("AI_FOLLOWUP_ROUNDS", 2))
@@ -0,0 +1,119 @@
+import re
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from analytics.models import TopicPerformance
+from exams.models import Subject, Topic
+from practice.models import Question, QuestionLSHBucket
+from tests.models import MockTest, TestQuestion, UserTestAttempt
+from core.pagination import seek_after
+from tests.payload import DELIVERY_ORDER
+from tests.views import CATALOGUE_FILTERS, HISTORY_ORDER
+
+CATALOGUE_ORDER = ['-created_at', '-id']
+
+# Hot query paths that must be served by an index. Parameter values do not
+# matter: the plan depends on the schema, not on the data.
+HOT_QUERIES = {
+    'topic by slug': lambda: Topic.objects.filter(slug='x'),
+    'topic by subject and name': lambda: Topic.objects.filter(subject_id=1, name='x'),
+    'subject by name': lambda: Subject.objects.filter(name='x'),
+    'recent attempts of a user': lambda: UserTestAttempt.objects.filter(user_id=1).order_by('-completed_at')[:10],
+    'bank bucket': lambda: Question.objects.filter(topic_id=1, difficulty='Medium', is_ai_generated=True),
+    'test delivery order': lambda: TestQuestion.objects.filter(mock_test_id=1).order_by(*DELIVERY_ORDER),
+    'section payload': lambda: TestQuestion.objects.filter(mock_test_id=1, section_id=1),
+    'topic performance of a user': lambda: TopicPerformance.objects.filter(user_id=1),
+    'near-duplicate candidates': lambda: QuestionLSHBucket.objects.filter(key__in=[1, 2]),
+}
+
+
+def _catalogue_pages():
+    # Every combination of filters the catalogue form can submit
+    pages = {'test catalogue page': lambda: MockTest.objects.order_by(*CATALOGUE_ORDER)[:25]}
+    names = [name for name, _, _ in CATALOGUE_FILTERS]
+    for n in range(1, len(names) + 1):
+        for subset in combinations(names, n):
+            filters = {name: choices[0][0] for name, _, choices in CATALOGUE_FILTERS if name in subset}
+            pages[f"test catalogue page by {', '.join(subset)}"] = (
+                lambda filters=filters: MockTest.objects.filter(**filters).order_by(*CATALOGUE_ORDER)[:25]
+            )
+    pages['test catalogue page after a cursor'] = lambda: seek_after(MockTest.objects.all(), CATALOGUE_ORDER, [timezone.now(), 1])[:25]
+    return pages
+
+
+# Pages must come out of an index already sorted, and a filtered page (or one
+# after a cursor) must seek to its first row rather than walk the index to it
+PAGE_QUERIES = {
+    'attempt history page': lambda: UserTestAttempt.objects.filter(user_id=1).select_related('mock_test').order_by(*HISTORY_ORDER)[:21],
+    'attempt history page after a cursor': lambda: seek_after(
+        UserTestAttempt.objects.filter(user_id=1).select_related('mock_test'), HISTORY_ORDER, [timezone.now(), 1]
+    )[:21],
+    **_catalogue_pages(),
+}
+
+# A line of the plan that reads a whole table
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT)(\w+)(?!.*USING (?:COVERING )?INDEX)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+# A line of the plan that sorts the rows after reading them
+SORT_PATTERNS = {
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY'),
+    'postgresql': re.compile(r'\bSort\b'),
+}
+
+# A line of the plan that reads an index from its start instead of seeking into it
+INDEX_WALK_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+) USING (?:COVERING )?INDEX'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Explains the hot queries and fails if any of them falls back to a full table scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(f"No query plan check for the {connection.vendor} backend."))
+            return
+
+        if connection.vendor == 'postgresql':
+            # Small tables are cheaper to scan; make the planner use an index whenever one fits
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+        sort_pattern = SORT_PATTERNS.get(connection.vendor)
+        walk_pattern = INDEX_WALK_PATTERNS.get(connection.vendor)
+
+        failures = []
+        for name, build in {**HOT_QUERIES, **PAGE_QUERIES}.items():
+            queryset = build()
+            plan = queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(f"{name}:\n{plan}\n")
+            problems = []
+            scanned = pattern.findall(plan)
+            if scanned:
+                problems.append(f"full scan of {', '.join(scanned)}")
+            if name in PAGE_QUERIES:
+                if sort_pattern and sort_pattern.search(plan):
+                    problems.append("sorts every matching row")
+                walked = walk_pattern.findall(plan) if walk_pattern and queryset.query.where else []
+                if walked:
+                    problems.append(f"walks an index of {', '.join(walked)} instead of seeking")
+            if problems:
+                failures.append(f"{name}: {'; '.join(problems)}")
+                self.stdout.write(self.style.ERROR(f"  - {failures[-1]}"))
+            else:
+                self.stdout.write(f"  - {name}: ok")
+
+        total = len(HOT_QUERIES) + len(PAGE_QUERIES)
+        if failures:
+            raise CommandError(f"{len(failures)} of {total} hot queries are not served by an index.")
+        self.stdout.write(self.style.SUCCESS(f"All {total} hot queries use an index."))
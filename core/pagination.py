@@ -0,0 +1,70 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def _encode_cursor(values):
+    data = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor, fields):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _after(ordering, values):
+    """
+    Q for rows strictly after `values` in `ordering`, e.g. for
+    ('-created_at', '-id'): created_at <= c AND (created_at < c OR
+    (created_at = c AND id < i)).
+
+    The redundant bound on the leading column is what lets the database
+    seek: SQLite cannot turn the OR alone into an index range, and would
+    walk the index from the start to the cursor on every page.
+    """
+    condition = Q()
+    for i, name in enumerate(ordering):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        equal = {o.lstrip('-'): v for o, v in zip(ordering[:i], values[:i])}
+        condition |= Q(**equal, **{f'{field}__{lookup}': values[i]})
+    first = ordering[0]
+    return Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]}) & condition
+
+
+def seek_after(queryset, ordering, values):
+    """`queryset` in `ordering`, starting strictly after the row whose ordering columns hold `values`."""
+    return queryset.order_by(*ordering).filter(_after(list(ordering), values))
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=20):
+    """
+    One page of `queryset` in `ordering` (which must end with a unique
+    column such as 'id' or '-id'), starting after the opaque `cursor`.
+
+    Unlike OFFSET pagination the database seeks straight to the cursor
+    through the index on the ordering columns, so every page costs the same
+    however deep it is. Returns (items, next_cursor); next_cursor is None on
+    the last page. An invalid cursor restarts at the first page.
+    """
+    ordering = list(ordering)
+    fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in ordering]
+    values = _decode_cursor(cursor, fields) if cursor else None
+    queryset = seek_after(queryset, ordering, values) if values is not None else queryset.order_by(*ordering)
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = _encode_cursor([field.value_to_string(last) for field in fields])
+    return items, next_cursor
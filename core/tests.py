@@ -1,3 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
+
+from exams.models import Exam
+from tests.models import MockTest
+from .pagination import keyset_page, seek_after
+
+ORDERING = ['-created_at', '-id']
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        tests = [MockTest.objects.create(title=f"Test {i}", exam=exam, duration=60) for i in range(7)]
+        # Ties on created_at are broken by -id
+        now = timezone.now()
+        for i, test in enumerate(tests):
+            MockTest.objects.filter(pk=test.pk).update(created_at=now - timedelta(minutes=i // 3))
+
+    def expected(self):
+        return list(MockTest.objects.order_by(*ORDERING).values_list('id', flat=True))
+
+    def walk(self, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            items, cursor = keyset_page(MockTest.objects.all(), ORDERING, cursor, page_size)
+            ids += [item.id for item in items]
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_cursor_round_trip_covers_every_row_once(self):
+        for page_size in (1, 2, 3, 7, 10):
+            ids, pages = self.walk(page_size)
+            self.assertEqual(ids, self.expected(), page_size)
+            self.assertEqual(pages, max(1, -(-len(ids) // page_size)))
+
+    def test_page_ends_inside_a_tie(self):
+        first, cursor = keyset_page(MockTest.objects.all(), ORDERING, None, 2)
+        second, _ = keyset_page(MockTest.objects.all(), ORDERING, cursor, 2)
+        self.assertEqual(first[1].created_at, second[0].created_at)
+        self.assertEqual([t.id for t in first + second], self.expected()[:4])
+
+    def test_last_page_has_no_cursor(self):
+        items, cursor = keyset_page(MockTest.objects.all(), ORDERING, None, 7)
+        self.assertEqual(len(items), 7)
+        self.assertIsNone(cursor)
+
+    def test_filtered_queryset(self):
+        MockTest.objects.filter(pk__in=self.expected()[::2]).update(stage='Mains')
+        ids, cursor = [], None
+        while True:
+            items, cursor = keyset_page(MockTest.objects.filter(stage='Mains'), ORDERING, cursor, 2)
+            ids += [item.id for item in items]
+            if cursor is None:
+                break
+        self.assertEqual(ids, self.expected()[::2])
+
+    def test_invalid_cursor_restarts(self):
+        first, _ = keyset_page(MockTest.objects.all(), ORDERING, None, 3)
+        for cursor in ('garbage', 'WyJub3QtYS1kYXRlIiwxXQ', 'WzFd'):
+            items, _ = keyset_page(MockTest.objects.all(), ORDERING, cursor, 3)
+            self.assertEqual(items, first)
+
+    def test_cursor_bounds_the_leading_column(self):
+        # The OR alone cannot become an index range; the extra bound lets the database seek
+        plan = seek_after(MockTest.objects.filter(stage='Mains'), ORDERING, [timezone.now(), 1]).explain()
+        if connection.vendor == 'sqlite':
+            self.assertIn('created_at<?', plan)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('hot queries use an index', out.getvalue())
 
-# Create your tests here.
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['name'], name='exams_subje_name_5ac9d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='topic',
+            index=models.Index(fields=['subject', 'name'], name='exams_topic_subject_623dde_idx'),
+        ),
+    ]
@@ -13,6 +13,11 @@ class Subject(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['name']),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.exam.name})"
 
@@ -21,5 +26,10 @@ class Topic(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['subject', 'name']),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.subject.name}"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Question, QuestionGroup, PracticeSession
+from .models import Question, QuestionGroup, PracticeSession, PopulateRun, PopulateRunTopic
 
 @admin.register(QuestionGroup)
 class QuestionGroupAdmin(admin.ModelAdmin):
@@ -10,9 +10,10 @@ class QuestionGroupAdmin(admin.ModelAdmin):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ['text_preview', 'topic', 'group', 'question_number_in_group', 'difficulty', 'is_ai_generated']
-    list_filter = ['difficulty', 'is_ai_generated', 'topic__subject']
+    list_display = ['text_preview', 'topic', 'group', 'question_number_in_group', 'difficulty', 'is_ai_generated', 'duplicate_of']
+    list_filter = ['difficulty', 'is_ai_generated', 'topic__subject', ('duplicate_of', admin.EmptyFieldListFilter)]
     search_fields = ['text']
+    raw_id_fields = ['duplicate_of']
     
     def text_preview(self, obj):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
@@ -23,3 +24,14 @@ class PracticeSessionAdmin(admin.ModelAdmin):
     list_display = ['user', 'topic', 'score', 'total_questions', 'completed_at']
     list_filter = ['completed_at', 'topic']
     search_fields = ['user__username']
+
+class PopulateRunTopicInline(admin.TabularInline):
+    model = PopulateRunTopic
+    extra = 0
+    raw_id_fields = ['topic']
+
+@admin.register(PopulateRun)
+class PopulateRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'targets', 'status', 'created_at', 'updated_at']
+    list_filter = ['status']
+    inlines = [PopulateRunTopicInline]
@@ -0,0 +1,67 @@
+import base64
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core import signing
+
+BUNDLE_SALT = 'practice.bundle'
+
+
+def answer_digest(nonce, question_id, option):
+    """What the client hashes to check an option: sha256('nonce:question_id:option'), 16 hex chars."""
+    return hashlib.sha256(f"{nonce}:{question_id}:{option}".encode('utf-8')).hexdigest()[:16]
+
+
+def _keystream(seed, length):
+    stream = bytearray()
+    counter = 0
+    while len(stream) < length:
+        stream += hashlib.sha256(seed + counter.to_bytes(4, 'big')).digest()
+        counter += 1
+    return bytes(stream[:length])
+
+
+def seal_explanation(nonce, question_id, correct_option, explanation):
+    """
+    XORs the explanation with a SHA-256 keystream seeded by the correct
+    option, so the client can only read it once it has found that option.
+    """
+    data = (explanation or '').encode('utf-8')
+    seed = f"{nonce}:{question_id}:{correct_option}:explanation".encode('utf-8')
+    return base64.b64encode(bytes(a ^ b for a, b in zip(data, _keystream(seed, len(data))))).decode('ascii')
+
+
+def seal_batch(batch, user, topic, questions):
+    """
+    Adds a client-side answer bundle to a practice batch. Every question gets
+    the digest of its correct option and its sealed explanation, and the
+    batch gets a nonce plus a signed token naming the user, the topic and
+    the questions issued.
+
+    This keeps answers out of plain sight in the page, but it is not a
+    security boundary: there are only five options to try. Results are
+    therefore re-graded on the server when the events arrive, and the token
+    only vouches for which questions were issued to whom.
+    """
+    nonce = secrets.token_hex(8)
+    for q_data, question in zip(batch['questions'], questions):
+        q_data['answer_digest'] = answer_digest(nonce, question.id, question.correct_option)
+        q_data['explanation_sealed'] = seal_explanation(nonce, question.id, question.correct_option, question.explanation)
+    batch['nonce'] = nonce
+    batch['token'] = signing.dumps(
+        {'u': user.id, 't': topic.id, 'q': [question.id for question in questions], 'n': nonce},
+        salt=BUNDLE_SALT, compress=True
+    )
+    return batch
+
+
+def load_bundle(token, user):
+    """
+    The payload of a batch token issued to `user`. Raises
+    signing.BadSignature (or SignatureExpired) for forged, foreign or expired tokens.
+    """
+    bundle = signing.loads(token, salt=BUNDLE_SALT, max_age=getattr(settings, 'PRACTICE_BUNDLE_MAX_AGE', 60 * 60 * 24))
+    if bundle.get('u') != user.id:
+        raise signing.BadSignature("Bundle was issued to another user")
+    return bundle
@@ -0,0 +1,160 @@
+import hashlib
+import operator
+import re
+import zlib
+from array import array
+from collections import Counter
+
+from django.conf import settings
+
+from .models import QuestionFingerprint, QuestionLSHBucket
+
+# MinHash with one-permutation hashing: every shingle is hashed once into one
+# of NUM_BINS bins, so a signature costs O(shingles) rather than O(shingles x
+# permutations). LSH splits it into BANDS bands of ROWS values; two questions
+# become candidates if any band matches exactly (over 99.9% recall at 0.8
+# similarity), and only candidates are compared slot by slot, so a lookup
+# touches a handful of index rows however large the bank grows.
+NUM_BINS = 64
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+SHINGLE_SIZE = 5
+# Pairs above the threshold share about 8 of 16 bands; requiring two skips
+# verifying the many one-band collisions between templated questions
+MIN_BAND_HITS = 2
+EMPTY = 0xFFFFFFFF
+
+OPTION_FIELDS = ['option_a', 'option_b', 'option_c', 'option_d', 'option_e']
+
+
+def _get(q, field):
+    return (q.get(field) if isinstance(q, dict) else getattr(q, field, None)) or ''
+
+
+def normalised_text(q, context=''):
+    """
+    Question text plus its options (order-independent), lowercased with
+    punctuation stripped. `context` is the passage/chart of a grouped
+    question, so "Who lives on floor 3?" over two different puzzles differs.
+    """
+    options = sorted(str(_get(q, field)) for field in OPTION_FIELDS if _get(q, field))
+    text = ' '.join([context or '', str(_get(q, 'text'))] + options).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def signature(q, context=''):
+    text = normalised_text(q, context).encode('utf-8')
+    sig = [EMPTY] * NUM_BINS
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    for shingle in shingles:
+        h = zlib.crc32(shingle)
+        b = h % NUM_BINS
+        v = h // NUM_BINS
+        if v < sig[b]:
+            sig[b] = v
+
+    # Densify: an empty bin borrows the next filled bin's value, so short texts still band consistently
+    filled = [i for i, v in enumerate(sig) if v != EMPTY]
+    if filled:
+        following = filled[0] + NUM_BINS
+        for i in range(NUM_BINS - 1, -1, -1):
+            if sig[i] != EMPTY:
+                following = i
+            else:
+                sig[i] = sig[following % NUM_BINS] + following - i
+    return sig
+
+
+def band_keys(sig):
+    """One signed 64-bit bucket key per band (band number is part of the hash)."""
+    keys = []
+    for band in range(BANDS):
+        chunk = array('I', [band] + sig[band * ROWS:(band + 1) * ROWS]).tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    return sum(map(operator.eq, sig_a, sig_b)) / NUM_BINS
+
+
+def _pack(sig):
+    return array('I', sig).tobytes()
+
+
+def _unpack(data):
+    return array('I', bytes(data)).tolist()
+
+
+def find_near_duplicates(sigs, threshold=None, groups=None):
+    """
+    Looks up a batch of signatures against the index and against each other.
+    Returns one entry per signature: the id of an indexed near-duplicate, the
+    position of an earlier near-duplicate in the batch as ('batch', j), or
+    None. Costs one bucket query and one fingerprint query per batch.
+
+    `groups` gives each signature's passage/chart key (None if ungrouped).
+    Questions of one set share their context, which is most of their
+    shingles, so they are not compared with each other within the batch.
+    """
+    threshold = threshold if threshold is not None else getattr(settings, 'QUESTION_DEDUP_THRESHOLD', 0.85)
+    keys = [band_keys(sig) for sig in sigs]
+
+    candidates = {}
+    for key, question_id in QuestionLSHBucket.objects.filter(key__in={k for ks in keys for k in ks}).values_list('key', 'question_id'):
+        candidates.setdefault(key, set()).add(question_id)
+    hits = [Counter(qid for k in ks for qid in candidates.get(k, ())) for ks in keys]
+    # Only candidates sharing enough bands are worth fetching a signature for
+    wanted = {qid for counter in hits for qid, n in counter.items() if n >= MIN_BAND_HITS}
+    stored = {
+        question_id: _unpack(data)
+        for question_id, data in QuestionFingerprint.objects.filter(question_id__in=wanted).values_list('question_id', 'signature')
+    } if wanted else {}
+
+    def best_match(sig, hits, signatures):
+        # Most band hits first; stop once the remaining candidates share too few bands
+        for candidate, n in hits.most_common():
+            if n < MIN_BAND_HITS:
+                break
+            if candidate in signatures and similarity(sig, signatures[candidate]) >= threshold:
+                return candidate
+        return None
+
+    matches = []
+    seen_buckets = {}
+    batch_sigs = dict(enumerate(sigs))
+    groups = groups or [None] * len(sigs)
+    for i, (sig, ks) in enumerate(zip(sigs, keys)):
+        match = best_match(sig, hits[i], stored)
+        if match is None:
+            earlier = Counter(
+                j for k in ks for j in seen_buckets.get(k, ())
+                if groups[i] is None or groups[j] != groups[i]
+            )
+            j = best_match(sig, earlier, batch_sigs)
+            match = ('batch', j) if j is not None else None
+        for k in ks:
+            seen_buckets.setdefault(k, []).append(i)
+        matches.append(match)
+    return matches
+
+
+def index_questions(questions, sigs):
+    """Adds saved questions (with ids) and their signatures to the index using two bulk inserts."""
+    QuestionFingerprint.objects.bulk_create(
+        [QuestionFingerprint(question_id=q.id, signature=_pack(sig)) for q, sig in zip(questions, sigs)],
+        ignore_conflicts=True
+    )
+    QuestionLSHBucket.objects.bulk_create([
+        QuestionLSHBucket(key=key, question_id=q.id)
+        for q, sig in zip(questions, sigs)
+        for key in band_keys(sig)
+    ])
+
+
+def dedup_mode():
+    """'reject' drops near-duplicates before insert, 'flag' saves them with duplicate_of set, 'off' disables."""
+    return getattr(settings, 'QUESTION_DEDUP_MODE', 'reject')
@@ -0,0 +1,218 @@
+from django.core import signing
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from analytics.models import TopicPerformance
+from analytics.reports import MIN_ATTEMPTS_FOR_PLAN
+from .bundles import load_bundle, seal_batch
+from .models import PracticeAnswer, PracticeSession, Question, QuestionExposure
+from .signals import practice_session_finished
+
+# Rolling accuracy (%) below which a topic counts as weak: easier unseen questions come first
+WEAK_TOPIC_ACCURACY = 60
+# Per-answer time the client may report, in seconds; longer means the tab was left open
+MAX_ANSWER_SECONDS = 600
+
+
+def difficulty_order(user, topic):
+    """Order in which unseen questions are drawn, from the user's TopicPerformance row."""
+    row = TopicPerformance.objects.filter(user=user, topic=topic).values_list('rolling_accuracy', 'attempts').first()
+    if row is None or row[1] < MIN_ATTEMPTS_FOR_PLAN:
+        return ['Medium', 'Easy', 'Hard']
+    if row[0] < WEAK_TOPIC_ACCURACY:
+        return ['Easy', 'Medium', 'Hard']
+    return ['Hard', 'Medium', 'Easy']
+
+
+def select_batch(user, topic, size, exclude_ids=()):
+    """
+    Up to `size` question ids for the user's next practice batch, in order:
+    questions they missed last time (at most half the batch), then unseen
+    questions by difficulty_order(), then the least recently shown ones.
+    `exclude_ids` are the questions already on the page.
+
+    Each step is a LIMIT query walking an index, so the cost depends on the
+    batch size and the user's own exposures, not on the size of the bank.
+    """
+    exclude_ids = set(exclude_ids)
+    picked = []
+
+    exposures = QuestionExposure.objects.filter(
+        user=user, question__topic=topic, question__duplicate_of__isnull=True
+    ).exclude(question_id__in=exclude_ids)
+    picked += exposures.filter(last_correct=False).order_by('last_shown_at').values_list('question_id', flat=True)[:max(1, size // 2)]
+
+    seen = QuestionExposure.objects.filter(user=user, question=OuterRef('pk'))
+    unseen = Question.objects.filter(topic=topic, duplicate_of__isnull=True).exclude(Exists(seen))
+    for difficulty in difficulty_order(user, topic):
+        if len(picked) >= size:
+            break
+        # No ORDER BY: the (topic, difficulty) index is walked and the scan stops at the LIMIT
+        picked += unseen.filter(difficulty=difficulty).exclude(id__in=exclude_ids | set(picked)).order_by().values_list('id', flat=True)[:size - len(picked)]
+
+    if len(picked) < size:
+        picked += exposures.exclude(question_id__in=picked).order_by('last_shown_at').values_list('question_id', flat=True)[:size - len(picked)]
+
+    return picked
+
+
+def record_exposures(user, question_ids):
+    """Marks the questions as shown to the user: one UPDATE for known ones, one INSERT for the rest."""
+    now = timezone.now()
+    QuestionExposure.objects.filter(user=user, question_id__in=question_ids).update(
+        times_shown=F('times_shown') + 1, last_shown_at=now
+    )
+    QuestionExposure.objects.bulk_create([
+        QuestionExposure(user=user, question_id=question_id, times_shown=1, last_shown_at=now)
+        for question_id in question_ids
+    ], ignore_conflicts=True)
+
+
+def build_batch(user, topic, size, exclude_ids=()):
+    """
+    The next practice batch as a JSON-ready dict. Group context (passages,
+    chart JSON) is sent once per group in 'groups' and referenced by
+    'group_id', as in the mock test section payload. The answer bundle from
+    practice/bundles.py lets the page grade answers without a request each.
+    Nothing is written here: the questions only count as shown once the
+    page reports them as displayed (see record_events), so prefetches and
+    repeated fetches do not mark them as seen.
+    """
+    question_ids = select_batch(user, topic, size, exclude_ids)
+    questions = Question.objects.filter(id__in=question_ids).select_related('group').in_bulk()
+
+    questions_data = []
+    groups_data = {}
+    for question_id in question_ids:
+        q = questions[question_id]
+        group = q.group
+        if group and group.id not in groups_data:
+            groups_data[group.id] = {
+                'title': group.title,
+                'context_text': group.context_text,
+                'context_image': group.context_image.url if group.context_image else None
+            }
+        questions_data.append({
+            'id': q.id,
+            'text': q.text,
+            'option_a': q.option_a,
+            'option_b': q.option_b,
+            'option_c': q.option_c,
+            'option_d': q.option_d,
+            'option_e': q.option_e,
+            'difficulty': q.difficulty,
+            'is_ai_generated': q.is_ai_generated,
+            'group_id': group.id if group else None
+        })
+
+    batch = {
+        'questions': questions_data,
+        'groups': groups_data,
+        'has_more': len(question_ids) == size
+    }
+    return seal_batch(batch, user, topic, [questions[question_id] for question_id in question_ids])
+
+
+def _token_bundle(bundles, user, token):
+    # Each distinct token in a flush is verified once
+    if not isinstance(token, str):
+        return None
+    if token not in bundles:
+        try:
+            bundles[token] = load_bundle(token, user)
+        except signing.BadSignature:
+            bundles[token] = None
+    return bundles[token]
+
+
+def record_events(user, events, shown=()):
+    """
+    Records what happened on the practice page, as flushed to the events
+    endpoint. `shown` lists the batches that were displayed ({token,
+    question_ids}) and marks those questions as seen; `events` are the
+    answers graded on the page ({token, question_id, selected_option,
+    time_spent}). Only questions a (signed) batch token issued to this user
+    are accepted, and answers are re-graded against the stored answer key.
+
+    Answers are stored as PracticeAnswer rows, whose unique (batch, question)
+    constraint makes a re-sent answer a no-op; two identical flushes racing
+    each other make one raise IntegrityError. The flush writes one
+    PracticeSession per topic, which practice_session_finished rolls into
+    TopicPerformance, and updates the exposures in bulk. Returns the number
+    of answers recorded.
+    """
+    bundles = {}
+    shown_ids = set()
+    for entry in shown:
+        bundle = _token_bundle(bundles, user, entry.get('token') if isinstance(entry, dict) else None)
+        if bundle is not None and isinstance(entry.get('question_ids'), list):
+            shown_ids.update(question_id for question_id in entry['question_ids'] if question_id in bundle['q'])
+
+    accepted = {}  # (batch nonce, question_id) -> (topic_id, selected_option, time_spent)
+    for event in events:
+        bundle = _token_bundle(bundles, user, event.get('token') if isinstance(event, dict) else None)
+        try:
+            question_id = int(event.get('question_id'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if bundle is None or question_id not in bundle['q']:
+            continue
+        try:
+            time_spent = max(0, min(int(event.get('time_spent') or 0), MAX_ANSWER_SECONDS))
+        except (TypeError, ValueError):
+            time_spent = 0
+        accepted[(bundle['n'], question_id)] = (bundle['t'], str(event.get('selected_option') or '').upper()[:1], time_spent)
+
+    with transaction.atomic():
+        if shown_ids:
+            record_exposures(user, shown_ids)
+
+        # Answers recorded by an earlier flush (a retry, or a replayed request) are skipped
+        if accepted:
+            recorded = PracticeAnswer.objects.filter(
+                batch__in={batch for batch, _ in accepted}, question_id__in={question_id for _, question_id in accepted}
+            ).values_list('batch', 'question_id')
+            for key in set(recorded) & set(accepted):
+                del accepted[key]
+        if not accepted:
+            return 0
+
+        question_ids = {question_id for _, question_id in accepted}
+        correct_options = dict(Question.objects.filter(id__in=question_ids).values_list('id', 'correct_option'))
+        results = {key: correct_options.get(key[1]) == selected_option for key, (_, selected_option, _) in accepted.items()}
+
+        now = timezone.now()
+        exposures = {exposure.question_id: exposure for exposure in QuestionExposure.objects.filter(user=user, question_id__in=question_ids)}
+        missing = []
+        for (_, question_id), is_correct in results.items():
+            exposure = exposures.get(question_id)
+            if exposure is None:
+                # Answered, but its 'shown' entry never arrived
+                exposure = exposures[question_id] = QuestionExposure(user=user, question_id=question_id, times_shown=1, last_shown_at=now)
+                missing.append(exposure)
+            exposure.times_correct += int(is_correct)
+            exposure.times_wrong += int(not is_correct)
+            exposure.last_correct = is_correct
+        QuestionExposure.objects.bulk_update(
+            [exposure for exposure in exposures.values() if exposure.pk], ['times_correct', 'times_wrong', 'last_correct']
+        )
+        QuestionExposure.objects.bulk_create(missing, ignore_conflicts=True)
+
+        sessions = {}
+        for key, (topic_id, _, time_spent) in accepted.items():
+            score, total, seconds = sessions.get(topic_id, (0, 0, 0))
+            sessions[topic_id] = (score + int(results[key]), total + 1, seconds + time_spent)
+        for topic_id, (score, total, seconds) in sessions.items():
+            sessions[topic_id] = (PracticeSession.objects.create(user=user, topic_id=topic_id, score=score, total_questions=total), seconds)
+
+        PracticeAnswer.objects.bulk_create([
+            PracticeAnswer(
+                session=sessions[topic_id][0], question_id=question_id, batch=batch,
+                selected_option=selected_option, is_correct=results[(batch, question_id)]
+            )
+            for (batch, question_id), (topic_id, selected_option, _) in accepted.items()
+        ])
+        for session, seconds in sessions.values():
+            practice_session_finished.send(sender=PracticeSession, session=session, time_spent=seconds)
+    return len(accepted)
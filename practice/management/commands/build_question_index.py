@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from practice.dedup import find_near_duplicates, index_questions, signature
+from practice.models import Question, QuestionFingerprint, QuestionLSHBucket
+
+
+class Command(BaseCommand):
+    help = 'Adds questions that are missing from the near-duplicate index, optionally flagging duplicates already in the bank'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Drop the whole index and rebuild it')
+        parser.add_argument('--flag', action='store_true', help='Set duplicate_of on questions that near-duplicate an older one')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Questions indexed per bulk insert')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            QuestionLSHBucket.objects.all().delete()
+            QuestionFingerprint.objects.all().delete()
+
+        batch_size = max(1, options['batch_size'])
+        indexed = flagged = 0
+        last_id = 0
+        while True:
+            # Oldest first, so the original of a duplicate pair is always the one already indexed
+            batch = list(
+                Question.objects.filter(id__gt=last_id, fingerprint__isnull=True)
+                .select_related('group').order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            sigs = [signature(q, q.group.context_text if q.group else '') for q in batch]
+
+            with transaction.atomic():
+                if options['flag']:
+                    duplicates = []
+                    for question, match in zip(batch, find_near_duplicates(sigs)):
+                        if match is None or question.duplicate_of_id:
+                            continue
+                        if isinstance(match, tuple):
+                            original = batch[match[1]]
+                            match = original.duplicate_of_id or original.id
+                        question.duplicate_of_id = match
+                        duplicates.append(question)
+                    Question.objects.bulk_update(duplicates, ['duplicate_of'])
+                    flagged += len(duplicates)
+                index_questions(batch, sigs)
+            indexed += len(batch)
+            self.stdout.write(f"  - Indexed {indexed} questions...")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} questions, flagged {flagged} near-duplicates."))
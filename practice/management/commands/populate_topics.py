@@ -1,52 +1,136 @@
-from django.core.management.base import BaseCommand
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
 from exams.models import Topic
-from practice.models import Question
+from practice.models import Question, PopulateRun, PopulateRunTopic
+from practice.pipeline import save_generated_questions
 from ai_engine.ai_service import generate_topic_questions
-import time
+from ai_engine.rate_limit import get_circuit_breaker
+
+DIFFICULTIES = [choice for choice, _ in Question.DIFFICULTY_CHOICES]
+
+
+def parse_targets(values):
+    """['Easy=10', 'Hard=5'] -> {'Easy': 10, 'Hard': 5}"""
+    targets = {}
+    for value in values:
+        difficulty, _, count = value.partition('=')
+        difficulty = difficulty.strip().capitalize()
+        if difficulty not in DIFFICULTIES or not count.isdigit():
+            raise CommandError(f"Invalid --target '{value}'. Use Difficulty=N with one of {', '.join(DIFFICULTIES)}.")
+        targets[difficulty] = int(count)
+    # Canonical key order so an interrupted run is matched by its targets
+    return dict(sorted(targets.items()))
+
 
 class Command(BaseCommand):
-    help = 'Ensures every topic has at least 10 questions'
-
-    def handle(self, *args, **kwargs):
-        topics = Topic.objects.all()
-        total_topics = topics.count()
-        self.stdout.write(f"Checking {total_topics} topics...")
-
-        for i, topic in enumerate(topics):
-            count = topic.questions.count()
-            needed = 10 - count
-            
-            if needed > 0:
-                self.stdout.write(f"[{i+1}/{total_topics}] '{topic.name}' has {count} questions. Generating {needed} more...")
-                
-                # Generate in batches of 5 to be safe
-                while needed > 0:
-                    batch_size = min(needed, 5)
-                    questions_data = generate_topic_questions(topic.name, batch_size, 'Medium')
-                    
-                    if not questions_data:
-                        self.stdout.write(self.style.WARNING(f"  - Failed to generate questions for '{topic.name}'. Skipping."))
-                        break
-                        
-                    for q_data in questions_data:
-                        Question.objects.create(
-                            topic=topic,
-                            text=q_data.get('text'),
-                            option_a=q_data.get('option_a'),
-                            option_b=q_data.get('option_b'),
-                            option_c=q_data.get('option_c'),
-                            option_d=q_data.get('option_d'),
-                            option_e=q_data.get('option_e'),
-                            correct_option=q_data.get('correct_option'),
-                            explanation=q_data.get('explanation'),
-                            difficulty='Medium',
-                            is_ai_generated=True
-                        )
-                    
-                    needed -= len(questions_data)
-                    self.stdout.write(f"  - Added {len(questions_data)} questions.")
-                    time.sleep(1) # Rate limiting
-            else:
-                self.stdout.write(f"[{i+1}/{total_topics}] '{topic.name}' already has {count} questions. OK.")
-        
-        self.stdout.write(self.style.SUCCESS("Population complete!"))
+    help = 'Fills every topic up to a target number of questions per difficulty, in parallel and resumably'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', nargs='+', default=['Medium=10'], metavar='DIFFICULTY=N',
+                            help='Questions wanted per topic for each difficulty, e.g. --target Easy=10 Medium=20 Hard=5')
+        parser.add_argument('--batch-size', type=int, default=5, help='Questions requested per LLM call')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'AI_MAX_CONCURRENCY', 8), help='Concurrent LLM calls')
+        parser.add_argument('--fresh', action='store_true', help='Start a new run instead of resuming an interrupted one')
+
+    def handle(self, *args, **options):
+        targets = parse_targets(options['target'])
+        run = self.get_or_plan_run(targets, options['fresh'])
+
+        pending = list(run.topics.exclude(status=PopulateRunTopic.STATUS_DONE).select_related('topic', 'run'))
+        self.stdout.write(f"Run {run.id}: {len(pending)} topic/difficulty buckets to fill.")
+
+        self.fill(pending, options['batch_size'], max(1, options['workers']))
+
+        if not run.topics.exclude(status=PopulateRunTopic.STATUS_DONE).exists():
+            run.status = PopulateRun.STATUS_COMPLETED
+            run.save(update_fields=['status', 'updated_at'])
+            self.stdout.write(self.style.SUCCESS("Population complete!"))
+        else:
+            self.stdout.write(self.style.WARNING(f"Run {run.id} incomplete; run the command again to resume it."))
+
+    def bucket_counts(self):
+        # All topic/difficulty counts in one grouped query instead of a COUNT per topic
+        rows = Question.objects.values('topic_id', 'difficulty').annotate(n=Count('id')).order_by()
+        return {(row['topic_id'], row['difficulty']): row['n'] for row in rows}
+
+    def get_or_plan_run(self, targets, fresh):
+        run = PopulateRun.objects.filter(status=PopulateRun.STATUS_RUNNING, targets=targets).first()
+        if run and not fresh:
+            self.stdout.write(f"Resuming run {run.id} from {run.created_at:%Y-%m-%d %H:%M}.")
+            return run
+
+        counts = self.bucket_counts()
+        run = PopulateRun.objects.create(targets=targets)
+        PopulateRunTopic.objects.bulk_create([
+            PopulateRunTopic(run=run, topic_id=topic_id, difficulty=difficulty, needed=target - counts.get((topic_id, difficulty), 0))
+            for topic_id in Topic.objects.values_list('id', flat=True)
+            for difficulty, target in targets.items()
+            if counts.get((topic_id, difficulty), 0) < target
+        ])
+        return run
+
+    def fill(self, buckets, batch_size, workers):
+        counts = self.bucket_counts()
+        remaining = {}
+        for bucket in buckets:
+            # Resumed buckets only need what the bank still lacks
+            target = bucket.run.targets[bucket.difficulty]
+            remaining[bucket.id] = max(0, target - counts.get((bucket.topic_id, bucket.difficulty), 0))
+
+        breaker = get_circuit_breaker()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for bucket in buckets:
+                needed = remaining[bucket.id]
+                if needed == 0:
+                    self.finish(bucket, PopulateRunTopic.STATUS_DONE)
+                    continue
+                for start in range(0, needed, batch_size):
+                    future = executor.submit(generate_topic_questions, bucket.topic.name, min(batch_size, needed - start), bucket.difficulty)
+                    futures[future] = bucket
+
+            outstanding = {bucket.id: 0 for bucket in futures.values()}
+            for bucket in futures.values():
+                outstanding[bucket.id] += 1
+
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    bucket = futures[future]
+                    outstanding[bucket.id] -= 1
+                    self.save_batch(bucket, future, remaining)
+                    if outstanding[bucket.id] == 0:
+                        done = remaining[bucket.id] == 0
+                        self.finish(bucket, PopulateRunTopic.STATUS_DONE if done else PopulateRunTopic.STATUS_FAILED)
+
+                if pending and breaker.is_open:
+                    # Provider is down: stop here and leave the rest for a resumed run,
+                    # but keep whatever the calls already in flight bring back
+                    running = [future for future in pending if not future.cancel()]
+                    self.stdout.write(self.style.WARNING("AI provider unavailable; stopping early."))
+                    for future in as_completed(running):
+                        self.save_batch(futures[future], future, remaining)
+                    break
+
+    def save_batch(self, bucket, future, remaining):
+        try:
+            questions_data = future.result()
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"  - '{bucket.topic.name}' ({bucket.difficulty}): {e}"))
+            return
+
+        # Writes stay on this thread; each batch is one bulk insert
+        questions_data = (questions_data or [])[:remaining[bucket.id]]
+        saved = save_generated_questions(questions_data, topic=bucket.topic, difficulty=bucket.difficulty) if questions_data else []
+        remaining[bucket.id] -= len(saved)
+        bucket.generated += len(saved)
+        bucket.save(update_fields=['generated', 'updated_at'])
+        self.stdout.write(f"  - '{bucket.topic.name}' ({bucket.difficulty}): added {len(saved)}, {remaining[bucket.id]} to go.")
+
+    def finish(self, bucket, status):
+        bucket.status = status
+        bucket.save(update_fields=['status', 'updated_at'])
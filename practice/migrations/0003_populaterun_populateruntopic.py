@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0001_initial'),
+        ('practice', '0002_alter_question_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopulateRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('targets', models.JSONField(help_text="Questions wanted per topic, by difficulty, e.g. {'Medium': 10}")),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed')], default='running', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PopulateRunTopic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.CharField(choices=[('Easy', 'Easy'), ('Medium', 'Medium'), ('Hard', 'Hard')], max_length=10)),
+                ('needed', models.PositiveIntegerField(help_text='Deficit when the run was planned')),
+                ('generated', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topics', to='practice.populaterun')),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.topic')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('run', 'topic', 'difficulty'), name='unique_populate_run_topic')],
+            },
+        ),
+    ]
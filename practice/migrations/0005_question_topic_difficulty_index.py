@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_subject_topic_indexes'),
+        ('practice', '0004_question_dedup_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['topic', 'difficulty', 'is_ai_generated'], name='practice_qu_topic_i_14b25e_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('practice', '0006_questionexposure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PracticeAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(max_length=32)),
+                ('selected_option', models.CharField(blank=True, max_length=1)),
+                ('is_correct', models.BooleanField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='practice_answers', to='practice.question')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='practice.practicesession')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('batch', 'question'), name='unique_practice_batch_answer')],
+            },
+        ),
+    ]
@@ -64,13 +64,34 @@ class Question(models.Model):
     explanation = models.TextField(blank=True)
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='Medium')
     is_ai_generated = models.BooleanField(default=False)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='near_duplicates', help_text="Set when saved as a near-duplicate of an existing question (excluded from tests)")
     
     class Meta:
         ordering = ['group__order', 'question_number_in_group', 'id']
+        indexes = [
+            models.Index(fields=['topic', 'difficulty', 'is_ai_generated']),
+        ]
 
     def __str__(self):
         return self.text[:50]
 
+class QuestionFingerprint(models.Model):
+    """MinHash signature of a question, used to verify near-duplicate candidates."""
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"Fingerprint of question {self.question_id}"
+
+
+class QuestionLSHBucket(models.Model):
+    """One LSH band of a question's signature; questions sharing a key are near-duplicate candidates."""
+    key = models.BigIntegerField(db_index=True)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='lsh_buckets')
+
+    def __str__(self):
+        return f"{self.key} -> {self.question_id}"
+
 class PracticeSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     topic = models.ForeignKey(Topic, on_delete=models.CASCADE)
@@ -80,3 +101,97 @@ class PracticeSession(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.topic.name}"
+
+class QuestionExposure(models.Model):
+    """
+    Per-user exposure index: which questions a user has been served in
+    practice and how they did, used to pick unseen and previously missed
+    questions first (see practice/delivery.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='question_exposures')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='exposures')
+    times_shown = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+    times_wrong = models.PositiveIntegerField(default=0)
+    last_correct = models.BooleanField(null=True, blank=True, help_text="Outcome of the latest answer; empty until answered")
+    last_shown_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            # Also the (user, question) lookup index
+            models.UniqueConstraint(fields=['user', 'question'], name='unique_question_exposure'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - question {self.question_id} ({self.times_shown}x)"
+
+class PracticeAnswer(models.Model):
+    """
+    One answer graded on the practice page and recorded by the events
+    endpoint. `batch` is the nonce of the answer bundle the question was
+    served in; the unique (batch, question) pair makes a re-sent event a no-op.
+    """
+    session = models.ForeignKey(PracticeSession, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='practice_answers')
+    batch = models.CharField(max_length=32)
+    selected_option = models.CharField(max_length=1, blank=True)
+    is_correct = models.BooleanField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'question'], name='unique_practice_batch_answer'),
+        ]
+
+    def __str__(self):
+        return f"{self.session.user} - question {self.question_id} ({'correct' if self.is_correct else 'wrong'})"
+
+class PopulateRun(models.Model):
+    """
+    One invocation of the populate_topics command. Runs that were interrupted
+    stay 'running' and are resumed by the next invocation with the same targets.
+    """
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    targets = models.JSONField(help_text="Questions wanted per topic, by difficulty, e.g. {'Medium': 10}")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Populate run {self.id} ({self.status})"
+
+
+class PopulateRunTopic(models.Model):
+    """Checkpoint for one topic/difficulty bucket of a PopulateRun."""
+    STATUS_PENDING = 'pending'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    run = models.ForeignKey(PopulateRun, on_delete=models.CASCADE, related_name='topics')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE)
+    difficulty = models.CharField(max_length=10, choices=Question.DIFFICULTY_CHOICES)
+    needed = models.PositiveIntegerField(help_text="Deficit when the run was planned")
+    generated = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'topic', 'difficulty'], name='unique_populate_run_topic'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic.name} ({self.difficulty}): {self.generated}/{self.needed}"
@@ -0,0 +1,221 @@
+import json
+
+from django.db import transaction
+
+from exams.models import Topic
+from tests.models import MockTest, TestQuestion
+from .dedup import dedup_mode, find_near_duplicates, index_questions, signature
+from .models import Question, QuestionGroup
+
+# Columns that are NOT NULL on Question; one bad row would abort the whole bulk insert
+REQUIRED_FIELDS = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option']
+
+GROUP_TYPE_MAP = {
+    'bar': 'bar_chart',
+    'line': 'line_graph',
+    'pie': 'pie_chart',
+    'table': 'table'
+}
+
+
+def _topic_slug(name):
+    return name.lower().replace(' ', '-')
+
+
+def _resolve_topics(subject, names):
+    """
+    Maps topic names to Topic rows for one subject with a single SELECT,
+    bulk-creating whichever names do not exist yet.
+    """
+    topics = {}
+    for topic in Topic.objects.filter(subject=subject, name__in=names):
+        topics.setdefault(topic.name, topic)
+
+    missing = [name for name in names if name not in topics]
+    if missing:
+        created = Topic.objects.bulk_create([
+            Topic(subject=subject, name=name, slug=_topic_slug(name)) for name in missing
+        ])
+        topics.update({topic.name: topic for topic in created})
+    return topics
+
+
+def _group_key(q_data):
+    chart_data = q_data.get('chart_data')
+    if chart_data:
+        return 'chart', json.dumps(chart_data, sort_keys=True)
+    if q_data.get('passage'):
+        return 'passage', q_data['passage']
+    return None
+
+
+def _group_context(q_data):
+    # Same text the QuestionGroup stores, so backfilled signatures match
+    chart_data = q_data.get('chart_data')
+    if chart_data:
+        return json.dumps(chart_data)
+    return q_data.get('passage') or ''
+
+
+def _build_group(q_data, subject, order):
+    chart_data = q_data.get('chart_data')
+    if chart_data:
+        return QuestionGroup(
+            title=chart_data.get('title', f"Study the following {chart_data.get('type')} chart"),
+            group_type=GROUP_TYPE_MAP.get(chart_data.get('type'), 'individual'),
+            context_text=json.dumps(chart_data), # Store JSON data in context_text
+            subject=subject,
+            order=order
+        )
+    # Puzzle/RC text
+    return QuestionGroup(
+        title="Directions (Study the following information carefully)",
+        group_type="text",
+        context_text=q_data.get('passage'),
+        subject=subject,
+        order=order
+    )
+
+
+def _reusable_matches(mock_test, matches):
+    """
+    {input index: stored question id} for rejected near-duplicates that can be
+    linked to `mock_test` in their place: the canonical copy of each match,
+    at most once, and only if the test does not hold it already.
+    """
+    matched = {match for match in matches if isinstance(match, int)}
+    if not matched:
+        return {}
+    canonical = {
+        question_id: duplicate_of_id or question_id
+        for question_id, duplicate_of_id in Question.objects.filter(id__in=matched).values_list('id', 'duplicate_of_id')
+    }
+    taken = set(TestQuestion.objects.filter(mock_test=mock_test).values_list('question_id', flat=True))
+    reuse = {}
+    for i, match in enumerate(matches):
+        question_id = canonical.get(match) if isinstance(match, int) else None
+        if question_id is not None and question_id not in taken:
+            taken.add(question_id)
+            reuse[i] = question_id
+    return reuse
+
+
+def save_generated_questions(questions_data, subject=None, topic=None, difficulty='Medium',
+                             mock_test=None, section=None, group_order=0):
+    """
+    Persists AI-generated question dicts in one transaction using bulk inserts.
+
+    Either pass `topic` (every question belongs to it) or `subject`, in which
+    case each question's 'topic' key is resolved against the subject's topics.
+    Consecutive questions that share the same chart/passage become one
+    QuestionGroup. When `mock_test` is given the questions are also linked to
+    it (and to `section`) through TestQuestion rows.
+
+    Near-duplicates of indexed questions (or of each other) are dropped, or
+    saved with duplicate_of set when QUESTION_DEDUP_MODE is 'flag'. A mock
+    test does not lose the slot of a dropped question: the stored question it
+    duplicates is linked in its place, so count the test's TestQuestion rows
+    rather than the return value to see how full it is.
+
+    Returns the list of created Question objects, in input order.
+    """
+    if topic is not None:
+        subject = topic.subject
+
+    valid = []
+    for q_data in questions_data or []:
+        if not isinstance(q_data, dict) or not all(q_data.get(field) for field in REQUIRED_FIELDS):
+            print(f"Skipping incomplete question: {q_data}")
+            continue
+        valid.append(q_data)
+    if not valid:
+        return []
+
+    with transaction.atomic():
+        mode = dedup_mode()
+        sigs = matches = None
+        kept = list(range(len(valid)))  # input index of each question created
+        reuse = {}  # input index -> stored question linked to mock_test instead
+        if mode != 'off':
+            sigs = [signature(q_data, _group_context(q_data)) for q_data in valid]
+            matches = find_near_duplicates(sigs, groups=[_group_key(q_data) for q_data in valid])
+            if mode == 'reject':
+                kept = [i for i, match in enumerate(matches) if match is None]
+                if mock_test is not None:
+                    reuse = _reusable_matches(mock_test, matches)
+                if len(kept) < len(valid):
+                    print(f"Rejected {len(valid) - len(kept)} near-duplicate questions"
+                          + (f", linking {len(reuse)} stored ones instead" if reuse else ""))
+                valid = [valid[i] for i in kept]
+                sigs = [sigs[i] for i in kept]
+                matches = [None] * len(kept)
+            if not valid and not reuse:
+                return []
+
+        if topic is None:
+            names = list(dict.fromkeys(q.get('topic') or 'General' for q in valid))
+            topics = _resolve_topics(subject, names)
+
+        # Handle Question Grouping (for Charts/Graphs/Passages)
+        groups = []
+        question_groups = []  # (group index or None, number in group) per question
+        previous_key = None
+        for q_data in valid:
+            key = _group_key(q_data)
+            if key is None:
+                question_groups.append((None, 1))
+            elif key == previous_key:
+                index, number = question_groups[-1]
+                question_groups.append((index, number + 1))
+            else:
+                # Distinct order per group so sets are not interleaved when sorted by (group order, number)
+                groups.append(_build_group(q_data, subject, group_order + len(groups)))
+                question_groups.append((len(groups) - 1, 1))
+            previous_key = key
+        groups = QuestionGroup.objects.bulk_create(groups)
+
+        questions = []
+        for q_data, (group_index, number), match in zip(valid, question_groups, matches or [None] * len(valid)):
+            questions.append(Question(
+                topic=topic or topics[q_data.get('topic') or 'General'],
+                group=groups[group_index] if group_index is not None else None,
+                question_number_in_group=number,
+                text=q_data.get('text'),
+                option_a=q_data.get('option_a'),
+                option_b=q_data.get('option_b'),
+                option_c=q_data.get('option_c'),
+                option_d=q_data.get('option_d'),
+                option_e=q_data.get('option_e'),
+                correct_option=q_data.get('correct_option'),
+                explanation=q_data.get('explanation') or '',
+                difficulty=difficulty,
+                is_ai_generated=True,
+                duplicate_of_id=match if isinstance(match, int) else None
+            ))
+        questions = Question.objects.bulk_create(questions)
+
+        if sigs is not None:
+            # Duplicates within the batch can only point at their original once it has an id
+            in_batch = []
+            for question, match in zip(questions, matches):
+                if isinstance(match, tuple):
+                    original = questions[match[1]]
+                    question.duplicate_of_id = original.duplicate_of_id or original.id
+                    in_batch.append(question)
+            if in_batch:
+                Question.objects.bulk_update(in_batch, ['duplicate_of'])
+            index_questions(questions, sigs)
+
+        if mock_test is not None:
+            # Created and reused questions keep the order they were generated in
+            linked = dict(zip(kept, (question.id for question in questions)))
+            linked.update(reuse)
+            start = TestQuestion.next_position(mock_test)
+            TestQuestion.objects.bulk_create([
+                TestQuestion(mock_test=mock_test, question_id=linked[index], section=section, position=start + i)
+                for i, index in enumerate(sorted(linked))
+            ])
+            # bulk_create skips signals, so invalidate the test's cached answer key here
+            MockTest.bump_version([mock_test.pk])
+
+    return questions
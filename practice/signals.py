@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once a PracticeSession has been saved with its final score.
+# Arguments: session, time_spent (seconds spent answering its questions).
+practice_session_finished = Signal()
@@ -1,3 +1,196 @@
+import base64
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import signing
 from django.test import TestCase
+from django.urls import reverse
+
+from ai_engine.rate_limit import CircuitOpenError
+from exams.models import Exam, Subject, Topic
+from .bundles import _keystream, answer_digest, load_bundle, seal_explanation
+from .delivery import build_batch, record_events
+from .models import PracticeAnswer, PracticeSession, Question, QuestionExposure
+from .pipeline import save_generated_questions
+
+
+def open_explanation(nonce, question_id, correct_option, sealed):
+    # What the practice page does in JavaScript
+    data = base64.b64decode(sealed)
+    seed = f"{nonce}:{question_id}:{correct_option}:explanation".encode('utf-8')
+    return bytes(a ^ b for a, b in zip(data, _keystream(seed, len(data))))
+
+
+class PracticeTestData:
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        subject = Subject.objects.create(exam=exam, name='Reasoning Ability', slug='reasoning-ability')
+        cls.topic = Topic.objects.create(subject=subject, name='Syllogism', slug='syllogism')
+        cls.questions = [
+            Question.objects.create(
+                topic=cls.topic, text=f"Q{i}", option_a='1', option_b='2', option_c='3', option_d='4', option_e='5',
+                correct_option='ABCDE'[i], explanation=f"Step {i}: ½ × 𝑥 = 42 | a | b |" * (i + 1)
+            )
+            for i in range(5)
+        ]
+        User = get_user_model()
+        cls.user = User.objects.create_user(username='learner', password='p')
+        cls.other = User.objects.create_user(username='other', password='p')
+
+
+class PracticeDeliveryTests(PracticeTestData, TestCase):
+    def test_fetching_a_batch_records_nothing(self):
+        build_batch(self.user, self.topic, 5)
+        self.assertFalse(QuestionExposure.objects.filter(user=self.user).exists())
+
+    def test_record_events_regrades_and_ignores_replays(self):
+        batch = build_batch(self.user, self.topic, 3)
+        ids = [q['id'] for q in batch['questions']]
+        correct = dict(Question.objects.filter(id__in=ids).values_list('id', 'correct_option'))
+        events = [
+            {'token': batch['token'], 'question_id': ids[0], 'selected_option': correct[ids[0]], 'time_spent': 20},
+            {'token': batch['token'], 'question_id': ids[1], 'selected_option': 'Z', 'time_spent': 10},
+            # Not in this batch / forged token: ignored
+            {'token': batch['token'], 'question_id': self.questions[4].id if self.questions[4].id not in ids else -1, 'selected_option': 'A'},
+            {'token': 'forged', 'question_id': ids[2], 'selected_option': 'A'},
+        ]
+        shown = [{'token': batch['token'], 'question_ids': ids}]
+
+        self.assertEqual(record_events(self.user, events, shown), 2)
+        session = PracticeSession.objects.get(user=self.user)
+        self.assertEqual((session.score, session.total_questions), (1, 2))
+        self.assertEqual(session.answers.count(), 2)
+        exposures = {e.question_id: e for e in QuestionExposure.objects.filter(user=self.user)}
+        self.assertEqual(set(exposures), set(ids))
+        self.assertEqual((exposures[ids[0]].times_correct, exposures[ids[0]].last_correct), (1, True))
+        self.assertEqual((exposures[ids[1]].times_wrong, exposures[ids[1]].last_correct), (1, False))
+        self.assertIsNone(exposures[ids[2]].last_correct)
+
+        self.assertEqual(record_events(self.user, events), 0)
+        self.assertEqual(PracticeSession.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(PracticeAnswer.objects.count(), 2)
+
+    def test_other_users_token_is_rejected(self):
+        batch = build_batch(self.user, self.topic, 1)
+        event = {'token': batch['token'], 'question_id': batch['questions'][0]['id'], 'selected_option': 'A'}
+        self.assertEqual(record_events(self.other, [event]), 0)
+
+
+class AnswerBundleTests(PracticeTestData, TestCase):
+    def test_digest_matches_only_the_correct_option(self):
+        batch = build_batch(self.user, self.topic, 5)
+        for q_data in batch['questions']:
+            question = Question.objects.get(id=q_data['id'])
+            matching = [option for option in 'ABCDE' if answer_digest(batch['nonce'], question.id, option) == q_data['answer_digest']]
+            self.assertEqual(matching, [question.correct_option])
+            self.assertNotIn('correct_option', q_data)
+            self.assertNotIn('explanation', q_data)
+
+    def test_sealed_explanation_round_trip(self):
+        batch = build_batch(self.user, self.topic, 5)
+        for q_data in batch['questions']:
+            question = Question.objects.get(id=q_data['id'])
+            sealed = q_data['explanation_sealed']
+            self.assertEqual(open_explanation(batch['nonce'], question.id, question.correct_option, sealed).decode('utf-8'), question.explanation)
+            wrong = 'B' if question.correct_option == 'A' else 'A'
+            self.assertNotEqual(open_explanation(batch['nonce'], question.id, wrong, sealed), question.explanation.encode('utf-8'))
+
+    def test_seal_is_per_batch(self):
+        self.assertNotEqual(seal_explanation('aa', 1, 'A', 'text'), seal_explanation('bb', 1, 'A', 'text'))
+        self.assertEqual(seal_explanation('aa', 1, 'A', ''), '')
+
+    def test_token_is_bound_to_user_and_unforgeable(self):
+        batch = build_batch(self.user, self.topic, 5)
+        bundle = load_bundle(batch['token'], self.user)
+        self.assertEqual(bundle['q'], [q['id'] for q in batch['questions']])
+        self.assertEqual(bundle['n'], batch['nonce'])
+        with self.assertRaises(signing.BadSignature):
+            load_bundle(batch['token'], self.other)
+        with self.assertRaises(signing.BadSignature):
+            load_bundle(batch['token'][:-2] + 'xx', self.user)
+
+
+PASSAGE = (
+    "Over the last decade, India's payment landscape has changed beyond recognition. Unified Payments Interface "
+    "transactions, which barely registered when the system was launched, now account for the majority of retail "
+    "digital payments by volume. Economists attribute this growth to three factors: near-universal smartphone "
+    "ownership in cities, the interoperability that lets any bank customer pay any merchant, and the absence of a "
+    "merchant discount rate on most person-to-merchant transfers. Small traders, who once insisted on cash, began "
+    "displaying quick-response codes printed on laminated cards, and street vendors in tier-two towns discovered "
+    "that accepting digital money reduced the risk of theft and the bother of carrying change. Critics, however, "
+    "warn that the model is not self-sustaining. Banks and payment apps bear the cost of running the switches, "
+    "settling disputes and preventing fraud, yet earn almost nothing on the bulk of transactions. Some analysts "
+    "argue that the government will eventually have to either reintroduce a modest fee for large merchants or "
+    "subsidise the infrastructure directly from the budget. Meanwhile, the regulator has pushed lenders to offer "
+    "small credit lines through the same interface, hoping that the data trail left by millions of payments will "
+    "allow banks to assess borrowers who have no formal credit history. Early pilots suggest that default rates on "
+    "such sachet loans are comparable to those on conventional personal loans, though the sample is still small "
+    "and the economic cycle has been benign. Rural adoption lags behind, largely because connectivity remains "
+    "patchy and many elderly customers distrust transactions they cannot see. Cooperative banks, which serve a "
+    "large share of farmers, were slow to connect to the network and still suffer frequent technical declines. "
+    "To bridge the gap, the payments corporation has introduced a voice-based feature that works on basic phones, "
+    "along with an offline mode that batches small payments until a signal returns. Whether these measures can "
+    "replicate the urban success story remains uncertain, but few observers expect cash to regain its former "
+    "dominance. The larger question, several bankers admit, is who will own the customer relationship once "
+    "payments, savings and credit all live inside the same application on a phone."
+)
+
+
+def rc_question(n, text, options):
+    return dict(
+        passage=PASSAGE, text=text, correct_option='A', explanation=f"See paragraph {n}.",
+        **{f"option_{letter}": option for letter, option in zip('abcde', options)}
+    )
+
+
+class NearDuplicateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        subject = Subject.objects.create(exam=exam, name='English Language', slug='english-language')
+        cls.topic = Topic.objects.create(subject=subject, name='Reading Comprehension', slug='reading-comprehension')
+
+    def rc_set(self):
+        return [
+            rc_question(1, "What did the central bank do with the repo rate?", ['Kept it unchanged', 'Raised it', 'Cut it', 'Abolished it', 'Doubled it']),
+            rc_question(2, "How did credit growth for small businesses behave?", ['Steady', 'Collapsed', 'Tripled', 'Turned negative', 'Not stated']),
+            rc_question(3, "Which word is most similar in meaning to 'eased'?", ['Softened', 'Hardened', 'Rose', 'Stalled', 'Spread']),
+        ]
+
+    def test_questions_sharing_a_passage_are_not_duplicates_of_each_other(self):
+        self.assertGreater(len(PASSAGE), 2000)
+        saved = save_generated_questions(self.rc_set(), topic=self.topic)
+        self.assertEqual(len(saved), 3)
+        self.assertEqual(len({question.group_id for question in saved}), 1)
+        self.assertEqual([question.question_number_in_group for question in saved], [1, 2, 3])
+
+    def test_a_repeated_set_is_still_rejected(self):
+        save_generated_questions(self.rc_set(), topic=self.topic)
+        self.assertEqual(save_generated_questions(self.rc_set(), topic=self.topic), [])
+        self.assertEqual(Question.objects.filter(topic=self.topic).count(), 3)
+
+    def test_repeated_question_in_one_batch_is_rejected(self):
+        single = {k: v for k, v in self.rc_set()[0].items() if k != 'passage'}
+        saved = save_generated_questions([single, dict(single, text=single['text'] + '?')], topic=self.topic)
+        self.assertEqual(len(saved), 1)
+
+
+class GenerateQuestionViewTests(PracticeTestData, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('generate_question', args=[self.topic.id])
+
+    def test_open_circuit_is_explained(self):
+        with mock.patch('practice.views.ai_generate_question', side_effect=CircuitOpenError("open")):
+            data = self.client.get(self.url).json()
+        self.assertFalse(data['success'])
+        self.assertIn('unavailable', data['message'])
+
+    def test_generated_question_is_saved(self):
+        q_data = rc_question(1, "Which factor drove the growth of payments?", ['Interoperability', 'Cash', 'Cheques', 'Gold', 'Barter'])
+        del q_data['passage']
+        with mock.patch('practice.views.ai_generate_question', return_value=q_data):
+            self.assertTrue(self.client.get(self.url).json()['success'])
+        self.assertTrue(Question.objects.filter(topic=self.topic, text=q_data['text']).exists())
 
-# Create your tests here.
@@ -5,6 +5,8 @@ urlpatterns = [
     path('', views.subject_list, name='practice_home'),
     path('subject/<slug:subject_slug>/', views.topic_list, name='topic_list'),
     path('topic/<path:topic_slug>/', views.practice_session, name='practice_session'),
+    path('api/topic/<int:topic_id>/batch/', views.practice_batch, name='practice_batch'),
     path('api/check_answer/', views.check_answer, name='check_answer'),
+    path('api/events/', views.practice_events, name='practice_events'),
     path('api/generate_question/<int:topic_id>/', views.generate_question_view, name='generate_question'),
 ]
@@ -2,32 +2,27 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from exams.models import Subject, Topic
 from .models import Question
-from django.http import JsonResponse
+from .pipeline import save_generated_questions
+from .delivery import build_batch, record_events
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import Http404, JsonResponse
 import json
 from ai_engine.ai_service import generate_question as ai_generate_question
+from ai_engine.rate_limit import CircuitOpenError
 
 @login_required
 def generate_question_view(request, topic_id):
     topic = get_object_or_404(Topic, id=topic_id)
     
     # Generate question using AI
-    ai_data = ai_generate_question(topic.name, 'Medium')
+    try:
+        ai_data = ai_generate_question(topic.name, 'Medium')
+    except CircuitOpenError:
+        return JsonResponse({'success': False, 'message': 'The AI service is unavailable right now. Please try again in a minute.'})
     
-    if ai_data:
-        # Save to DB
-        question = Question.objects.create(
-            topic=topic,
-            text=ai_data.get('text'),
-            option_a=ai_data.get('option_a'),
-            option_b=ai_data.get('option_b'),
-            option_c=ai_data.get('option_c'),
-            option_d=ai_data.get('option_d'),
-            option_e=ai_data.get('option_e'),
-            correct_option=ai_data.get('correct_option'),
-            explanation=ai_data.get('explanation'),
-            difficulty='Medium',
-            is_ai_generated=True
-        )
+    # Save to DB
+    if ai_data and save_generated_questions([ai_data], topic=topic, difficulty='Medium'):
         return JsonResponse({'success': True, 'message': 'Question generated successfully!'})
     
     return JsonResponse({'success': False, 'message': 'Failed to generate question.'})
@@ -43,16 +38,34 @@ def topic_list(request, subject_slug):
     topics = subject.topics.all()
     return render(request, 'practice/topic_list.html', {'subject': subject, 'topics': topics})
 
+def _get_topic(slug):
+    # Slugs are not unique across subjects; take the oldest match in one query
+    topic = Topic.objects.filter(slug=slug).select_related('subject').order_by('id').first()
+    if topic is None:
+        raise Http404("Topic not found")
+    return topic
+
 @login_required
 def practice_session(request, topic_slug):
-    # Handle potential duplicates gracefully
-    topics = Topic.objects.filter(slug=topic_slug)
-    if not topics.exists():
-        from django.http import Http404
-        raise Http404("Topic not found")
-    topic = topics.first()
-    questions = topic.questions.all()
-    return render(request, 'practice/practice_session.html', {'topic': topic, 'questions': questions})
+    # Only the page shell is rendered; questions arrive in batches from practice_batch
+    topic = _get_topic(topic_slug)
+    return render(request, 'practice/practice_session.html', {
+        'topic': topic,
+        'batch_size': getattr(settings, 'PRACTICE_BATCH_SIZE', 5),
+        'event_flush_size': getattr(settings, 'PRACTICE_EVENT_FLUSH_SIZE', 10),
+    })
+
+@login_required
+def practice_batch(request, topic_id):
+    """
+    JSON: the next batch of questions for the user in this topic (see
+    practice/delivery.py). ?exclude=1,2,3 lists questions already on the page.
+    Read-only; the page reports displayed questions to practice_events.
+    """
+    topic = get_object_or_404(Topic, id=topic_id)
+    exclude_ids = [int(value) for value in request.GET.get('exclude', '').split(',') if value.isdigit()][-500:]
+    size = getattr(settings, 'PRACTICE_BATCH_SIZE', 5)
+    return JsonResponse(build_batch(request.user, topic, size, exclude_ids))
 
 @login_required
 def check_answer(request):
@@ -70,3 +83,27 @@ def check_answer(request):
             'explanation': question.explanation
         })
     return JsonResponse({'error': 'Invalid request'}, status=400)
+
+@login_required
+def practice_events(request):
+    """
+    What the practice page did since its last flush: JSON {"shown": [{token,
+    question_ids}, ...], "events": [{token, question_id, selected_option,
+    time_spent}, ...]}. See delivery.record_events.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    try:
+        data = json.loads(request.body)
+        events, shown = data.get('events', []), data.get('shown', [])
+    except (ValueError, AttributeError):
+        events = shown = None
+    if not isinstance(events, list) or not isinstance(shown, list):
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    limit = getattr(settings, 'PRACTICE_EVENTS_PER_REQUEST', 200)
+    try:
+        recorded = record_events(request.user, events[:limit], shown[:limit])
+    except IntegrityError:
+        # The same answers are being recorded by a concurrent flush; a retry skips them
+        return JsonResponse({'error': 'Conflicting request, retry'}, status=409)
+    return JsonResponse({'recorded': recorded})
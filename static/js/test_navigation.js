@@ -1,11 +1,30 @@
 /**
  * Test Navigation System for Bank Exam Platform
- * Handles single-question navigation, section timing, and answer persistence
+ * Handles single-question navigation, section timing, and answer persistence.
+ * Questions are loaded lazily, one section at a time, from the section endpoint.
  */
 
 class TestNavigator {
-    constructor(testData) {
-        this.testData = testData;
+    constructor(manifest, sectionUrl, autosaveUrl) {
+        this.sectionUrl = sectionUrl;
+        this.autosaveUrl = autosaveUrl;
+        this.pendingAnswers = {};
+        this.autosaveTimer = null;
+        this.sectionLoads = {};
+        this.questionsById = {};
+        this.testData = {
+            testId: manifest.testId,
+            sections: manifest.sections,
+            questions: []
+        };
+        // Placeholders keep the palette, counts and navigation working before bodies arrive
+        manifest.sections.forEach(section => {
+            section.question_ids.forEach(id => {
+                const question = { id: id, section_name: section.name, section_id: section.id, loaded: false };
+                this.questionsById[id] = question;
+                this.testData.questions.push(question);
+            });
+        });
         this.currentQuestionIndex = 0;
         this.currentSectionIndex = 0;
         this.answers = {};
@@ -22,6 +41,60 @@ class TestNavigator {
         this.renderQuestionPalette();
         this.setupEventListeners();
         this.startSectionTimer();
+        this.startAutosave();
+    }
+
+    startAutosave() {
+        if (!this.autosaveUrl) return;
+
+        // Resume answers saved by an earlier (e.g. crashed) session
+        fetch(this.autosaveUrl, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(data => {
+                Object.entries(data.answers || {}).forEach(([questionId, option]) => {
+                    if (this.questionsById[questionId] && !(questionId in this.answers)) {
+                        this.answers[questionId] = option;
+                    }
+                });
+                this.renderQuestion();
+                this.renderQuestionPalette();
+            })
+            .catch(e => console.error('Error restoring saved answers:', e));
+
+        // Send batched deltas every few seconds, and when the page is hidden
+        this.autosaveTimer = setInterval(() => this.flushAnswers(), 5000);
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') this.flushAnswers();
+        });
+    }
+
+    flushAnswers() {
+        if (!this.autosaveUrl || Object.keys(this.pendingAnswers).length === 0) {
+            return Promise.resolve();
+        }
+
+        const batch = this.pendingAnswers;
+        this.pendingAnswers = {};
+        const csrfInput = document.querySelector('#test-form input[name="csrfmiddlewaretoken"]');
+
+        return fetch(this.autosaveUrl, {
+            method: 'POST',
+            credentials: 'same-origin',
+            keepalive: true,
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfInput ? csrfInput.value : ''
+            },
+            body: JSON.stringify({ answers: batch })
+        })
+            .then(response => {
+                if (!response.ok) throw new Error(`Autosave failed (${response.status})`);
+            })
+            .catch(e => {
+                console.error(e);
+                // Put the batch back unless newer changes superseded it
+                this.pendingAnswers = Object.assign(batch, this.pendingAnswers);
+            });
     }
 
     setupEventListeners() {
@@ -59,6 +132,21 @@ class TestNavigator {
             return;
         }
 
+        if (!question.loaded) {
+            questionContainer.innerHTML = `
+                <div class="text-center py-5">
+                    <div class="spinner-border text-primary" role="status">
+                        <span class="visually-hidden">Loading...</span>
+                    </div>
+                </div>
+            `;
+            const sectionIndex = this.testData.sections.findIndex(s => s.id === question.section_id);
+            this.loadSection(sectionIndex).then(() => {
+                if (this.getCurrentQuestion() === question && question.loaded) this.renderQuestion();
+            });
+            return;
+        }
+
         // Show group context if exists
         let contextHTML = '';
         if (question.group_context_text) {
@@ -227,6 +315,51 @@ class TestNavigator {
         return sections;
     }
 
+    loadSection(sectionIndex) {
+        const section = this.testData.sections[sectionIndex];
+        if (!section) return Promise.resolve();
+
+        if (!this.sectionLoads[section.id]) {
+            this.sectionLoads[section.id] = fetch(this.sectionUrl.replace('SECTION_ID', section.id), { credentials: 'same-origin' })
+                .then(response => {
+                    if (!response.ok) throw new Error(`Section ${section.id} failed to load (${response.status})`);
+                    return response.json();
+                })
+                .then(data => {
+                    // Group context is sent once per group; render its markdown once and share it
+                    const groups = {};
+                    Object.entries(data.groups).forEach(([id, group]) => {
+                        groups[id] = {
+                            group_title: group.title,
+                            group_context_text: prepareContext(group.context_text),
+                            group_context_image: group.context_image
+                        };
+                    });
+                    data.questions.forEach(q => {
+                        const question = this.questionsById[q.id];
+                        if (!question) return;
+                        Object.assign(question, q, q.group_id ? groups[q.group_id] : {}, {
+                            text: prepareText(q.text),
+                            loaded: true
+                        });
+                    });
+                })
+                .catch(e => {
+                    console.error('Error loading section:', e);
+                    delete this.sectionLoads[section.id];
+                });
+        }
+        return this.sectionLoads[section.id];
+    }
+
+    prefetchNextSection() {
+        // Fetch the next section in the background while the current section's timer runs
+        const nextIndex = this.currentSectionIndex + 1;
+        if (nextIndex < this.testData.sections.length) {
+            this.loadSection(this.currentSectionIndex).then(() => this.loadSection(nextIndex));
+        }
+    }
+
     getQuestionStatus(questionId, index) {
         if (index === this.currentQuestionIndex) return 'current';
         if (this.markedForReview.has(questionId)) return 'marked';
@@ -241,12 +374,14 @@ class TestNavigator {
     saveAnswer(value) {
         const question = this.getCurrentQuestion();
         this.answers[question.id] = value;
+        this.pendingAnswers[question.id] = value;
         this.renderQuestionPalette();
     }
 
     clearResponse() {
         const question = this.getCurrentQuestion();
         delete this.answers[question.id];
+        this.pendingAnswers[question.id] = null;
         document.querySelectorAll('input[name="answer"]').forEach(radio => {
             radio.checked = false;
         });
@@ -321,6 +456,8 @@ class TestNavigator {
             sectionNameDisplay.textContent = section.name;
         }
 
+        this.prefetchNextSection();
+
         this.currentTimer = setInterval(() => {
             this.sectionTimers[section.name]--;
 
@@ -448,7 +585,12 @@ class TestNavigator {
         // Prepare form data
         const form = document.getElementById('test-form');
 
-        // Add all answers to form
+        // Add all answers to form; the server grades exactly these, even if none are left
+        const complete = document.createElement('input');
+        complete.type = 'hidden';
+        complete.name = 'answers_complete';
+        complete.value = '1';
+        form.appendChild(complete);
         Object.keys(this.answers).forEach(questionId => {
             const input = document.createElement('input');
             input.type = 'hidden';
@@ -457,14 +599,29 @@ class TestNavigator {
             form.appendChild(input);
         });
 
-        // Submit the form
-        form.submit();
+        // Submit the form once the last autosave batch is stored, so the draft is current if the submit is lost
+        if (this.autosaveTimer) clearInterval(this.autosaveTimer);
+        this.flushAnswers().finally(() => form.submit());
     }
 }
 
+/**
+ * Markdown helpers: question text is always markdown, group context only
+ * when it is not JSON chart data
+ */
+function prepareText(text) {
+    if (!text || typeof marked === 'undefined') return text;
+    return marked.parse(text);
+}
+
+function prepareContext(text) {
+    if (!text || text.trim().startsWith('{')) return text;
+    return prepareText(text);
+}
+
 // Initialize when DOM is ready
 document.addEventListener('DOMContentLoaded', () => {
-    if (window.testData) {
-        window.testNavigator = new TestNavigator(window.testData);
+    if (window.testManifest) {
+        window.testNavigator = new TestNavigator(window.testManifest, window.testSectionUrl, window.testAutosaveUrl);
     }
-});
+});
\ No newline at end of file
@@ -1,3 +1,8 @@
 from django.contrib import admin
+from .models import TestGenerationJob
 
-# Register your models here.
+@admin.register(TestGenerationJob)
+class TestGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'exam_type', 'stage', 'difficulty', 'status', 'progress', 'total_steps', 'created_at', 'finished_at']
+    list_filter = ['status', 'exam_type', 'stage']
+    search_fields = ['user__username', 'message', 'error']
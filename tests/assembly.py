@@ -0,0 +1,110 @@
+import random
+from collections import defaultdict
+
+from ai_engine.ai_service import GROUPED_TOPICS, TOPIC_DISTRIBUTION
+from exams.models import Subject
+from practice.models import Question
+from .models import UserTestAnswer
+
+
+def seen_question_ids(user):
+    """Subquery of every question the user has answered in a mock test."""
+    return UserTestAnswer.objects.filter(attempt__user=user).values('question_id')
+
+
+def topic_quotas(subject_name, num_questions):
+    """
+    {topic: count} for a subject when its quota matches TOPIC_DISTRIBUTION,
+    otherwise {None: num_questions} meaning "any topic of the subject".
+    """
+    distribution = TOPIC_DISTRIBUTION.get(subject_name)
+    if distribution and num_questions == sum(distribution.values()):
+        return {topic: count for topic, count in distribution.items() if count}
+    return {None: num_questions}
+
+
+def _candidates(subject, topic_name, difficulty, user, exclude_ids):
+    qs = Question.objects.filter(topic__subject=subject, difficulty=difficulty, duplicate_of__isnull=True)
+    if topic_name is not None:
+        qs = qs.filter(topic__name=topic_name)
+    if user is not None:
+        qs = qs.exclude(id__in=seen_question_ids(user))
+    if exclude_ids:
+        qs = qs.exclude(id__in=exclude_ids)
+    return qs
+
+
+def _pick_individual(qs, count):
+    # Sample ids in Python rather than ORDER BY RANDOM(), which sorts the whole bucket
+    ids = list(qs.filter(group__isnull=True).values_list('id', flat=True))
+    return random.sample(ids, min(count, len(ids)))
+
+
+def _pick_groups(qs, count, user):
+    # Whole sets only; a set is unusable if the user has seen any of its questions
+    if user is not None:
+        # group__isnull matters: a NULL in a NOT IN subquery would exclude every row
+        seen_groups = Question.objects.filter(id__in=seen_question_ids(user), group__isnull=False).values('group_id')
+        qs = qs.exclude(group_id__in=seen_groups)
+    groups = defaultdict(list)
+    for group_id, question_id in qs.filter(group__isnull=False).order_by('group_id', 'question_number_in_group', 'id').values_list('group_id', 'id'):
+        groups[group_id].append(question_id)
+
+    group_ids = list(groups)
+    random.shuffle(group_ids)
+    picked = []
+    for group_id in group_ids:
+        if len(picked) + len(groups[group_id]) <= count:
+            picked.extend(groups[group_id])
+        if len(picked) == count:
+            break
+    return picked
+
+
+def assemble_subject(subject_name, num_questions, difficulty='Medium', user=None, exclude_ids=()):
+    """
+    Fills one subject's quota from the existing question bank.
+
+    Returns (question_ids, shortfall): question_ids in topic order, grouped
+    sets kept together; shortfall is the {topic: missing count} still to be
+    generated (topic None means any topic of the subject); see shortfall_request.
+    """
+    quotas = topic_quotas(subject_name, num_questions)
+    subject = Subject.objects.filter(name=subject_name).first()
+    if subject is None:
+        return [], quotas
+
+    question_ids = []
+    shortfall = {}
+    for topic_name, count in quotas.items():
+        qs = _candidates(subject, topic_name, difficulty, user, list(exclude_ids) + question_ids)
+        if topic_name in GROUPED_TOPICS:
+            picked = _pick_groups(qs, count, user)
+        else:
+            picked = _pick_individual(qs, count)
+        question_ids.extend(picked)
+        if len(picked) < count:
+            shortfall[topic_name] = count - len(picked)
+
+    return question_ids, shortfall
+
+
+def shortfall_request(shortfall):
+    """Turns an assemble_subject shortfall into a generate_questions_for_subjects quota."""
+    if None in shortfall:
+        return shortfall[None]
+    return shortfall
+
+
+def assemble_plan(plan, difficulty='Medium', user=None):
+    """
+    Runs assemble_subject for every section spec of a build_section_plan plan.
+    Returns a list of (question_ids, shortfall) in plan order.
+    """
+    picked_so_far = []
+    results = []
+    for spec in plan:
+        question_ids, shortfall = assemble_subject(spec['subject'], spec['questions'], difficulty, user, picked_so_far)
+        picked_so_far.extend(question_ids)
+        results.append((question_ids, shortfall))
+    return results
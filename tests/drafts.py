@@ -0,0 +1,56 @@
+from .models import TestDraft, DraftAnswer
+
+VALID_OPTIONS = {'A', 'B', 'C', 'D', 'E'}
+
+
+def save_draft_answers(user, test, answers, answer_key):
+    """
+    Upserts a batch of answer deltas ({question_id: option or None}) into the
+    user's draft for this test. Unknown questions and invalid options are
+    ignored. One INSERT ... ON CONFLICT DO UPDATE per batch.
+    """
+    valid_ids = set(answer_key.question_ids)
+    draft, _ = TestDraft.objects.get_or_create(user=user, mock_test=test)
+
+    rows = []
+    for question_id, option in answers.items():
+        try:
+            question_id = int(question_id)
+        except (TypeError, ValueError):
+            continue
+        if question_id not in valid_ids:
+            continue
+        if option and option not in VALID_OPTIONS:
+            continue
+        rows.append(DraftAnswer(draft=draft, question_id=question_id, selected_option=option or None))
+
+    if rows:
+        DraftAnswer.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['draft', 'question'],
+            update_fields=['selected_option', 'saved_at']
+        )
+        draft.save(update_fields=['updated_at'])
+    return draft, len(rows)
+
+
+def load_draft_answers(user, test):
+    """Returns {question_id: option} for the user's in-progress draft (cleared answers excluded)."""
+    return dict(
+        DraftAnswer.objects.filter(draft__user=user, draft__mock_test=test, selected_option__isnull=False)
+        .values_list('question_id', 'selected_option')
+    )
+
+
+def open_draft(user, test):
+    """The user's draft for this test, created (and its clock started) when the test is first opened."""
+    return TestDraft.objects.get_or_create(user=user, mock_test=test)[0]
+
+
+def draft_started_at(user, test):
+    return TestDraft.objects.filter(user=user, mock_test=test).values_list('started_at', flat=True).first()
+
+
+def discard_draft(user, test):
+    TestDraft.objects.filter(user=user, mock_test=test).delete()
@@ -0,0 +1,92 @@
+# EXAM CONFIGURATIONS - Question distribution for different exam types
+EXAM_CONFIGURATIONS = {
+    'SBI': {
+        'Prelims': {
+            'duration': 60,
+            'subjects': {
+                'English Language': 30,
+                'Quantitative Aptitude': 35,
+                'Reasoning Ability': 35
+            }
+        }
+    },
+    'IBPS': {
+        'Prelims': {
+            'duration': 60,
+            'subjects': {
+                'English Language': 30,
+                'Quantitative Aptitude': 35,
+                'Reasoning Ability': 35
+            }
+        }
+    },
+    'RRB': {
+        'Prelims': {
+            'duration': 45,  # Total duration
+            'negative_marks': 0.25,
+            'sections': [
+                {
+                    'name': 'Numerical Ability',
+                    'subject': 'Quantitative Aptitude',
+                    'questions': 40,
+                    'duration': 20, # Section-specific duration
+                    'positive_marks': 1.0,
+                    'negative_marks': 0.25
+                },
+                {
+                    'name': 'Reasoning Ability',
+                    'subject': 'Reasoning Ability',
+                    'questions': 40,
+                    'duration': 25, # Section-specific duration
+                    'positive_marks': 1.0,
+                    'negative_marks': 0.25
+                }
+            ]
+        },
+        'Mains': {
+            'duration': 120,
+            'sections': [
+                {
+                    'name': 'Reasoning Ability',
+                    'subject': 'Reasoning Ability',
+                    'questions': 40,
+                    'duration': 30,
+                    'positive_marks': 1.25,
+                    'negative_marks': 0.25
+                },
+                {
+                    'name': 'Quantitative Aptitude',
+                    'subject': 'Quantitative Aptitude',
+                    'questions': 40,
+                    'duration': 30,
+                    'positive_marks': 1.25,
+                    'negative_marks': 0.25
+                },
+                {
+                    'name': 'General Awareness',
+                    'subject': 'General Awareness',
+                    'questions': 40,
+                    'duration': 15,
+                    'positive_marks': 1.0,
+                    'negative_marks': 0.25
+                },
+                {
+                    'name': 'English Language',
+                    'subject': 'English Language',
+                    'questions': 40,
+                    'duration': 30,
+                    'positive_marks': 1.0,
+                    'negative_marks': 0.25
+                },
+                {
+                    'name': 'Computer Knowledge',
+                    'subject': 'Computer Knowledge',
+                    'questions': 40,
+                    'duration': 15,
+                    'positive_marks': 0.5,
+                    'negative_marks': 0.25
+                }
+            ]
+        }
+    }
+}
@@ -0,0 +1,164 @@
+from django.db import transaction
+from django.utils import timezone
+
+from ai_engine.ai_service import generate_questions_for_subjects
+from exams.models import Exam, Subject
+from practice.pipeline import save_generated_questions
+from .assembly import assemble_plan, shortfall_request
+from .exam_config import EXAM_CONFIGURATIONS
+from .models import MockTest, TestSection, TestQuestion
+
+# Fallback subject split used when an exam type/stage has no configuration
+DEFAULT_SUBJECT_CONFIG = {
+    'English Language': 30,
+    'Quantitative Aptitude': 35,
+    'Reasoning Ability': 35
+}
+
+
+def build_section_plan(exam_type, stage):
+    """
+    Normalises EXAM_CONFIGURATIONS into a list of section specs.
+    Section-based configs (RRB) carry their own name/duration/order,
+    subject-based configs (SBI/IBPS) fall back to the TestSection defaults.
+    """
+    config = EXAM_CONFIGURATIONS.get(exam_type, {}).get(stage, None)
+    duration = config['duration'] if config else 60
+
+    plan = []
+    if config and 'sections' in config:
+        for order, section_config in enumerate(config['sections'], start=1):
+            plan.append({
+                'subject': section_config['subject'],
+                'questions': section_config['questions'],
+                'section_name': section_config['name'],
+                'section_duration': section_config['duration'],
+                'section_order': order,
+            })
+    else:
+        subject_config = config.get('subjects', {}) if config else DEFAULT_SUBJECT_CONFIG
+        for sub_name, count in subject_config.items():
+            plan.append({'subject': sub_name, 'questions': count})
+
+    return duration, plan
+
+
+def _create_mock_test(exam_type, stage, difficulty, duration):
+    exam = Exam.objects.first() # Assuming SBI PO
+    return MockTest.objects.create(
+        title=f"{exam_type} {stage} Mock Test {MockTest.objects.count() + 1}",
+        exam=exam,
+        duration=duration,
+        difficulty=difficulty,
+        exam_type=exam_type,
+        stage=stage
+    )
+
+
+def _create_section(test, spec):
+    subject = Subject.objects.filter(name=spec['subject']).first()
+    if subject is None:
+        return None
+    section_fields = {k: v for k, v in spec.items() if k.startswith('section_')}
+    return TestSection.objects.create(mock_test=test, subject=subject, **section_fields)
+
+
+def _link_bank_questions(test, section, question_ids):
+    # Appended after whatever the test already holds, so sections stay in creation order
+    start = TestQuestion.next_position(test)
+    TestQuestion.objects.bulk_create([
+        TestQuestion(mock_test=test, question_id=question_id, section=section, position=start + i)
+        for i, question_id in enumerate(question_ids)
+    ])
+
+
+def assemble_test_from_bank(user, exam_type, stage, difficulty):
+    """
+    Builds a MockTest purely from the question bank, without any LLM call.
+    Returns None (and creates nothing) if the bank cannot fill every quota
+    with questions the user has not seen yet.
+    """
+    duration, plan = build_section_plan(exam_type, stage)
+    assembled = assemble_plan(plan, difficulty, user)
+    if not plan or any(shortfall for _, shortfall in assembled):
+        return None
+
+    with transaction.atomic():
+        test = _create_mock_test(exam_type, stage, difficulty, duration)
+        for spec, (question_ids, _) in zip(plan, assembled):
+            section = _create_section(test, spec)
+            _link_bank_questions(test, section, question_ids)
+    return test
+
+
+def run_generation_job(job):
+    """
+    Builds the MockTest described by a TestGenerationJob, reporting
+    progress on the job as each LLM batch and section completes. Runs inside the worker
+    process (see the run_test_worker management command).
+
+    Quotas are filled from the question bank first; only the shortfall is
+    sent to the LLM. The test itself is only created once generation is
+    over, in one transaction with its sections and questions, so a running or
+    failed job never leaves a partial test in the catalogue.
+    """
+    duration, plan = build_section_plan(job.exam_type, job.stage)
+
+    job.message = "Picking questions from the question bank"
+    job.total_steps = len(plan)
+    job.save(update_fields=['message', 'total_steps', 'updated_at'])
+    assembled = assemble_plan(plan, job.difficulty, job.user)
+
+    # One step per LLM call, plus one per section persisted afterwards
+    def on_progress(done, total, questions_received=0):
+        job.progress = done
+        job.total_steps = total + len(plan)
+        job.message = f"Generated {done} of {total} question batches ({questions_received} questions received)"
+        job.save(update_fields=['progress', 'total_steps', 'message', 'updated_at'])
+
+    # Shortfalls of all subjects are generated concurrently; CircuitOpenError fails the job
+    shortfall_indexes = [i for i, (_, shortfall) in enumerate(assembled) if shortfall]
+    generated = [[] for _ in plan]
+    if shortfall_indexes:
+        subject_requests = [(plan[i]['subject'], shortfall_request(assembled[i][1])) for i in shortfall_indexes]
+        results = generate_questions_for_subjects(subject_requests, job.difficulty, on_progress=on_progress)
+        for i, questions_data in zip(shortfall_indexes, results):
+            generated[i] = questions_data
+
+    if not any(question_ids or questions_data for (question_ids, _), questions_data in zip(assembled, generated)):
+        raise RuntimeError("No questions could be generated. Check the AI configuration (OPENROUTER_API_KEY).")
+
+    with transaction.atomic():
+        test = _create_mock_test(job.exam_type, job.stage, job.difficulty, duration)
+        for spec, (question_ids, _), questions_data in zip(plan, assembled, generated):
+            if question_ids or questions_data:
+                section = _create_section(test, spec)
+                if section:
+                    _link_bank_questions(test, section, question_ids)
+                    if questions_data:
+                        save_generated_questions(
+                            questions_data, subject=section.subject, difficulty=job.difficulty,
+                            mock_test=test, section=section, group_order=section.section_order * 100
+                        )
+
+            job.progress += 1
+            job.save(update_fields=['progress', 'updated_at'])
+
+        total_questions = test.test_questions.count()
+        if not total_questions:
+            # Rolls back the empty test
+            raise RuntimeError("None of the generated questions could be saved.")
+
+        # Bank questions were linked with bulk_create, which skips the version signals
+        MockTest.bump_version([test.pk])
+
+        job.mock_test = test
+        job.message = f"{job.exam_type} {job.stage} Mock Test with {total_questions} questions ({job.difficulty}) generated"
+        planned = sum(spec['questions'] for spec in plan)
+        if total_questions < planned:
+            # Generation or dedup came up short; say so instead of passing it off as a full test
+            print(f"WARNING: {test.title} has {total_questions} of {planned} planned questions.")
+            job.message = f"{job.exam_type} {job.stage} Mock Test generated with only {total_questions} of {planned} questions ({job.difficulty})"
+        job.finished_at = timezone.now()
+        job.save(update_fields=['mock_test', 'message', 'finished_at', 'updated_at'])
+    return test
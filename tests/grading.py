@@ -0,0 +1,146 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from analytics.rollup import record_test_attempt
+from .exam_config import EXAM_CONFIGURATIONS
+from .models import TestQuestion, UserTestAttempt, UserTestAnswer
+from .payload import DELIVERY_ORDER
+
+
+def section_scoring(test):
+    """
+    Returns ({section_name: (positive, negative)}, (default_positive, default_negative))
+    for the test's exam type and stage.
+    """
+    config = EXAM_CONFIGURATIONS.get(test.exam_type, {}).get(test.stage, {})
+    scoring = {}
+    for sec_conf in config.get('sections', []):
+        scoring[sec_conf['name']] = (sec_conf.get('positive_marks', 1.0), sec_conf.get('negative_marks', 0.25))
+    # Fallback globals if not in section map
+    return scoring, (1.0, config.get('negative_marks', 0.25))
+
+
+class AnswerKey(namedtuple('AnswerKey', ['question_ids', 'correct_options', 'positive_marks', 'negative_marks', 'topic_ids'])):
+    """
+    Compact, immutable answer key for one MockTest version. Parallel tuples in
+    delivery order; correct_options is a string with one letter per question.
+    topic_ids feeds the analytics rollup and is not used for scoring.
+    """
+    __slots__ = ()
+
+    @property
+    def size(self):
+        return len(self.question_ids)
+
+
+def build_answer_key(test):
+    """
+    Flattens the test into an AnswerKey in delivery order, using a single
+    narrow query.
+    """
+    scoring, default = section_scoring(test)
+    rows = TestQuestion.objects.filter(mock_test=test).order_by(*DELIVERY_ORDER).values_list('question_id', 'question__correct_option', 'section__section_name', 'question__topic_id')
+
+    question_ids, correct_options, positive_marks, negative_marks, topic_ids = [], [], [], [], []
+    for question_id, correct_option, section_name, topic_id in rows:
+        positive, negative = scoring.get(section_name, default)
+        question_ids.append(question_id)
+        correct_options.append(correct_option or ' ')
+        positive_marks.append(positive)
+        negative_marks.append(negative)
+        topic_ids.append(topic_id)
+
+    return AnswerKey(tuple(question_ids), ''.join(correct_options), tuple(positive_marks), tuple(negative_marks), tuple(topic_ids))
+
+
+def answer_key_cache_key(test):
+    # Prefix is bumped whenever the AnswerKey layout changes
+    return f"answer_key2:{test.id}:{test.version}"
+
+
+def get_answer_key(test):
+    """
+    Returns the cached AnswerKey for the test's current version, building it on
+    a miss. Any change to the test bumps MockTest.version (see tests/signals.py),
+    so stale keys are simply never read again.
+    """
+    key = answer_key_cache_key(test)
+    answer_key = cache.get(key)
+    if answer_key is None:
+        answer_key = build_answer_key(test)
+        cache.set(key, answer_key, getattr(settings, 'ANSWER_KEY_CACHE_TIMEOUT', 60 * 60 * 24))
+    return answer_key
+
+
+def grade(answer_key, selected_options):
+    """
+    Scores a submission in memory. selected_options maps question id -> option
+    letter (missing/empty means skipped). Returns (results, score, correct, wrong, skipped)
+    where results is a list of (question_id, selected_option, is_correct).
+    """
+    score = 0.0
+    correct = wrong = skipped = 0
+    results = []
+
+    for question_id, correct_option, positive, negative in zip(answer_key.question_ids, answer_key.correct_options,
+                                                                 answer_key.positive_marks, answer_key.negative_marks):
+        selected_option = selected_options.get(question_id) or None
+        is_correct = False
+
+        if selected_option:
+            if selected_option == correct_option:
+                score += positive
+                correct += 1
+                is_correct = True
+            else:
+                score -= negative # Section specific negative marking
+                wrong += 1
+        else:
+            skipped += 1
+
+        results.append((question_id, selected_option, is_correct))
+
+    return results, score, correct, wrong, skipped
+
+
+def submit_attempt(user, test, selected_options, answer_key=None, time_spent=0):
+    """
+    Grades a submission and writes the attempt plus all of its answers in one
+    transaction: one INSERT for the attempt and one bulk INSERT for the answers.
+    The user's per-topic analytics rollup is updated in the same transaction.
+    """
+    if answer_key is None:
+        answer_key = get_answer_key(test)
+    results, score, correct, wrong, skipped = grade(answer_key, selected_options)
+
+    with transaction.atomic():
+        attempt = UserTestAttempt.objects.create(
+            user=user,
+            mock_test=test,
+            score=score,
+            correct_count=correct,
+            wrong_count=wrong,
+            skipped_count=skipped
+        )
+        UserTestAnswer.objects.bulk_create([
+            UserTestAnswer(attempt=attempt, question_id=question_id, selected_option=selected_option, is_correct=is_correct)
+            for question_id, selected_option, is_correct in results
+        ])
+        record_test_attempt(attempt, answer_key, results, time_spent)
+
+    return attempt
+
+
+def selected_options_from_post(post):
+    """Extracts {question_id: option} from the take_test form fields (question_<id>)."""
+    selected = {}
+    for key, value in post.items():
+        if key.startswith('question_') and value:
+            try:
+                selected[int(key[len('question_'):])] = value
+            except ValueError:
+                continue
+    return selected
@@ -0,0 +1,74 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from exams.models import Exam, Subject, Topic
+from practice.models import Question
+from tests.grading import build_answer_key, submit_attempt
+from tests.models import MockTest, TestSection, TestQuestion
+
+OPTIONS = ['A', 'B', 'C', 'D', 'E']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures test submission throughput (grading + answer writes) for Prelims/Mains sized tests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 200], help='Question counts to benchmark')
+        parser.add_argument('--submissions', type=int, default=50, help='Submissions per size')
+
+    def handle(self, *args, **options):
+        # Everything runs inside a transaction that is rolled back at the end,
+        # so the benchmark leaves no fixtures or attempts behind.
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create(username=f'benchmark-{random.randint(0, 10**9)}')
+                for size in options['sizes']:
+                    self.run_size(user, size, options['submissions'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def build_test(self, size):
+        exam = Exam.objects.create(name='Benchmark', slug=f'benchmark-{random.randint(0, 10**9)}')
+        subject = Subject.objects.create(exam=exam, name='Benchmark Subject', slug='benchmark-subject')
+        topic = Topic.objects.create(subject=subject, name='Benchmark Topic', slug='benchmark-topic')
+        test = MockTest.objects.create(title=f'Benchmark {size}', exam=exam, duration=60, exam_type='RRB', stage='Mains')
+        section = TestSection.objects.create(mock_test=test, subject=subject, section_name='Reasoning Ability')
+
+        questions = Question.objects.bulk_create([
+            Question(topic=topic, text=f'Q{i}', option_a='a', option_b='b', option_c='c', option_d='d',
+                     option_e='e', correct_option=random.choice(OPTIONS))
+            for i in range(size)
+        ])
+        TestQuestion.objects.bulk_create([
+            TestQuestion(mock_test=test, question=question, section=section, position=i)
+            for i, question in enumerate(questions)
+        ])
+        return test
+
+    def run_size(self, user, size, submissions):
+        test = self.build_test(size)
+        question_ids = build_answer_key(test).question_ids
+
+        # Roughly 80% attempted, random answers
+        payloads = [
+            {qid: random.choice(OPTIONS) for qid in question_ids if random.random() < 0.8}
+            for _ in range(submissions)
+        ]
+
+        start = time.perf_counter()
+        for selected in payloads:
+            submit_attempt(user, test, selected)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{size:>4} questions: {submissions} submissions in {elapsed:.3f}s "
+            f"-> {submissions / elapsed:.1f} submissions/s ({elapsed * 1000 / submissions:.2f} ms each)"
+        )
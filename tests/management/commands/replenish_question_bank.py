@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from ai_engine.ai_service import TOPIC_DISTRIBUTION, generate_questions_for_subjects
+from ai_engine.rate_limit import CircuitOpenError
+from exams.models import Subject
+from practice.models import Question
+from practice.pipeline import save_generated_questions
+
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+
+
+class Command(BaseCommand):
+    help = 'Keeps every TOPIC_DISTRIBUTION topic/difficulty bucket of the question bank above a watermark'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watermark', type=int, default=getattr(settings, 'QUESTION_BANK_WATERMARK', 30), help='Minimum questions per topic/difficulty bucket')
+        parser.add_argument('--difficulty', nargs='+', choices=DIFFICULTIES, default=DIFFICULTIES, help='Difficulties to replenish')
+        parser.add_argument('--subject', nargs='+', help='Only these subjects (default: all in TOPIC_DISTRIBUTION)')
+        parser.add_argument('--max-per-bucket', type=int, default=10, help='Most questions generated for one bucket per pass')
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+        parser.add_argument('--interval', type=float, default=3600, help='Seconds between passes')
+
+    def handle(self, *args, **options):
+        subjects = options['subject'] or list(TOPIC_DISTRIBUTION)
+
+        while True:
+            added, requested = self.replenish(subjects, options['difficulty'], options['watermark'], options['max_per_bucket'])
+            if not requested:
+                self.stdout.write(self.style.SUCCESS("Pass complete: every bucket is at the watermark."))
+            elif added:
+                self.stdout.write(self.style.SUCCESS(f"Pass complete: {added} of {requested} requested questions added."))
+            else:
+                # Deficits remain but nothing new came back (provider down, or only duplicates)
+                self.stdout.write(self.style.ERROR(f"Pass added no questions; {requested} were requested."))
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def bucket_counts(self, subjects):
+        # One GROUP BY over the bank instead of a COUNT per bucket
+        rows = Question.objects.filter(topic__subject__name__in=subjects).values(
+            'topic__subject__name', 'topic__name', 'difficulty'
+        ).annotate(n=Count('id')).order_by()
+        return {(row['topic__subject__name'], row['topic__name'], row['difficulty']): row['n'] for row in rows}
+
+    def replenish(self, subjects, difficulties, watermark, max_per_bucket):
+        """Runs one pass; returns (questions added, questions requested)."""
+        counts = self.bucket_counts(subjects)
+        added = requested = 0
+
+        for difficulty in difficulties:
+            subject_requests = []
+            for sub_name in subjects:
+                deficits = {}
+                for topic in TOPIC_DISTRIBUTION.get(sub_name, {}):
+                    have = counts.get((sub_name, topic, difficulty), 0)
+                    if have < watermark:
+                        deficits[topic] = min(watermark - have, max_per_bucket)
+                if deficits:
+                    self.stdout.write(f"{sub_name} ({difficulty}): {len(deficits)} topics below {watermark}")
+                    subject_requests.append((sub_name, deficits))
+
+            if not subject_requests:
+                continue
+            requested += sum(sum(deficits.values()) for _, deficits in subject_requests)
+
+            try:
+                generated = generate_questions_for_subjects(subject_requests, difficulty)
+            except CircuitOpenError as e:
+                self.stdout.write(self.style.WARNING(f"  - {e}"))
+                break
+            for (sub_name, _), questions_data in zip(subject_requests, generated):
+                subject = Subject.objects.filter(name=sub_name).first()
+                if not subject or not questions_data:
+                    self.stdout.write(self.style.WARNING(f"  - Nothing generated for {sub_name} ({difficulty})."))
+                    continue
+                saved = save_generated_questions(questions_data, subject=subject, difficulty=difficulty)
+                added += len(saved)
+                if saved:
+                    self.stdout.write(f"  - Added {len(saved)} {difficulty} questions to {sub_name}.")
+                else:
+                    self.stdout.write(self.style.WARNING(f"  - All {len(questions_data)} generated {difficulty} questions for {sub_name} were duplicates or invalid."))
+
+        return added, requested
@@ -0,0 +1,73 @@
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tests.generation import run_generation_job
+from tests.models import MockTest, TestGenerationJob
+
+
+class Command(BaseCommand):
+    help = 'Processes queued mock test generation jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the pending queue once and exit')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait between polls when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=900, help='Re-queue running jobs with no heartbeat for this many seconds')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Test generation worker started.")
+
+        while True:
+            self.requeue_stale_jobs(options['stale_after'])
+            job = self.claim_next_job()
+
+            if job:
+                self.process(job)
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS("Queue drained."))
+
+    def requeue_stale_jobs(self, stale_after):
+        # A worker that died mid-job leaves it 'running' forever; hand it back to the queue
+        cutoff = timezone.now() - timedelta(seconds=stale_after)
+        stale = TestGenerationJob.objects.filter(status=TestGenerationJob.STATUS_RUNNING, updated_at__lt=cutoff)
+        # The test is committed together with finished_at; such a job only missed its status update
+        stale.filter(finished_at__isnull=False, mock_test__isnull=False).update(status=TestGenerationJob.STATUS_COMPLETED)
+        # Any other test still linked is a partial one; drop it rather than orphan it on the rerun
+        MockTest.objects.filter(generation_jobs__in=stale).delete()
+        requeued = stale.update(status=TestGenerationJob.STATUS_PENDING, message="Re-queued after worker timeout", mock_test=None)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale job(s)."))
+
+    def claim_next_job(self):
+        # Conditional UPDATE so that several workers never pick the same job
+        for job_id in TestGenerationJob.objects.filter(status=TestGenerationJob.STATUS_PENDING).values_list('id', flat=True)[:5]:
+            claimed = TestGenerationJob.objects.filter(
+                id=job_id, status=TestGenerationJob.STATUS_PENDING
+            ).update(status=TestGenerationJob.STATUS_RUNNING, started_at=timezone.now(), updated_at=timezone.now())
+            if claimed:
+                return TestGenerationJob.objects.get(id=job_id)
+        return None
+
+    def process(self, job):
+        self.stdout.write(f"Job {job.id}: generating {job}...")
+        try:
+            run_generation_job(job)
+        except Exception as e:
+            traceback.print_exc()
+            job.status = TestGenerationJob.STATUS_FAILED
+            job.error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+            self.stdout.write(self.style.ERROR(f"Job {job.id} failed: {e}"))
+            return
+
+        job.status = TestGenerationJob.STATUS_COMPLETED
+        job.save(update_fields=['status', 'updated_at'])
+        self.stdout.write(self.style.SUCCESS(f"Job {job.id} complete: {job.message}"))
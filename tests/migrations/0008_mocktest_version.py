@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0007_testgenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text="Bumped whenever the test's questions or answer key change; part of every cache key for this test"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0008_mocktest_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mocktest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Last change to the test or its content (Last-Modified of its payload)'),
+        ),
+    ]
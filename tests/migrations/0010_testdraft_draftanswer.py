@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('practice', '0002_alter_question_options_and_more'),
+        ('tests', '0009_mocktest_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TestDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('mock_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='drafts', to='tests.mocktest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='test_drafts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DraftAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('selected_option', models.CharField(blank=True, help_text='Empty when the response was cleared', max_length=1, null=True)),
+                ('saved_at', models.DateTimeField(auto_now=True)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='practice.question')),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='tests.testdraft')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='testdraft',
+            constraint=models.UniqueConstraint(fields=('user', 'mock_test'), name='unique_draft_per_user_test'),
+        ),
+        migrations.AddConstraint(
+            model_name='draftanswer',
+            constraint=models.UniqueConstraint(fields=('draft', 'question'), name='unique_draft_answer'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0010_testdraft_draftanswer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usertestattempt',
+            index=models.Index(fields=['user', '-completed_at'], name='tests_usert_user_id_7214b7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testquestion',
+            index=models.Index(fields=['mock_test', 'section'], name='tests_testq_mock_te_37f18c_idx'),
+        ),
+    ]
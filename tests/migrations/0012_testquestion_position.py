@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+def backfill_positions(apps, schema_editor):
+    # Positions follow the order tests were delivered in before the column existed
+    TestQuestion = apps.get_model('tests', 'TestQuestion')
+    rows = TestQuestion.objects.order_by(
+        'mock_test_id', 'section__section_order', 'question__group__order', 'question__question_number_in_group', 'id'
+    ).values_list('id', 'mock_test_id')
+
+    batch = []
+    current_test, position = None, 0
+    for pk, mock_test_id in rows.iterator():
+        if mock_test_id != current_test:
+            current_test, position = mock_test_id, 0
+        batch.append(TestQuestion(id=pk, position=position))
+        position += 1
+        if len(batch) >= 1000:
+            TestQuestion.objects.bulk_update(batch, ['position'])
+            batch = []
+    TestQuestion.objects.bulk_update(batch, ['position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testquestion',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, default=0, help_text='Delivery order within the test; appended at the end when left empty'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_positions, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='testquestion',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, default=None, help_text='Delivery order within the test; appended at the end when left empty'),
+        ),
+        migrations.AlterModelOptions(
+            name='testquestion',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddIndex(
+            model_name='testquestion',
+            index=models.Index(fields=['mock_test', 'position'], name='tests_testq_mock_te_c58962_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_subject_topic_indexes'),
+        ('tests', '0012_testquestion_position'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['-created_at', '-id'], name='tests_mockt_created_84f82c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['exam_type', 'stage', 'difficulty', '-created_at', '-id'], name='tests_mockt_exam_ty_3af975_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 22:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0013_mocktest_catalogue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usertestattempt',
+            name='tests_usert_user_id_7214b7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='usertestattempt',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='tests_usert_user_id_b66def_idx'),
+        ),
+    ]
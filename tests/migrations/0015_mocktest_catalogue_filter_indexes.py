@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 23:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0002_subject_topic_indexes'),
+        ('tests', '0014_usertestattempt_history_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['exam_type', '-created_at', '-id'], name='tests_mockt_exam_ty_f2e8fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['stage', '-created_at', '-id'], name='tests_mockt_stage_1ab1d0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['difficulty', '-created_at', '-id'], name='tests_mockt_difficu_867db1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['exam_type', 'stage', '-created_at', '-id'], name='tests_mockt_exam_ty_cdd818_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['exam_type', 'difficulty', '-created_at', '-id'], name='tests_mockt_exam_ty_ee16af_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mocktest',
+            index=models.Index(fields=['stage', 'difficulty', '-created_at', '-id'], name='tests_mockt_stage_70bf09_idx'),
+        ),
+    ]
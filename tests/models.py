@@ -2,6 +2,7 @@ from django.db import models
 from exams.models import Exam, Subject
 from practice.models import Question
 from django.conf import settings
+from django.utils import timezone
 
 class MockTest(models.Model):
     DIFFICULTY_CHOICES = [
@@ -25,11 +26,36 @@ class MockTest(models.Model):
     exam_type = models.CharField(max_length=10, choices=EXAM_TYPE_CHOICES, default='SBI')
     stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default='Prelims')
     total_marks = models.FloatField(default=100.0)
+    version = models.PositiveIntegerField(default=1, help_text="Bumped whenever the test's questions or answer key change; part of every cache key for this test")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Last change to the test or its content (Last-Modified of its payload)")
+
+    class Meta:
+        indexes = [
+            # Catalogue pages: newest first, filtered on any subset of exam_type/stage/difficulty
+            # (see test_list); the sort columns must follow exactly the filtered ones
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['exam_type', '-created_at', '-id']),
+            models.Index(fields=['stage', '-created_at', '-id']),
+            models.Index(fields=['difficulty', '-created_at', '-id']),
+            models.Index(fields=['exam_type', 'stage', '-created_at', '-id']),
+            models.Index(fields=['exam_type', 'difficulty', '-created_at', '-id']),
+            models.Index(fields=['stage', 'difficulty', '-created_at', '-id']),
+            models.Index(fields=['exam_type', 'stage', 'difficulty', '-created_at', '-id']),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def bump_version(cls, queryset_or_ids):
+        """Invalidates every cached artefact (answer key, payloads...) of the given tests."""
+        if isinstance(queryset_or_ids, models.QuerySet):
+            tests = cls.objects.filter(pk__in=queryset_or_ids.values('pk'))
+        else:
+            tests = cls.objects.filter(pk__in=queryset_or_ids)
+        return tests.update(version=models.F('version') + 1, updated_at=timezone.now())
+
 class TestSection(models.Model):
     mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='sections')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
@@ -48,9 +74,47 @@ class TestQuestion(models.Model):
     mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='test_questions')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     section = models.ForeignKey(TestSection, on_delete=models.CASCADE, null=True, blank=True, related_name='questions')
+    position = models.PositiveIntegerField(default=None, blank=True, help_text="Delivery order within the test; appended at the end when left empty")
     
     class Meta:
-        ordering = ['section__section_order', 'question__group__order', 'question__question_number_in_group', 'id']
+        # Materialised delivery order: reading a test is a range scan on (mock_test, position)
+        ordering = ['position', 'id']
+        indexes = [
+            # Per-section payloads filter on both columns
+            models.Index(fields=['mock_test', 'section']),
+            models.Index(fields=['mock_test', 'position']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.position is None:
+            self.position = TestQuestion.next_position(self.mock_test_id)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def next_position(cls, mock_test):
+        """Position after the test's last question. bulk_create callers must set positions themselves."""
+        last = cls.objects.filter(mock_test=mock_test).aggregate(last=models.Max('position'))['last']
+        return 0 if last is None else last + 1
+
+    @classmethod
+    def renumber(cls, mock_test_ids):
+        """
+        Rewrites positions as 0..n-1 per test, sections in section_order and
+        questions within a section in their current order. Used when sections
+        are reordered.
+        """
+        rows = cls.objects.filter(mock_test_id__in=mock_test_ids).order_by(
+            'mock_test_id', 'section__section_order', 'position', 'id'
+        ).only('id', 'mock_test_id', 'position')
+        counters = {}
+        changed = []
+        for tq in rows:
+            position = counters.get(tq.mock_test_id, 0)
+            counters[tq.mock_test_id] = position + 1
+            if tq.position != position:
+                tq.position = position
+                changed.append(tq)
+        cls.objects.bulk_update(changed, ['position'], batch_size=500)
     
 class UserTestAttempt(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -61,6 +125,12 @@ class UserTestAttempt(models.Model):
     skipped_count = models.IntegerField(default=0)
     completed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # History pages seek on the full keyset (see test_history)
+            models.Index(fields=['user', '-completed_at', '-id']),
+        ]
+
 class UserTestAnswer(models.Model):
     attempt = models.ForeignKey(UserTestAttempt, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
@@ -76,3 +146,85 @@ class UserTestAnswer(models.Model):
         if not self.question.correct_option:
             return None
         return getattr(self.question, f'option_{self.question.correct_option.lower()}', None)
+
+
+class TestDraft(models.Model):
+    """
+    An in-progress attempt. Answers are autosaved into DraftAnswer while the
+    test is running and graded from here on final submission.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='test_drafts')
+    mock_test = models.ForeignKey(MockTest, on_delete=models.CASCADE, related_name='drafts')
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'mock_test'], name='unique_draft_per_user_test'),
+        ]
+
+    def __str__(self):
+        return f"Draft: {self.user} - {self.mock_test}"
+
+
+class DraftAnswer(models.Model):
+    draft = models.ForeignKey(TestDraft, on_delete=models.CASCADE, related_name='answers')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    selected_option = models.CharField(max_length=1, blank=True, null=True, help_text="Empty when the response was cleared")
+    saved_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['draft', 'question'], name='unique_draft_answer'),
+        ]
+
+
+class TestGenerationJob(models.Model):
+    """
+    A queued request to build a MockTest. Created by generate_test_view and
+    processed out-of-band by the run_test_worker management command.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='generation_jobs')
+    exam_type = models.CharField(max_length=10, choices=MockTest.EXAM_TYPE_CHOICES, default='SBI')
+    stage = models.CharField(max_length=10, choices=MockTest.STAGE_CHOICES, default='Prelims')
+    difficulty = models.CharField(max_length=10, choices=MockTest.DIFFICULTY_CHOICES, default='Medium')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.IntegerField(default=0, help_text="Number of completed steps (sections)")
+    total_steps = models.IntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    mock_test = models.ForeignKey(MockTest, on_delete=models.SET_NULL, null=True, blank=True, related_name='generation_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Heartbeat; refreshed on every progress update")
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.exam_type} {self.stage} ({self.difficulty}) - {self.get_status_display()}"
+
+    @property
+    def is_active(self):
+        return self.status in (self.STATUS_PENDING, self.STATUS_RUNNING)
+
+    @property
+    def percent(self):
+        if not self.total_steps:
+            return 0
+        return int(self.progress * 100 / self.total_steps)
@@ -0,0 +1,96 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import TestQuestion, TestSection
+
+# TestQuestion.position is assigned when the test is assembled (see TestQuestion.renumber)
+DELIVERY_ORDER = ['position', 'id']
+
+
+def build_test_manifest(test):
+    """
+    The small skeleton embedded in the take_test page: every section with its
+    timing and ordered question ids. Question bodies are fetched per section.
+    """
+    sections = list(TestSection.objects.filter(mock_test=test).order_by('section_order'))
+    question_ids = {section.id: [] for section in sections}
+
+    for question_id, section_id in TestQuestion.objects.filter(mock_test=test).order_by(*DELIVERY_ORDER).values_list('question_id', 'section_id'):
+        question_ids.setdefault(section_id or 0, []).append(question_id)
+
+    sections_data = []
+    for section in sections:
+        sections_data.append({
+            'id': section.id,
+            'name': section.section_name,
+            'duration': section.section_duration,
+            'question_ids': question_ids[section.id]
+        })
+    if question_ids.get(0):
+        sections_data.append({'id': 0, 'name': 'General', 'duration': 20, 'question_ids': question_ids[0]})
+
+    return {
+        'testId': test.id,
+        'sections': sections_data
+    }
+
+
+def get_test_manifest(test):
+    key = f"test_manifest:{test.id}:{test.version}"
+    manifest = cache.get(key)
+    if manifest is None:
+        manifest = build_test_manifest(test)
+        cache.set(key, manifest, getattr(settings, 'TEST_PAYLOAD_CACHE_TIMEOUT', 60 * 60 * 24))
+    return manifest
+
+
+def build_section_payload(test, section_id):
+    """
+    Questions of one section in delivery order. Group context (passages, chart
+    JSON) is sent once per group in 'groups' and referenced by 'group_id'.
+    """
+    test_questions = TestQuestion.objects.filter(mock_test=test, section_id=section_id or None).select_related('question', 'question__group').order_by(*DELIVERY_ORDER)
+
+    questions_data = []
+    groups_data = {}
+    for tq in test_questions:
+        q = tq.question
+        group = q.group
+        if group and group.id not in groups_data:
+            groups_data[group.id] = {
+                'title': group.title,
+                'context_text': group.context_text,
+                'context_image': group.context_image.url if group.context_image else None
+            }
+        questions_data.append({
+            'id': q.id,
+            'text': q.text,
+            'option_a': q.option_a,
+            'option_b': q.option_b,
+            'option_c': q.option_c,
+            'option_d': q.option_d,
+            'option_e': q.option_e,
+            'group_id': group.id if group else None
+        })
+
+    return {
+        'section_id': section_id,
+        'questions': questions_data,
+        'groups': groups_data
+    }
+
+
+def get_section_payload_bytes(test, section_id):
+    """
+    Serialised section payload for the test's current version. It is identical
+    for every candidate, so it is encoded once and cached as bytes; the cache
+    key follows MockTest.version and therefore any content change.
+    """
+    key = f"test_section_payload:{test.id}:{test.version}:{section_id}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = json.dumps(build_section_payload(test, section_id), separators=(',', ':')).encode('utf-8')
+        cache.set(key, payload, getattr(settings, 'TEST_PAYLOAD_CACHE_TIMEOUT', 60 * 60 * 24))
+    return payload
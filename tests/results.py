@@ -0,0 +1,68 @@
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from .models import UserTestAnswer
+
+OPTION_LETTERS = 'ABCDE'
+
+
+def result_cache_key(attempt_id, version):
+    # Keyed by the test's version like the answer key, so an edited question or
+    # explanation is never served from a stale page by any process
+    return f"test_result:{attempt_id}:{version}"
+
+
+def build_result_answers(attempt):
+    """
+    The review rows of an attempt, in the order the questions were delivered,
+    from one narrow query. Option texts are resolved here rather than per
+    answer in the template.
+    """
+    rows = UserTestAnswer.objects.filter(attempt=attempt).order_by('id').values_list(
+        'selected_option', 'is_correct', 'question__text',
+        'question__option_a', 'question__option_b', 'question__option_c', 'question__option_d', 'question__option_e',
+        'question__correct_option', 'question__explanation'
+    )
+
+    answers = []
+    for selected_option, is_correct, text, a, b, c, d, e, correct_option, explanation in rows:
+        options = dict(zip(OPTION_LETTERS, (a, b, c, d, e)))
+        answers.append({
+            'text': text,
+            'selected_option': selected_option,
+            'selected_text': options.get((selected_option or '').upper()),
+            'is_correct': is_correct,
+            'correct_option': correct_option,
+            'correct_text': options.get((correct_option or '').upper()),
+            'explanation': explanation,
+        })
+    return answers
+
+
+def cache_result(attempt):
+    """
+    Renders the attempt's result page body and caches it zlib-compressed,
+    so reopening the result is a version lookup and a single cache read. A
+    finished attempt never changes; an edit to one of its questions bumps
+    the test's version and so moves the result to a new key.
+    """
+    html = render_to_string('tests/result_fragment.html', {
+        'attempt': attempt,
+        'test': attempt.mock_test,
+        'answers': build_result_answers(attempt),
+    })
+    entry = zlib.compress(html.encode('utf-8'))
+    cache.set(result_cache_key(attempt.id, attempt.mock_test.version), entry, getattr(settings, 'RESULT_CACHE_TIMEOUT', 60 * 60 * 24 * 30))
+    return entry
+
+
+def get_cached_result(attempt_id, version):
+    """The compressed HTML of the attempt's result at this test version, or None on a miss."""
+    return cache.get(result_cache_key(attempt_id, version))
+
+
+def result_html(entry):
+    return zlib.decompress(entry).decode('utf-8')
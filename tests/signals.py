@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from practice.models import Question, QuestionGroup
+from .models import MockTest, TestSection, TestQuestion
+
+# Everything cached per test (answer key, payloads, result pages) is keyed by MockTest.version,
+# so invalidation is a single UPDATE that bumps the version.
+
+
+@receiver(post_save, sender=TestQuestion)
+@receiver(post_delete, sender=TestQuestion)
+def test_question_changed(sender, instance, **kwargs):
+    MockTest.bump_version([instance.mock_test_id])
+
+
+@receiver(post_save, sender=TestSection)
+@receiver(post_delete, sender=TestSection)
+def test_section_changed(sender, instance, **kwargs):
+    # section_order decides where the section's questions are delivered
+    if kwargs.get('signal') is post_save and not kwargs.get('created'):
+        TestQuestion.renumber([instance.mock_test_id])
+    # Section names select the marking scheme
+    MockTest.bump_version([instance.mock_test_id])
+
+
+@receiver(post_save, sender=MockTest)
+def mock_test_changed(sender, instance, created, **kwargs):
+    # exam_type/stage select the marking scheme
+    if not created:
+        MockTest.bump_version([instance.pk])
+
+
+@receiver(post_save, sender=Question)
+def question_changed(sender, instance, created, **kwargs):
+    # An edited question (e.g. a corrected answer key) invalidates every test that uses it
+    if not created:
+        MockTest.bump_version(MockTest.objects.filter(test_questions__question=instance))
+
+
+@receiver(post_save, sender=QuestionGroup)
+def question_group_changed(sender, instance, created, **kwargs):
+    # The passage/chart is part of every section payload that holds one of the group's questions
+    if not created:
+        MockTest.bump_version(MockTest.objects.filter(test_questions__question__group=instance))
+
@@ -1,3 +1,348 @@
+import json
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ai_engine.ai_service import GROUPED_TOPICS, TOPIC_DISTRIBUTION
+from ai_engine.rate_limit import CircuitOpenError
+from analytics.models import TopicPerformance
+from exams.models import Exam, Subject, Topic
+from practice.models import Question, QuestionGroup
+from .assembly import assemble_subject, shortfall_request
+from .generation import assemble_test_from_bank
+from .grading import get_answer_key, grade, submit_attempt
+from .management.commands.run_test_worker import Command as WorkerCommand
+from .models import MockTest, TestDraft, TestGenerationJob, TestQuestion, TestSection, UserTestAnswer, UserTestAttempt
+from .results import cache_result
+
+
+class MockTestData:
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        subject = Subject.objects.create(exam=exam, name='Quantitative Aptitude', slug='quantitative-aptitude')
+        cls.topic = Topic.objects.create(subject=subject, name='Simplification', slug='simplification')
+        cls.test = MockTest.objects.create(title='Grading test', exam=exam, duration=60, exam_type='SBI', stage='Prelims')
+        section = TestSection.objects.create(mock_test=cls.test, subject=subject)
+        cls.group = QuestionGroup.objects.create(title='Read the passage', group_type='paragraph', context_text='Old passage', subject=subject)
+        cls.questions = [
+            Question.objects.create(
+                topic=cls.topic, group=cls.group if i < 2 else None, text=f"Q{i}",
+                option_a='1', option_b='2', option_c='3', option_d='4', correct_option=option
+            )
+            for i, option in enumerate('ABCD')
+        ]
+        for question in cls.questions:
+            TestQuestion.objects.create(mock_test=cls.test, question=question, section=section)
+        cls.section = section
+        cls.user = get_user_model().objects.create_user(username='grader', password='p')
+
+    def setUp(self):
+        cache.clear()
+        self.test.refresh_from_db()
+
+
+class GradingTests(MockTestData, TestCase):
+    def test_answer_key_is_in_delivery_order(self):
+        key = get_answer_key(self.test)
+        self.assertEqual(key.question_ids, tuple(q.id for q in self.questions))
+        self.assertEqual(key.correct_options, 'ABCD')
+        self.assertEqual(key.topic_ids, (self.topic.id,) * 4)
+
+    def test_answer_key_is_served_from_cache(self):
+        key = get_answer_key(self.test)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_key(self.test), key)
+
+    def test_grade_in_memory(self):
+        q = self.questions
+        results, score, correct, wrong, skipped = grade(get_answer_key(self.test), {q[0].id: 'A', q[1].id: 'B', q[2].id: 'A'})
+        self.assertEqual((correct, wrong, skipped), (2, 1, 1))
+        self.assertEqual(score, 2 - 0.25)
+        self.assertEqual(results[2], (q[2].id, 'A', False))
+        self.assertEqual(results[3], (q[3].id, None, False))
+
+    def test_corrected_answer_invalidates_cached_key(self):
+        get_answer_key(self.test)
+        question = self.questions[2]
+        question.correct_option = 'A'
+        question.save()
+        self.test.refresh_from_db()
+        _, score, correct, _, _ = grade(get_answer_key(self.test), {question.id: 'A'})
+        self.assertEqual((score, correct), (1.0, 1))
+
+    def test_submit_attempt_writes_answers_and_rollup(self):
+        q = self.questions
+        attempt = submit_attempt(self.user, self.test, {q[0].id: 'A', q[1].id: 'C'}, time_spent=120)
+        self.assertEqual((attempt.correct_count, attempt.wrong_count, attempt.skipped_count), (1, 1, 2))
+        self.assertEqual(list(attempt.answers.order_by('id').values_list('question_id', 'is_correct')),
+                         [(q[0].id, True), (q[1].id, False), (q[2].id, False), (q[3].id, False)])
+        row = TopicPerformance.objects.get(user=self.user, topic=self.topic)
+        self.assertEqual((row.attempts, row.correct, row.wrong, row.skipped, row.time_spent), (4, 1, 1, 2, 120))
+
+
+class DraftTests(MockTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.take_url = reverse('take_test', args=[self.test.id])
+        self.autosave_url = reverse('autosave_answers', args=[self.test.id])
+
+    def autosave(self, answers):
+        return self.client.post(self.autosave_url, json.dumps({'answers': answers}), content_type='application/json')
+
+    def test_autosave_and_resume(self):
+        q = self.questions
+        self.assertEqual(self.autosave({q[0].id: 'A', q[1].id: 'B', 'junk': 'A', q[2].id: 'Z'}).json()['saved'], 2)
+        self.assertEqual(self.autosave({q[1].id: None, q[3].id: 'D'}).json()['saved'], 2)
+        self.assertEqual(self.client.get(self.autosave_url).json()['answers'], {str(q[0].id): 'A', str(q[3].id): 'D'})
+
+    def test_opening_the_test_starts_the_clock(self):
+        self.client.get(self.take_url)
+        started_at = TestDraft.objects.get(user=self.user, mock_test=self.test).started_at
+        # A reload keeps the original start
+        self.client.get(self.take_url)
+        self.assertEqual(TestDraft.objects.get(user=self.user, mock_test=self.test).started_at, started_at)
+
+        TestDraft.objects.filter(user=self.user).update(started_at=timezone.now() - timedelta(minutes=10))
+        self.client.post(self.take_url, {'answers_complete': '1'})
+        row = TopicPerformance.objects.get(user=self.user, topic=self.topic)
+        self.assertAlmostEqual(row.time_spent, 600, delta=5)
+
+    def test_submitted_answers_are_authoritative(self):
+        q = self.questions
+        self.client.get(self.take_url)
+        # The clear of q[1] never reached autosave
+        self.autosave({q[0].id: 'A', q[1].id: 'B'})
+        response = self.client.post(self.take_url, {'answers_complete': '1', f'question_{q[0].id}': 'C'})
+        attempt = UserTestAttempt.objects.get(user=self.user)
+        self.assertRedirects(response, reverse('test_result', args=[attempt.id]), fetch_redirect_response=False)
+        self.assertEqual(dict(attempt.answers.values_list('question_id', 'selected_option')),
+                         {q[0].id: 'C', q[1].id: None, q[2].id: None, q[3].id: None})
+        self.assertFalse(TestDraft.objects.filter(user=self.user).exists())
+
+    def test_draft_stands_in_for_a_form_without_answers(self):
+        q = self.questions
+        self.autosave({q[0].id: 'A', q[1].id: 'B'})
+        self.client.post(self.take_url)
+        attempt = UserTestAttempt.objects.get(user=self.user)
+        self.assertEqual((attempt.correct_count, attempt.skipped_count), (2, 2))
+
+
+class SectionPayloadTests(MockTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse('test_section_questions', args=[self.test.id, self.section.id])
+
+    def test_unchanged_payload_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([q['id'] for q in response.json()['questions']], [q.id for q in self.questions])
+        with self.assertNumQueries(3):  # session, user, version lookup
+            revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_unknown_section_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('test_section_questions', args=[self.test.id, 0])).status_code, 404)
+
+    def assert_edit_is_served(self, edit, check):
+        etag = self.client.get(self.url)['ETag']
+        version = MockTest.objects.get(id=self.test.id).version
+        edit()
+        self.assertGreater(MockTest.objects.get(id=self.test.id).version, version)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        check(response.json())
+
+    def test_question_edit_bumps_the_version(self):
+        question = self.questions[3]
+        question.text = 'Edited question'
+        self.assert_edit_is_served(question.save, lambda data: self.assertEqual(data['questions'][3]['text'], 'Edited question'))
+
+    def test_group_edit_bumps_the_version(self):
+        def edit():
+            self.group.context_text = 'New passage'
+            self.group.save()
+        self.assert_edit_is_served(edit, lambda data: self.assertEqual(
+            [group['context_text'] for group in data['groups'].values()], ['New passage']
+        ))
+
+    def test_linking_a_question_bumps_the_version(self):
+        extra = Question.objects.create(topic=self.topic, text='Q4', option_a='1', option_b='2', option_c='3', option_d='4', correct_option='A')
+        self.assert_edit_is_served(
+            lambda: TestQuestion.objects.create(mock_test=self.test, question=extra, section=self.section),
+            lambda data: self.assertEqual(data['questions'][-1]['id'], extra.id)
+        )
+
+
+class ResultCacheTests(MockTestData, TestCase):
+    def setUp(self):
+        super().setUp()
+        q = self.questions
+        self.attempt = submit_attempt(self.user, self.test, {q[0].id: 'A'}, time_spent=60)
+        cache_result(self.attempt)
+        self.url = reverse('test_result', args=[self.attempt.id])
+        self.client.force_login(self.user)
+
+    def test_cached_result_is_served(self):
+        with mock.patch('tests.views.cache_result') as render:
+            response = self.client.get(self.url)
+        render.assert_not_called()
+        self.assertContains(response, 'Q0')
+
+    def test_edited_explanation_moves_to_a_new_key(self):
+        question = self.questions[0]
+        question.explanation = 'A corrected explanation'
+        question.save()
+        self.assertContains(self.client.get(self.url), 'A corrected explanation')
+
+    def test_other_users_get_not_found(self):
+        other = get_user_model().objects.create_user(username='other', password='p')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class BankAssemblyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        cls.quant = Subject.objects.create(exam=cls.exam, name='Quantitative Aptitude', slug='quantitative-aptitude')
+        cls.user = get_user_model().objects.create_user(username='learner', password='p')
+        cls.topics = {
+            name: Topic.objects.create(subject=cls.quant, name=name, slug=f"topic-{i}")
+            for i, name in enumerate(TOPIC_DISTRIBUTION['Quantitative Aptitude'])
+        }
+
+    def add_questions(self, topic_name, count, group=None):
+        return [
+            Question.objects.create(
+                topic=self.topics[topic_name], group=group, question_number_in_group=i + 1, text=f"{topic_name} {i}",
+                option_a='1', option_b='2', option_c='3', option_d='4', correct_option='A', difficulty='Medium'
+            )
+            for i in range(count)
+        ]
+
+    def add_set(self, topic_name, size):
+        group = QuestionGroup.objects.create(title='Study the chart', group_type='bar_chart', subject=self.quant)
+        return self.add_questions(topic_name, size, group)
+
+    def test_any_topic_quota_reports_the_missing_count(self):
+        self.add_questions('Simplification & Approximation', 12)
+        question_ids, shortfall = assemble_subject('Quantitative Aptitude', 20)
+        self.assertEqual(len(question_ids), 12)
+        self.assertEqual(shortfall, {None: 8})
+        self.assertEqual(shortfall_request(shortfall), 8)
+
+    def test_topic_quotas_report_each_topic_short(self):
+        distribution = TOPIC_DISTRIBUTION['Quantitative Aptitude']
+        for name, count in distribution.items():
+            if name not in GROUPED_TOPICS:
+                self.add_questions(name, count - (2 if name == 'Number Series (Missing/Wrong)' else 0))
+        self.add_set('Data Interpretation (Table/Bar/Line)', 5)
+        self.add_set('Data Interpretation (Table/Bar/Line)', 5)
+        question_ids, shortfall = assemble_subject('Quantitative Aptitude', sum(distribution.values()))
+        self.assertEqual(shortfall, {'Number Series (Missing/Wrong)': 2})
+        self.assertEqual(len(question_ids), len(set(question_ids)))
+        self.assertEqual(len(question_ids), sum(distribution.values()) - 2)
+
+    def test_sets_are_taken_whole(self):
+        first = self.add_set('Data Interpretation (Table/Bar/Line)', 6)
+        second = self.add_set('Data Interpretation (Table/Bar/Line)', 6)
+        with mock.patch('tests.assembly.topic_quotas', return_value={'Data Interpretation (Table/Bar/Line)': 10}):
+            question_ids, shortfall = assemble_subject('Quantitative Aptitude', 10)
+        self.assertIn(question_ids, [[q.id for q in first], [q.id for q in second]])
+        self.assertEqual(shortfall, {'Data Interpretation (Table/Bar/Line)': 4})
+
+    def test_seen_questions_and_duplicates_are_skipped(self):
+        questions = self.add_questions('Simplification & Approximation', 6)
+        Question.objects.filter(pk=questions[0].pk).update(duplicate_of=questions[1])
+        test = MockTest.objects.create(title='Old test', exam=self.exam, duration=60)
+        attempt = UserTestAttempt.objects.create(user=self.user, mock_test=test)
+        UserTestAnswer.objects.create(attempt=attempt, question=questions[2], selected_option='A', is_correct=True)
+        question_ids, shortfall = assemble_subject('Quantitative Aptitude', 6, user=self.user)
+        self.assertEqual(sorted(question_ids), sorted(q.id for q in questions[1:2] + questions[3:]))
+        self.assertEqual(shortfall, {None: 2})
+
+    def test_short_bank_builds_no_test(self):
+        self.add_questions('Simplification & Approximation', 5)
+        self.assertIsNone(assemble_test_from_bank(self.user, 'SBI', 'Prelims', 'Medium'))
+        self.assertFalse(MockTest.objects.exists())
+
+
+class GenerationWorkerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        cls.user = get_user_model().objects.create_user(username='learner', password='p')
+
+    def setUp(self):
+        self.worker = WorkerCommand(stdout=StringIO())
+
+    def job(self, **fields):
+        job = TestGenerationJob.objects.create(user=self.user, **fields)
+        if 'updated_at' in fields:
+            # auto_now overrides it on create
+            TestGenerationJob.objects.filter(pk=job.pk).update(updated_at=fields['updated_at'])
+        return job
+
+    def test_claim_takes_each_pending_job_once(self):
+        first, second = self.job(), self.job()
+        self.job(status=TestGenerationJob.STATUS_RUNNING)
+        claimed = [self.worker.claim_next_job() for _ in range(3)]
+        self.assertEqual([job and job.id for job in claimed], [first.id, second.id, None])
+        self.assertEqual(claimed[0].status, TestGenerationJob.STATUS_RUNNING)
+        self.assertIsNotNone(claimed[0].started_at)
+
+    def test_stale_jobs_are_requeued_without_their_partial_test(self):
+        old = timezone.now() - timedelta(hours=1)
+        partial = MockTest.objects.create(title='Partial', exam=self.exam, duration=60)
+        finished = MockTest.objects.create(title='Finished', exam=self.exam, duration=60)
+        stale = self.job(status=TestGenerationJob.STATUS_RUNNING, mock_test=partial, updated_at=old)
+        done = self.job(status=TestGenerationJob.STATUS_RUNNING, mock_test=finished, finished_at=old, updated_at=old)
+        alive = self.job(status=TestGenerationJob.STATUS_RUNNING)
+
+        self.worker.requeue_stale_jobs(900)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.mock_test), (TestGenerationJob.STATUS_PENDING, None))
+        self.assertFalse(MockTest.objects.filter(pk=partial.pk).exists())
+        done.refresh_from_db()
+        self.assertEqual((done.status, done.mock_test_id), (TestGenerationJob.STATUS_COMPLETED, finished.id))
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, TestGenerationJob.STATUS_RUNNING)
+
+    def test_failed_generation_leaves_no_test(self):
+        job = self.job(exam_type='SBI', stage='Prelims')
+        self.worker.claim_next_job()
+        with mock.patch('tests.generation.generate_questions_for_subjects', side_effect=CircuitOpenError("open")), \
+                mock.patch('traceback.print_exc'):
+            self.worker.process(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, TestGenerationJob.STATUS_FAILED)
+        self.assertIn('open', job.error)
+        self.assertFalse(MockTest.objects.exists())
+
+    def test_job_builds_the_test_in_one_go(self):
+        job = self.job(exam_type='SBI', stage='Prelims')
+        self.worker.claim_next_job()
+        generated = [
+            [{'text': f"{subject} {i}?", 'option_a': str(i), 'option_b': 'x', 'option_c': 'y', 'option_d': 'z', 'correct_option': 'A'}
+             for i in range(2)]
+            for subject in ('English', 'Quant', 'Reasoning')
+        ]
+        for name in ('English Language', 'Quantitative Aptitude', 'Reasoning Ability'):
+            Subject.objects.create(exam=self.exam, name=name, slug=name.lower().replace(' ', '-'))
+        with mock.patch('tests.generation.generate_questions_for_subjects', return_value=generated):
+            self.worker.process(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, TestGenerationJob.STATUS_COMPLETED)
+        self.assertEqual(job.mock_test.test_questions.count(), 6)
+        self.assertIn('only 6 of 100', job.message)
 
-# Create your tests here.
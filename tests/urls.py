@@ -4,8 +4,12 @@ from . import views
 urlpatterns = [
     path('', views.test_list, name='test_list'),
     path('generate/', views.generate_test_view, name='generate_test'),
+    path('jobs/<int:job_id>/status/', views.generation_job_status, name='generation_job_status'),
     path('<int:test_id>/take/', views.take_test, name='take_test'),
+    path('<int:test_id>/autosave/', views.autosave_answers, name='autosave_answers'),
+    path('<int:test_id>/sections/<int:section_id>/questions/', views.test_section_questions, name='test_section_questions'),
     path('result/<int:attempt_id>/', views.test_result, name='test_result'),
     path('history/', views.test_history, name='test_history'),
+    path('history/api/', views.test_history_api, name='test_history_api'),
     path('delete/<int:test_id>/', views.delete_test, name='delete_test'),
 ]
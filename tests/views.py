@@ -1,109 +1,67 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from ai_engine.ai_service import generate_test_questions
-from .models import MockTest, TestSection, TestQuestion, UserTestAttempt, UserTestAnswer
-from exams.models import Exam, Subject
-from practice.models import Question, Topic, QuestionGroup
-import threading
-
-# EXAM CONFIGURATIONS - Question distribution for different exam types
-EXAM_CONFIGURATIONS = {
-    'SBI': {
-        'Prelims': {
-            'duration': 60,
-            'subjects': {
-                'English Language': 30,
-                'Quantitative Aptitude': 35,
-                'Reasoning Ability': 35
-            }
-        }
-    },
-    'IBPS': {
-        'Prelims': {
-            'duration': 60,
-            'subjects': {
-                'English Language': 30,
-                'Quantitative Aptitude': 35,
-                'Reasoning Ability': 35
-            }
-        }
-    },
-    'RRB': {
-        'Prelims': {
-            'duration': 45,  # Total duration
-            'negative_marks': 0.25,
-            'sections': [
-                {
-                    'name': 'Numerical Ability',
-                    'subject': 'Quantitative Aptitude',
-                    'questions': 40,
-                    'duration': 20, # Section-specific duration
-                    'positive_marks': 1.0,
-                    'negative_marks': 0.25
-                },
-                {
-                    'name': 'Reasoning Ability',
-                    'subject': 'Reasoning Ability',
-                    'questions': 40,
-                    'duration': 25, # Section-specific duration
-                    'positive_marks': 1.0,
-                    'negative_marks': 0.25
-                }
-            ]
-        },
-        'Mains': {
-            'duration': 120,
-            'sections': [
-                {
-                    'name': 'Reasoning Ability',
-                    'subject': 'Reasoning Ability',
-                    'questions': 40,
-                    'duration': 30,
-                    'positive_marks': 1.25,
-                    'negative_marks': 0.25
-                },
-                {
-                    'name': 'Quantitative Aptitude',
-                    'subject': 'Quantitative Aptitude',
-                    'questions': 40,
-                    'duration': 30,
-                    'positive_marks': 1.25,
-                    'negative_marks': 0.25
-                },
-                {
-                    'name': 'General Awareness',
-                    'subject': 'General Awareness',
-                    'questions': 40,
-                    'duration': 15,
-                    'positive_marks': 1.0,
-                    'negative_marks': 0.25
-                },
-                {
-                    'name': 'English Language',
-                    'subject': 'English Language',
-                    'questions': 40,
-                    'duration': 30,
-                    'positive_marks': 1.0,
-                    'negative_marks': 0.25
-                },
-                {
-                    'name': 'Computer Knowledge',
-                    'subject': 'Computer Knowledge',
-                    'questions': 40,
-                    'duration': 15,
-                    'positive_marks': 0.5,
-                    'negative_marks': 0.25
-                }
-            ]
-        }
-    }
-}
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import condition
+from datetime import timedelta
+from urllib.parse import urlencode
+import json
+from django.utils import timezone
+from .drafts import save_draft_answers, load_draft_answers, open_draft, draft_started_at, discard_draft
+from .generation import assemble_test_from_bank
+from .grading import get_answer_key, submit_attempt, selected_options_from_post
+from .payload import get_test_manifest, get_section_payload_bytes
+from .results import cache_result, get_cached_result, result_html
+from core.pagination import keyset_page
+from users.stats import get_dashboard_stats
+from .models import MockTest, TestQuestion, UserTestAttempt, TestGenerationJob
+
+CATALOGUE_FILTERS = [
+    ('exam_type', 'Exam', MockTest.EXAM_TYPE_CHOICES),
+    ('stage', 'Stage', MockTest.STAGE_CHOICES),
+    ('difficulty', 'Difficulty', MockTest.DIFFICULTY_CHOICES),
+]
 
 @login_required
 def test_list(request):
-    tests = MockTest.objects.all()
-    return render(request, 'tests/test_list.html', {'tests': tests})
+    filters = {}
+    for name, _, choices in CATALOGUE_FILTERS:
+        value = request.GET.get(name)
+        if value in dict(choices):
+            filters[name] = value
+
+    # Correlated COUNT per row of the page, in the same query; a JOIN + GROUP BY would count every test before LIMIT
+    question_count = TestQuestion.objects.filter(mock_test=OuterRef('pk')).order_by().values('mock_test').annotate(n=Count('id')).values('n')
+    catalogue = MockTest.objects.filter(**filters).annotate(
+        question_count=Coalesce(Subquery(question_count, output_field=IntegerField()), 0)
+    )
+    tests, next_cursor = keyset_page(
+        catalogue, ['-created_at', '-id'], request.GET.get('cursor'),
+        getattr(settings, 'TEST_LIST_PAGE_SIZE', 24)
+    )
+
+    # Jobs still queued/running, plus recent failures so the user learns what happened
+    jobs = TestGenerationJob.objects.filter(user=request.user).exclude(
+        status=TestGenerationJob.STATUS_COMPLETED
+    ).filter(created_at__gte=timezone.now() - timedelta(days=1)).order_by('-created_at')
+    return render(request, 'tests/test_list.html', {
+        'tests': tests,
+        'jobs': jobs,
+        'filter_fields': [
+            {'name': name, 'label': label, 'choices': choices, 'value': filters.get(name, '')}
+            for name, label, choices in CATALOGUE_FILTERS
+        ],
+        'filter_query': urlencode(filters),
+        'next_query': urlencode({**filters, 'cursor': next_cursor}) if next_cursor else None,
+        'first_page': not request.GET.get('cursor'),
+    })
 
 @login_required
 def generate_test_view(request):
@@ -111,349 +69,190 @@ def generate_test_view(request):
         difficulty = request.POST.get('difficulty', 'Medium')
         exam_type = request.POST.get('exam_type', 'SBI')
         stage = request.POST.get('stage', 'Prelims')
-        
-        # Create a basic placeholder test immediately
-        exam = Exam.objects.first() # Assuming SBI PO
-        test = MockTest.objects.create(
-            title=f"{exam_type} {stage} Mock Test {MockTest.objects.count() + 1}",
-            exam=exam,
-            duration=60,  # Default, will be updated based on config
-            difficulty=difficulty,
+
+        # Instant when the question bank can fill every quota with questions the user has not seen
+        test = assemble_test_from_bank(request.user, exam_type, stage, difficulty)
+        if test:
+            messages.success(request, f"{test.title} ({difficulty}) is ready.")
+            return redirect('test_list')
+
+        # Otherwise generating the shortfall takes minutes, so queue it for the worker (run_test_worker) and return at once
+        TestGenerationJob.objects.create(
+            user=request.user,
             exam_type=exam_type,
-            stage=stage
+            stage=stage,
+            difficulty=difficulty
         )
-        
-        # Get configuration for the selected exam type and stage
-        config = EXAM_CONFIGURATIONS.get(exam_type, {}).get(stage, None)
-        
-        if config:
-            # Use configuration from EXAM_CONFIGURATIONS
-            test.duration = config['duration']
-            test.save()
-            
-            # Check if this is a section-based config (RRB) or subject-based config (SBI/IBPS)
-            if 'sections' in config:
-                # Section-based configuration (RRB)
-                total_questions = 0
-                section_order = 1
-                
-                for section_config in config['sections']:
-                    sub_name = section_config['subject']
-                    count = section_config['questions']
-                    section_name = section_config['name']
-                    section_duration = section_config['duration']
-                    total_questions += count
-                    
-                    questions_data = generate_test_questions(sub_name, count, difficulty)
-                    
-                    if questions_data:
-                        # Get or create subject
-                        subject = Subject.objects.filter(name=sub_name).first()
-                        if not subject:
-                            continue
-                            
-                        # Create Section with timing
-                        section = TestSection.objects.create(
-                            mock_test=test, 
-                            subject=subject,
-                            section_name=section_name,
-                            section_duration=section_duration,
-                            section_order=section_order
-                        )
-                        section_order += 1
-                        
-                        for q_data in questions_data:
-                            # Validate question text
-                            if not q_data.get('text'):
-                                print(f"Skipping question with missing text: {q_data}")
-                                continue
-
-                            # Find or create topic
-                            topic_name = q_data.get('topic', 'General')
-                            topic, _ = Topic.objects.get_or_create(name=topic_name, subject=subject, defaults={'slug': topic_name.lower().replace(' ', '-')})
-                            
-                            # Handle Question Grouping (for Charts/Graphs)
-                            group = None
-                            chart_data = q_data.get('chart_data')
-                            
-                            if chart_data:
-                                import json
-                                # Create a new group for this chart
-                                group_type_map = {
-                                    'bar': 'bar_chart',
-                                    'line': 'line_graph',
-                                    'pie': 'pie_chart',
-                                    'table': 'table'
-                                }
-                                group_type = group_type_map.get(chart_data.get('type'), 'individual')
-                                
-                                group = QuestionGroup.objects.create(
-                                    title=chart_data.get('title', f"Study the following {chart_data.get('type')} chart"),
-                                    group_type=group_type,
-                                    context_text=json.dumps(chart_data), # Store JSON data in context_text
-                                    subject=subject,
-                                    order=section_order * 100 # Simple ordering logic
-                                )
-                            elif q_data.get('passage'):
-                                # Create group for Puzzle/RC text
-                                group = QuestionGroup.objects.create(
-                                    title="Directions (Study the following information carefully)",
-                                    group_type="text",
-                                    context_text=q_data.get('passage'),
-                                    subject=subject,
-                                    order=section_order * 100
-                                )
-                            
-                            # Create Question
-                            question = Question.objects.create(
-                                topic=topic,
-                                group=group, # Link to group if exists
-                                text=q_data.get('text'),
-                                option_a=q_data.get('option_a'),
-                                option_b=q_data.get('option_b'),
-                                option_c=q_data.get('option_c'),
-                                option_d=q_data.get('option_d'),
-                                option_e=q_data.get('option_e'),
-                                correct_option=q_data.get('correct_option'),
-                                explanation=q_data.get('explanation'),
-                                difficulty=difficulty,
-                                is_ai_generated=True
-                            )
-                            
-                            # Link to Test with section
-                            TestQuestion.objects.create(mock_test=test, question=question, section=section)
-            else:
-                # Subject-based configuration (SBI/IBPS)
-                subject_config = config.get('subjects', {})
-                total_questions = sum(subject_config.values())
-                
-                # Generate questions for each subject
-                for sub_name, count in subject_config.items():
-                    questions_data = generate_test_questions(sub_name, count, difficulty)
-                    
-                    if questions_data:
-                        # Get or create subject
-                        subject = Subject.objects.filter(name=sub_name).first()
-                        if not subject:
-                            continue
-                            
-                        # Create Section
-                        section = TestSection.objects.create(mock_test=test, subject=subject)
-                        
-                        for q_data in questions_data:
-                            # Validate question text
-                            if not q_data.get('text'):
-                                print(f"Skipping question with missing text: {q_data}")
-                                continue
-
-                            # Find or create topic
-                            topic_name = q_data.get('topic', 'General')
-                            topic, _ = Topic.objects.get_or_create(name=topic_name, subject=subject, defaults={'slug': topic_name.lower().replace(' ', '-')})
-                            
-                            # Create Question
-                            question = Question.objects.create(
-                                topic=topic,
-                                text=q_data.get('text'),
-                                option_a=q_data.get('option_a'),
-                                option_b=q_data.get('option_b'),
-                                option_c=q_data.get('option_c'),
-                                option_d=q_data.get('option_d'),
-                                option_e=q_data.get('option_e'),
-                                correct_option=q_data.get('correct_option'),
-                                explanation=q_data.get('explanation'),
-                                difficulty=difficulty,
-                                is_ai_generated=True
-                            )
-                            
-                            # Link to Test
-                            TestQuestion.objects.create(mock_test=test, question=question, section=section)
-        else:
-            # Fallback to default configuration if not found
-            subject_config = {
-                'English Language': 30,
-                'Quantitative Aptitude': 35,
-                'Reasoning Ability': 35
-            }
-            total_questions = sum(subject_config.values())
-            
-            # Generate questions for each subject
-            for sub_name, count in subject_config.items():
-                questions_data = generate_test_questions(sub_name, count, difficulty)
-                
-                if questions_data:
-                    # Get or create subject
-                    subject = Subject.objects.filter(name=sub_name).first()
-                    if not subject:
-                        continue
-                        
-                    # Create Section
-                    section = TestSection.objects.create(mock_test=test, subject=subject)
-                    
-                    for q_data in questions_data:
-                        # Validate question text
-                        if not q_data.get('text'):
-                            print(f"Skipping question with missing text: {q_data}")
-                            continue
-
-                        # Find or create topic
-                        topic_name = q_data.get('topic', 'General')
-                        topic, _ = Topic.objects.get_or_create(name=topic_name, subject=subject, defaults={'slug': topic_name.lower().replace(' ', '-')})
-                        
-                        # Create Question
-                        question = Question.objects.create(
-                            topic=topic,
-                            text=q_data.get('text'),
-                            option_a=q_data.get('option_a'),
-                            option_b=q_data.get('option_b'),
-                            option_c=q_data.get('option_c'),
-                            option_d=q_data.get('option_d'),
-                            option_e=q_data.get('option_e'),
-                            correct_option=q_data.get('correct_option'),
-                            explanation=q_data.get('explanation'),
-                            difficulty=difficulty,
-                            is_ai_generated=True
-                        )
-                        
-                        # Link to Test
-                        TestQuestion.objects.create(mock_test=test, question=question, section=section)
-            
-        
-        messages.success(request, f"{exam_type} {stage} Mock Test with {total_questions} questions ({difficulty}) Generated Successfully!")
+
+        messages.success(request, f"{exam_type} {stage} Mock Test ({difficulty}) queued for generation. It will appear here once ready.")
         return redirect('test_list')
         
     return render(request, 'tests/generate_test.html')
 
+@login_required
+def generation_job_status(request, job_id):
+    job = get_object_or_404(TestGenerationJob, id=job_id, user=request.user)
+    return JsonResponse({
+        'id': job.id,
+        'status': job.status,
+        'progress': job.progress,
+        'total_steps': job.total_steps,
+        'percent': job.percent,
+        'message': job.message,
+        'error': job.error,
+        'test_id': job.mock_test_id if job.status == TestGenerationJob.STATUS_COMPLETED else None,
+    })
+
 @login_required
 def take_test(request, test_id):
     test = get_object_or_404(MockTest, id=test_id)
-    test_questions = TestQuestion.objects.filter(mock_test=test).select_related('question', 'question__group', 'section').order_by('section__section_order', 'question__group__order', 'question__question_number_in_group', 'id')
-    sections = TestSection.objects.filter(mock_test=test).order_by('section_order')
     
     if request.method == 'POST':
-        score = 0.0
-        correct = 0
-        wrong = 0
-        skipped = 0
-        total_questions = test_questions.count()
-        
-        # Pre-calculate section scoring maps if available
-        config = EXAM_CONFIGURATIONS.get(test.exam_type, {}).get(test.stage, {})
-        section_scoring_map = {} # section_name -> {positive, negative}
-        if 'sections' in config:
-            for sec_conf in config['sections']:
-                section_scoring_map[sec_conf['name']] = {
-                    'positive': sec_conf.get('positive_marks', 1.0),
-                    'negative': sec_conf.get('negative_marks', 0.25)
-                }
-        
-        # Fallback globals if not in section map
-        global_neg = config.get('negative_marks', 0.25)
+        # The submitted form holds the full answer map, cleared answers included, so it is authoritative;
+        # the autosaved draft only stands in when the form arrives without answers (e.g. no JavaScript)
+        selected_options = selected_options_from_post(request.POST)
+        if not selected_options and not request.POST.get('answers_complete'):
+            selected_options = load_draft_answers(request.user, test)
 
-        # Create Attempt
-        attempt = UserTestAttempt.objects.create(
-            user=request.user,
-            mock_test=test
-        )
+        # Grade in memory against the cached answer key and write the attempt + answers in one transaction
+        answer_key = get_answer_key(test)
 
-        for tq in test_questions:
-            selected_option = request.POST.get(f'question_{tq.question.id}')
-            is_correct = False
-            
-            # Determine marks for this specific question
-            pos_mark = 1.0
-            neg_mark = global_neg
-            
-            if tq.section and tq.section.section_name in section_scoring_map:
-                scoring = section_scoring_map[tq.section.section_name]
-                pos_mark = scoring['positive']
-                neg_mark = scoring['negative']
-            
-            if selected_option:
-                if selected_option == tq.question.correct_option:
-                    score += pos_mark
-                    correct += 1
-                    is_correct = True
-                else:
-                    score -= neg_mark # Section specific negative marking
-                    wrong += 1
-            else:
-                skipped += 1
-            
-            # Save Answer
-            UserTestAnswer.objects.create(
-                attempt=attempt,
-                question=tq.question,
-                selected_option=selected_option,
-                is_correct=is_correct
-            )
-        
-        # Update Attempt Stats
-        attempt.score = score
-        attempt.correct_count = correct
-        attempt.wrong_count = wrong
-        attempt.skipped_count = skipped
-        attempt.save()
-        
-        messages.success(request, f"Test Completed! You scored {score}/{total_questions}.")
+        # Time on test for the analytics rollup, from when the draft was opened (capped at the test duration)
+        started_at = draft_started_at(request.user, test)
+        time_spent = min((timezone.now() - started_at).total_seconds(), test.duration * 60) if started_at else 0
+
+        with transaction.atomic():
+            attempt = submit_attempt(request.user, test, selected_options, answer_key, time_spent)
+            discard_draft(request.user, test)
+        # Pre-render the result page the user is redirected to
+        cache_result(attempt)
+
+        messages.success(request, f"Test Completed! You scored {attempt.score}/{answer_key.size}.")
         return redirect('test_result', attempt_id=attempt.id)
 
-    # Prepare data for JS
-    questions_data = []
-    for tq in test_questions:
-        q = tq.question
-        questions_data.append({
-            'id': q.id,
-            'text': q.text,
-            'option_a': q.option_a,
-            'option_b': q.option_b,
-            'option_c': q.option_c,
-            'option_d': q.option_d,
-            'option_e': q.option_e,
-            'section_name': tq.section.section_name if tq.section else 'General',
-            'section_id': tq.section.id if tq.section else 0,
-            'group_title': q.group.title if q.group else None,
-            'group_context_text': q.group.context_text if q.group else None,
-            'group_context_image': q.group.context_image.url if q.group and q.group.context_image else None
-        })
-
-    sections_data = []
-    for section in sections:
-        sections_data.append({
-            'id': section.id,
-            'name': section.section_name,
-            'duration': section.section_duration
-        })
-
-    test_data = {
-        'testId': test.id,
-        'questions': questions_data,
-        'sections': sections_data
-    }
+    # Start the clock for time_spent on first open; a reload keeps the original start
+    open_draft(request.user, test)
 
+    # Only the section skeleton is embedded; questions are fetched per section from test_section_questions
+    manifest = get_test_manifest(test)
     return render(request, 'tests/take_test.html', {
         'test': test, 
-        'test_questions': test_questions,
-        'sections': sections,
-        'test_data': test_data
+        'test_manifest': manifest,
+        'first_section': manifest['sections'][0] if manifest['sections'] else None,
+        'question_count': sum(len(section['question_ids']) for section in manifest['sections'])
     })
 
 
+def _payload_state(request, test_id):
+    # Cheap version lookup shared by the ETag and Last-Modified checks
+    if not hasattr(request, '_payload_state'):
+        request._payload_state = MockTest.objects.filter(id=test_id).values('id', 'version', 'updated_at').first()
+    return request._payload_state
+
+def _section_etag(request, test_id, section_id):
+    state = _payload_state(request, test_id)
+    return f'test-{state["id"]}-v{state["version"]}-s{section_id}' if state else None
+
+def _section_last_modified(request, test_id, section_id):
+    state = _payload_state(request, test_id)
+    return state['updated_at'] if state else None
+
+@login_required
+@condition(etag_func=_section_etag, last_modified_func=_section_last_modified)
+def test_section_questions(request, test_id, section_id):
+    test = get_object_or_404(MockTest, id=test_id)
+    if section_id not in [section['id'] for section in get_test_manifest(test)['sections']]:
+        raise Http404("Section not found")
+
+    response = HttpResponse(get_section_payload_bytes(test, section_id), content_type='application/json')
+    # Let browsers keep the payload but revalidate it (304) on every load
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def autosave_answers(request, test_id):
+    test = get_object_or_404(MockTest, id=test_id)
+
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        answers = data.get('answers')
+        if not isinstance(answers, dict):
+            return JsonResponse({'error': 'Expected an "answers" object'}, status=400)
+
+        draft, saved = save_draft_answers(request.user, test, answers, get_answer_key(test))
+        return JsonResponse({'saved': saved, 'updated_at': draft.updated_at.isoformat()})
+
+    # GET: resume a previous session
+    return JsonResponse({'answers': {str(k): v for k, v in load_draft_answers(request.user, test).items()}})
+
 @login_required
 def test_result(request, attempt_id):
-    attempt = get_object_or_404(UserTestAttempt, id=attempt_id, user=request.user)
-    answers = attempt.answers.select_related('question').all()
-    
-    context = {
-        'attempt': attempt,
-        'answers': answers,
-        'test': attempt.mock_test
-    }
-    return render(request, 'tests/test_result.html', context)
+    # Rendered at grading time; a reopen is one version lookup and one cache read (tests/results.py)
+    version = UserTestAttempt.objects.filter(id=attempt_id, user=request.user).values_list('mock_test__version', flat=True).first()
+    if version is None:
+        raise Http404("No UserTestAttempt matches the given query.")
+    entry = get_cached_result(attempt_id, version)
+    if entry is None:
+        attempt = get_object_or_404(UserTestAttempt.objects.select_related('mock_test'), id=attempt_id, user=request.user)
+        entry = cache_result(attempt)
+
+    return render(request, 'tests/test_result.html', {'result_html': mark_safe(result_html(entry))})
+
+HISTORY_ORDER = ['-completed_at', '-id']
+
+def _history_page(request):
+    # One query per page: the test columns the history shows are joined in, and the cursor seeks on (user, completed_at, id)
+    attempts = UserTestAttempt.objects.filter(user=request.user).select_related('mock_test').only(
+        'id', 'completed_at', 'score', 'correct_count', 'wrong_count', 'skipped_count',
+        'mock_test__id', 'mock_test__title', 'mock_test__difficulty', 'mock_test__exam_type', 'mock_test__total_marks'
+    )
+    return keyset_page(attempts, HISTORY_ORDER, request.GET.get('cursor'), getattr(settings, 'HISTORY_PAGE_SIZE', 20))
 
 @login_required
 def test_history(request):
-    attempts = UserTestAttempt.objects.filter(user=request.user).order_by('-completed_at')
-    return render(request, 'tests/test_history.html', {'attempts': attempts})
+    attempts, next_cursor = _history_page(request)
+    first_page = not request.GET.get('cursor')
+    return render(request, 'tests/test_history.html', {
+        'attempts': attempts,
+        'next_cursor': next_cursor,
+        'first_page': first_page,
+        # Cached per user and dropped when an attempt is saved (users/stats.py)
+        'summary': get_dashboard_stats(request.user) if first_page else None,
+    })
+
+@login_required
+def test_history_api(request):
+    """
+    JSON version of test_history: ?cursor=... pages through the attempts,
+    newest first; ?summary=1 adds the user's cached overall stats.
+    """
+    attempts, next_cursor = _history_page(request)
+    data = {
+        'attempts': [{
+            'id': attempt.id,
+            'completed_at': attempt.completed_at.isoformat(),
+            'score': attempt.score,
+            'correct_count': attempt.correct_count,
+            'wrong_count': attempt.wrong_count,
+            'skipped_count': attempt.skipped_count,
+            'result_url': reverse('test_result', args=[attempt.id]),
+            'test': {
+                'id': attempt.mock_test.id,
+                'title': attempt.mock_test.title,
+                'difficulty': attempt.mock_test.difficulty,
+                'exam_type': attempt.mock_test.exam_type,
+                'total_marks': attempt.mock_test.total_marks,
+            },
+        } for attempt in attempts],
+        'next_cursor': next_cursor,
+    }
+    if request.GET.get('summary') == '1':
+        data['summary'] = get_dashboard_stats(request.user)
+    return JsonResponse(data)
 
 @login_required
 def delete_test(request, test_id):
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tests.models import UserTestAttempt
+from .stats import invalidate_dashboard_stats
+
+
+@receiver(post_save, sender=UserTestAttempt)
+@receiver(post_delete, sender=UserTestAttempt)
+def attempt_changed(sender, instance, **kwargs):
+    # After commit, so a dashboard read inside the window cannot re-cache the old stats
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_dashboard_stats(user_id))
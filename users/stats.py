@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Case, Count, F, FloatField, Max, Value, When
+from tests.models import MockTest, UserTestAttempt
+
+
+def _percentage():
+    # Attempts on tests without marks count as 0%, as in the original average
+    return Case(
+        When(mock_test__total_marks__gt=0, then=F('score') * 100.0 / F('mock_test__total_marks')),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def compute_dashboard_stats(user):
+    """
+    Per-exam-type attempt counts and score percentages from a single GROUP BY
+    query; the overall figures are derived from the groups.
+    """
+    exam_type_names = dict(MockTest.EXAM_TYPE_CHOICES)
+    rows = (
+        UserTestAttempt.objects.filter(user=user)
+        .values('mock_test__exam_type')
+        .annotate(tests_attempted=Count('id'), avg_score=Avg(_percentage()), best_score=Max(_percentage()))
+        .order_by('mock_test__exam_type')
+    )
+
+    by_exam_type = []
+    tests_attempted = 0
+    total_percentage = 0.0
+    for row in rows:
+        by_exam_type.append({
+            'exam_type': row['mock_test__exam_type'],
+            'name': exam_type_names.get(row['mock_test__exam_type'], row['mock_test__exam_type']),
+            'tests_attempted': row['tests_attempted'],
+            'avg_score': row['avg_score'] or 0,
+            'best_score': row['best_score'] or 0,
+        })
+        tests_attempted += row['tests_attempted']
+        total_percentage += (row['avg_score'] or 0) * row['tests_attempted']
+
+    return {
+        'tests_attempted': tests_attempted,
+        'avg_score': total_percentage / tests_attempted if tests_attempted else 0,
+        'by_exam_type': by_exam_type,
+    }
+
+
+def attempts_version(user_id):
+    """
+    Changes whenever one of the user's attempts is added or deleted. Read from
+    the database, so every process sees it at once, unlike a cache.delete on
+    the per-process LocMem cache. One COUNT/MAX answered from the user_id index.
+    """
+    row = UserTestAttempt.objects.filter(user_id=user_id).aggregate(n=Count('id'), last=Max('id'))
+    return f"{row['n']}.{row['last'] or 0}"
+
+
+def dashboard_stats_cache_key(user_id, version):
+    return f"dashboard_stats:{user_id}:{version}"
+
+
+def get_dashboard_stats(user):
+    key = dashboard_stats_cache_key(user.id, attempts_version(user.id))
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats(user)
+        cache.set(key, stats, getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 60 * 60))
+    return stats
+
+
+def invalidate_dashboard_stats(user_id):
+    """
+    Drops this process's entry for the current attempts. Only needed when an
+    attempt is edited in place (e.g. in the admin); new and deleted attempts
+    change the key, so other processes pick them up without this.
+    """
+    cache.delete(dashboard_stats_cache_key(user_id, attempts_version(user_id)))
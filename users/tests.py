@@ -1,3 +1,60 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from exams.models import Exam
+from tests.models import MockTest, UserTestAttempt
+from .stats import get_dashboard_stats
+
+
+class DashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        exam = Exam.objects.create(name='SBI PO', slug='sbi-po')
+        cls.sbi = MockTest.objects.create(title='SBI test', exam=exam, duration=60, exam_type='SBI', total_marks=100)
+        cls.ibps = MockTest.objects.create(title='IBPS test', exam=exam, duration=60, exam_type='IBPS', total_marks=50)
+        cls.user = get_user_model().objects.create_user(username='learner', password='p')
+
+    def setUp(self):
+        cache.clear()
+
+    def attempt(self, test, score):
+        with self.captureOnCommitCallbacks(execute=True):
+            return UserTestAttempt.objects.create(user=self.user, mock_test=test, score=score)
+
+    def test_stats_are_aggregated_per_exam_type(self):
+        self.attempt(self.sbi, 80)
+        self.attempt(self.sbi, 60)
+        self.attempt(self.ibps, 40)
+        stats = get_dashboard_stats(self.user)
+        self.assertEqual(stats['tests_attempted'], 3)
+        self.assertAlmostEqual(stats['avg_score'], 220 / 3)
+        by_type = {row['exam_type']: row for row in stats['by_exam_type']}
+        self.assertEqual((by_type['SBI']['avg_score'], by_type['SBI']['best_score']), (70, 80))
+        self.assertEqual(by_type['IBPS']['best_score'], 80)
+
+    def test_cached_until_attempts_change_without_a_delete(self):
+        self.attempt(self.sbi, 80)
+        get_dashboard_stats(self.user)
+        with mock.patch('users.stats.compute_dashboard_stats') as compute:
+            get_dashboard_stats(self.user)
+        compute.assert_not_called()
+
+        # Another process's cache is never told; the new attempt changes the key
+        with mock.patch('users.signals.invalidate_dashboard_stats'):
+            self.attempt(self.sbi, 40)
+        self.assertEqual(get_dashboard_stats(self.user)['tests_attempted'], 2)
+
+    def test_invalidation_waits_for_commit(self):
+        attempt = self.attempt(self.sbi, 80)
+        get_dashboard_stats(self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            attempt.score = 20
+            attempt.save()
+            # Still inside the transaction: nothing has been dropped yet
+            self.assertEqual(get_dashboard_stats(self.user)['avg_score'], 80)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_dashboard_stats(self.user)['avg_score'], 20)
@@ -16,29 +16,21 @@ def register(request):
     return render(request, 'users/register.html', {'form': form})
 
 from tests.models import UserTestAttempt
-from django.db.models import Avg
+from analytics.reports import MIN_ATTEMPTS_FOR_PLAN, topic_performance_by_subject, weak_topics
+from .stats import get_dashboard_stats
 
 @login_required
 def dashboard(request):
-    user_attempts = UserTestAttempt.objects.filter(user=request.user).select_related('mock_test')
-    
-    tests_attempted = user_attempts.count()
-    
-    # Calculate Average Score Percentage
-    avg_score = 0
-    if tests_attempted > 0:
-        total_percentage = 0
-        for attempt in user_attempts:
-            if attempt.mock_test.total_marks > 0:
-                total_percentage += (attempt.score / attempt.mock_test.total_marks) * 100
-        avg_score = total_percentage / tests_attempted
+    # Aggregated in SQL and cached per user until their next attempt is saved
+    stats = get_dashboard_stats(request.user)
 
     # Recent Activity
-    recent_activity = user_attempts.order_by('-completed_at')[:5]
+    recent_activity = UserTestAttempt.objects.filter(user=request.user).select_related('mock_test').order_by('-completed_at')[:5]
     
     context = {
-        'tests_attempted': tests_attempted,
-        'avg_score': avg_score,
+        'tests_attempted': stats['tests_attempted'],
+        'avg_score': stats['avg_score'],
+        'by_exam_type': stats['by_exam_type'],
         'recent_activity': recent_activity
     }
     return render(request, 'users/dashboard.html', context)
@@ -61,8 +53,14 @@ def profile(request):
 
 @login_required
 def study_plan(request):
-    return render(request, 'users/study_plan.html')
+    # Weakest topics first, straight from the analytics rollup
+    return render(request, 'users/study_plan.html', {
+        'weak_topics': weak_topics(request.user),
+        'min_attempts': MIN_ATTEMPTS_FOR_PLAN
+    })
 
 @login_required
 def analytics(request):
-    return render(request, 'users/analytics.html')
+    return render(request, 'users/analytics.html', {
+        'subjects': topic_performance_by_subject(request.user)
+    })